@@ -0,0 +1,45 @@
+from thermostat.climate_zone import (
+    retrieve_climate_zone,
+    retrieve_climate_zones,
+    get_climate_zone_lookup,
+)
+
+import pandas as pd
+
+import pytest
+
+
+def test_retrieve_climate_zone():
+    climate_zone = retrieve_climate_zone(None, "04469")
+    assert climate_zone.climate_zone == "Very-Cold/Cold"
+    assert climate_zone.baseline_regional_cooling_comfort_temperature == 73
+    assert climate_zone.baseline_regional_heating_comfort_temperature == 68
+
+    assert retrieve_climate_zone(None, "99999") == (None, None, None)
+    assert get_climate_zone_lookup() is get_climate_zone_lookup(None)
+
+
+def test_retrieve_climate_zone_mapping(tmpdir):
+    mapping = tmpdir.join("mapping.csv")
+    mapping.write("zipcode,group\n01234,Marine\n")
+    climate_zone = retrieve_climate_zone(str(mapping), "01234")
+    assert climate_zone.climate_zone == "Marine"
+    assert pd.isnull(climate_zone.baseline_regional_cooling_comfort_temperature)
+    assert climate_zone.baseline_regional_heating_comfort_temperature == 67
+    assert get_climate_zone_lookup(str(mapping)) is get_climate_zone_lookup(str(mapping))
+
+    with pytest.raises(ValueError):
+        retrieve_climate_zone(str(tmpdir.join("missing.csv")), "01234")
+
+
+def test_retrieve_climate_zones():
+    metadata = pd.DataFrame({"zipcode": ["04469", "33155", "99999"]}, index=[3, 1, 2])
+    climate_zones = retrieve_climate_zones(None, metadata.zipcode)
+    assert list(climate_zones.index) == [3, 1, 2]
+    for i, zipcode in metadata.zipcode.items():
+        expected = retrieve_climate_zone(None, zipcode)
+        for field, value in expected._asdict().items():
+            if value is None:
+                assert pd.isnull(climate_zones.loc[i, field])
+            else:
+                assert climate_zones.loc[i, field] == value
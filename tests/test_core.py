@@ -1,10 +1,13 @@
 from thermostat.importers import from_csv
+from thermostat.core import count_daily_nulls
 from thermostat.util.testing import get_data_path
 
 import numpy as np
 import pandas as pd
 
 from datetime import datetime
+import copy
+import pickle
 
 import pytest
 
@@ -93,6 +96,70 @@ def test_interpolate_three_missing(thermostat_type_1):
     np.testing.assert_allclose(s_intp, [8,6.25,np.nan,2.75,1,7])
 
 
+def test_count_daily_nulls():
+    hourly_index = pd.date_range("2012-01-01", periods=72, freq="H")
+    values = np.ones(72)
+    values[[0, 1, 30, 31, 32]] = np.nan
+    series = pd.Series(values, index=hourly_index)
+    daily_index = pd.date_range("2012-01-01", periods=3, freq="D")
+
+    expected = series.groupby(series.index.date).apply(lambda x: x.isnull().sum()).values
+    np.testing.assert_array_equal(count_daily_nulls(series, daily_index), expected)
+    np.testing.assert_array_equal(count_daily_nulls(series, daily_index), [2, 3, 0])
+
+    # Hours not covering the days exactly are matched by date.
+    np.testing.assert_array_equal(count_daily_nulls(series[1:], daily_index), [1, 3, 0])
+    daily_index = pd.date_range("2011-12-31", periods=5, freq="D")
+    np.testing.assert_array_equal(count_daily_nulls(series, daily_index), [-1, 2, 3, 0, -1])
+
+
+def test_core_day_temperature_mask(thermostat_type_1):
+    thermostat = copy.copy(thermostat_type_1)
+    daily_index = thermostat.heat_runtime.index
+    mask = thermostat.get_core_day_temperature_mask(daily_index)
+    expected = (thermostat.temperature_in.groupby(thermostat.temperature_in.index.date)
+                .apply(lambda x: x.isnull().sum() <= 2).values &
+                thermostat.temperature_out.groupby(thermostat.temperature_out.index.date)
+                .apply(lambda x: x.isnull().sum() <= 2).values)
+    np.testing.assert_array_equal(mask, expected)
+    assert thermostat.get_core_day_temperature_mask(thermostat.cool_runtime.index) is mask
+
+    # Recomputed when a temperature series is replaced.
+    temperature_in = thermostat.temperature_in.copy()
+    temperature_in[:3] = np.nan
+    thermostat.temperature_in = temperature_in
+    new_mask = thermostat.get_core_day_temperature_mask(daily_index)
+    assert not new_mask[0]
+    np.testing.assert_array_equal(new_mask[1:], mask[1:])
+
+
+def test_intermediate_cache(thermostat_type_1, core_heating_day_set_type_1_entire):
+    thermostat = copy.copy(thermostat_type_1)
+    core_day_set = core_heating_day_set_type_1_entire
+    temperature_in = thermostat.get_core_day_set_hourly(core_day_set, "temperature_in")
+    pd.testing.assert_series_equal(
+        temperature_in, thermostat.temperature_in[core_day_set.hourly])
+    assert thermostat.get_core_day_set_hourly(core_day_set, "temperature_in") is temperature_in
+
+    # Dropped by core day set name, or altogether.
+    thermostat.invalidate_cache("other")
+    assert thermostat.get_core_day_set_hourly(core_day_set, "temperature_in") is temperature_in
+    thermostat.invalidate_cache(core_day_set.name)
+    temperature_in = thermostat.get_core_day_set_hourly(core_day_set, "temperature_in")
+    thermostat.invalidate_cache()
+    assert thermostat.get_core_day_set_hourly(core_day_set, "temperature_in") is not temperature_in
+
+    # Recomputed when the series is replaced.
+    thermostat.temperature_in = thermostat.temperature_in + 1
+    np.testing.assert_allclose(
+        thermostat.get_core_day_set_hourly(core_day_set, "temperature_in").values,
+        temperature_in.values + 1)
+
+    # Not sent to other processes.
+    assert "_intermediates" in thermostat.__dict__
+    assert "_intermediates" not in pickle.loads(pickle.dumps(thermostat)).__dict__
+
+
 def test_thermostat_type_1_get_core_heating_days(thermostat_type_1):
     core_heating_day_sets = thermostat_type_1.get_core_heating_days(
             method="year_mid_to_mid")
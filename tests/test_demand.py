@@ -4,6 +4,10 @@ from numpy.testing import assert_allclose
 
 import pytest
 
+from thermostat.demand import get_daily_deltaT_array, daily_demand, baseline_demand, fit_tau
+from thermostat.demand import fit_tau_batch, stack_daily_arrays, fit_demand_batch
+from thermostat.multiple import multiple_thermostat_get_demand
+
 from .fixtures.thermostats import thermostat_type_1
 from .fixtures.thermostats import core_heating_day_set_type_1_entire as core_heating_day_set_type_1
 from .fixtures.thermostats import core_cooling_day_set_type_1_entire as core_cooling_day_set_type_1
@@ -33,3 +37,140 @@ def test_get_heating_demand(thermostat_type_1, core_heating_day_set_type_1, metr
     demand, tau_estimate, alpha_estimate, mse, rmse, cvrmse, mape, mae = \
             thermostat_type_1.get_heating_demand(core_heating_day_set_type_1)
     assert_allclose(demand.mean(), metrics_type_1_data[1]["mean_demand"], rtol=RTOL, atol=ATOL)
+
+
+def test_get_daily_deltaT_array():
+    hourly = pd.Series(np.arange(48, dtype=float))
+    daily = get_daily_deltaT_array(hourly)
+    assert daily.shape == (2, 24)
+    assert_allclose(daily[1], np.arange(24, 48))
+
+    with pytest.raises(ValueError):
+        get_daily_deltaT_array(np.arange(25, dtype=float))
+
+
+def test_daily_demand():
+    index = pd.date_range(start="2011-01-01", periods=72, freq="H")
+    hourly = pd.Series(np.tile(np.linspace(-10, 10, 24), 3), index=index)
+    hourly.iloc[5] = np.nan
+    daily = get_daily_deltaT_array(hourly)
+
+    for tau in (-3.5, 0, 2.25):
+        expected_cooling = [
+            (tau - day).clip(lower=0).sum() / 24
+            for _, day in hourly.groupby(hourly.index.date)]
+        expected_heating = [
+            (day - tau).clip(lower=0).sum() / 24
+            for _, day in hourly.groupby(hourly.index.date)]
+        assert_allclose(daily_demand(daily, tau, "cooling"), expected_cooling)
+        assert_allclose(daily_demand(daily, tau, "heating"), expected_heating)
+
+    with pytest.raises(NotImplementedError):
+        daily_demand(daily, 0, "other")
+
+
+def test_baseline_demand():
+    index = pd.date_range(start="2011-01-01", periods=72, freq="H")
+    hourly_temp_out = pd.Series(np.tile(np.linspace(50, 90, 24), 3), index=index)
+    hourly_temp_out.iloc[30] = np.nan
+    daily_temp_out = get_daily_deltaT_array(hourly_temp_out)
+    temp_baselines = [68.5, 72, 75.25]
+    tau = 1.5
+
+    cooling = baseline_demand(daily_temp_out, temp_baselines, tau, "cooling")
+    heating = baseline_demand(daily_temp_out, temp_baselines, tau, "heating")
+    assert cooling.shape == heating.shape == (3, 3)
+    for row, temp_baseline in enumerate(temp_baselines):
+        hourly_cdd = (tau - (temp_baseline - hourly_temp_out)).clip(lower=0)
+        hourly_hdd = (temp_baseline - hourly_temp_out - tau).clip(lower=0)
+        assert_allclose(cooling[row], hourly_cdd.groupby(index.date).sum() / 24)
+        assert_allclose(heating[row], hourly_hdd.groupby(index.date).sum() / 24)
+
+
+def _sum_squared_error(daily_deltaT, daily_runtime, tau, method):
+    demand = daily_demand(daily_deltaT, tau, method)
+    if demand.sum() == 0:
+        return np.inf
+    alpha = np.nansum(daily_runtime) / demand.sum()
+    return np.nansum((daily_runtime - alpha * demand) ** 2)
+
+
+@pytest.mark.parametrize("method", ["cooling", "heating"])
+def test_fit_tau(method):
+    rng = np.random.RandomState(0)
+    daily_deltaT = rng.normal(0, 8, size=(60, 24)) + rng.normal(0, 5, size=(60, 1))
+    daily_deltaT[3, 7] = np.nan
+    true_tau = 2.0 if method == "cooling" else -2.0
+    daily_runtime = 30 * daily_demand(daily_deltaT, true_tau, method) + rng.normal(0, 5, size=60)
+
+    tau = fit_tau(daily_deltaT, daily_runtime, method)
+    best_error = _sum_squared_error(daily_deltaT, daily_runtime, tau, method)
+
+    # The fit is a minimum of the error near the true tau.
+    for step in (-0.05, 0.05):
+        assert best_error <= _sum_squared_error(daily_deltaT, daily_runtime, tau + step, method)
+    assert_allclose(tau, true_tau, atol=1.5)
+
+
+def test_fit_tau_degenerate():
+    daily_deltaT = np.tile(np.linspace(-10, 10, 24), (3, 1))
+    assert np.isnan(fit_tau(daily_deltaT[:0], np.zeros(0), "cooling"))
+    # A single day fits exactly for any tau, so the starting guess is kept.
+    assert_allclose(fit_tau(daily_deltaT[:1], np.ones(1), "heating"), 0, atol=1e-6)
+
+    with pytest.raises(NotImplementedError):
+        fit_tau(daily_deltaT, np.ones(3), "other")
+
+
+def test_fit_demand_batch():
+    rng = np.random.RandomState(1)
+    daily_deltaTs, daily_runtimes = [], []
+    for n_days in (40, 0, 1, 75, 12):
+        daily_deltaT = rng.normal(5, 8, size=(n_days, 1)) + rng.normal(0, 4, size=(n_days, 24))
+        daily_runtimes.append(30 * daily_demand(daily_deltaT, -1.0, "heating") + rng.normal(0, 5, size=n_days))
+        daily_deltaTs.append(daily_deltaT)
+
+    daily_deltaT, daily_runtime, day_mask = stack_daily_arrays(daily_deltaTs, daily_runtimes)
+    assert daily_deltaT.shape == (5, 75, 24)
+    assert day_mask.sum(axis=1).tolist() == [40, 0, 1, 75, 12]
+
+    taus = fit_tau_batch(daily_deltaT, daily_runtime, "heating", day_mask)
+    expected = [fit_tau(d, r, "heating") for d, r in zip(daily_deltaTs, daily_runtimes)]
+    assert_allclose(taus, expected)
+
+    demand, tau, alpha, mse, rmse, cvrmse, mape, mae = \
+        fit_demand_batch(daily_deltaT, daily_runtime, "heating", day_mask)
+    assert demand.shape == (5, 75)
+    assert np.isnan(demand[0, 40:]).all()
+    assert np.isnan([tau[1], alpha[1], mse[1], mae[1]]).all()
+    for i, (d, r) in enumerate(zip(daily_deltaTs, daily_runtimes)):
+        if len(d) == 0:
+            continue
+        single = fit_demand_batch(d[np.newaxis], r[np.newaxis], "heating")
+        assert_allclose(demand[i, :len(d)], single[0][0])
+        assert_allclose([v[i] for v in (tau, alpha, mse, rmse, cvrmse, mape, mae)],
+                        [v[0] for v in single[1:]])
+
+
+def test_multiple_thermostat_get_demand(thermostat_type_1, core_cooling_day_set_type_1, core_heating_day_set_type_1):
+    for method, core_day_set, get_demand in [
+            ("cooling", core_cooling_day_set_type_1, thermostat_type_1.get_cooling_demand),
+            ("heating", core_heating_day_set_type_1, thermostat_type_1.get_heating_demand)]:
+        expected = get_demand(core_day_set)
+        results = multiple_thermostat_get_demand(
+            [thermostat_type_1, thermostat_type_1], [core_day_set, core_day_set], method)
+        assert len(results) == 2
+        for result in results:
+            assert len(result) == len(expected)
+            assert_allclose(result[0], expected[0])
+            assert_allclose(result[1:], expected[1:])
+
+
+def test_get_demands(thermostat_type_1, core_cooling_day_set_type_1, core_cooling_day_set_type_1_empty):
+    core_day_sets = [core_cooling_day_set_type_1, core_cooling_day_set_type_1_empty]
+    demands = thermostat_type_1.get_demands(core_day_sets, "cooling")
+    assert len(demands) == 2
+    for core_day_set, result in zip(core_day_sets, demands):
+        expected = thermostat_type_1.get_cooling_demand(core_day_set)
+        pd.testing.assert_series_equal(result[0], expected[0])
+        assert_allclose(result[1:], expected[1:])
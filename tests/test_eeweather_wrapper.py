@@ -0,0 +1,88 @@
+from thermostat import eeweather_wrapper
+from thermostat.eeweather_wrapper import (
+    get_indexed_temperatures_eeweather,
+    get_station_year_temperatures,
+    weather_cache_directory,
+    WEATHER_CACHE_DIRECTORY_VARIABLE,
+)
+
+from eeweather.exceptions import ISDDataNotAvailableError
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import pytest
+
+
+@pytest.fixture
+def isd_calls(monkeypatch):
+    calls = []
+
+    def load_isd_hourly_temp_data(usaf_id, start, end, **kwargs):
+        calls.append((usaf_id, start.year))
+        if start.year == 2013:
+            raise ISDDataNotAvailableError(usaf_id, start.year)
+        index = pd.date_range(start, end.floor('H'), freq='H')
+        return pd.Series(np.arange(len(index), dtype=float), index=index), []
+
+    monkeypatch.setattr(eeweather_wrapper.eeweather, "load_isd_hourly_temp_data", load_isd_hourly_temp_data)
+    monkeypatch.delenv(WEATHER_CACHE_DIRECTORY_VARIABLE, raising=False)
+    get_station_year_temperatures.cache_clear()
+    yield calls
+    get_station_year_temperatures.cache_clear()
+
+
+def test_get_indexed_temperatures_eeweather(isd_calls):
+    index = pd.date_range("2011-12-31 22:00", periods=4, freq="H", tz="UTC")
+    temperatures = get_indexed_temperatures_eeweather("000000", index)
+    # Hours from the start of each year, converted to Fahrenheit.
+    np.testing.assert_allclose(temperatures.values, [8758 * 1.8 + 32, 8759 * 1.8 + 32, 32, 33.8])
+    assert (temperatures.index == index).all()
+
+    # Station-years are fetched once.
+    get_indexed_temperatures_eeweather("000000", index[1:])
+    assert isd_calls == [("000000", 2011), ("000000", 2012)]
+
+    empty = get_indexed_temperatures_eeweather("000000", index[:0])
+    assert len(empty) == 0
+
+
+def test_get_indexed_temperatures_eeweather_missing_year(isd_calls):
+    index = pd.date_range("2012-12-31 23:00", periods=2, freq="H", tz="UTC")
+    temperatures = get_indexed_temperatures_eeweather("000000", index)
+    assert not np.isnan(temperatures.values[0])
+    assert np.isnan(temperatures.values[1])
+
+    with pytest.raises(ValueError):
+        get_indexed_temperatures_eeweather("000000", index[1:])
+
+
+def test_weather_cache_directory(isd_calls, tmpdir, monkeypatch):
+    index = pd.date_range("2011-06-01", periods=24, freq="H", tz="UTC")
+    with weather_cache_directory(str(tmpdir)) as path:
+        assert os.environ[WEATHER_CACHE_DIRECTORY_VARIABLE] == str(tmpdir)
+        expected = get_indexed_temperatures_eeweather("000000", index)
+        assert os.path.exists(os.path.join(path, "000000-2011.npy"))
+
+        # Another process reads the station-year from the directory.
+        get_station_year_temperatures.cache_clear()
+        temperatures = get_indexed_temperatures_eeweather("000000", index)
+        pd.testing.assert_series_equal(temperatures, expected)
+        assert isd_calls == [("000000", 2011)]
+
+        # Nested runs share the directory.
+        with weather_cache_directory() as nested_path:
+            assert nested_path == path
+
+    assert WEATHER_CACHE_DIRECTORY_VARIABLE not in os.environ
+
+    with weather_cache_directory() as temporary_path:
+        assert os.path.isdir(temporary_path)
+    assert not os.path.exists(temporary_path)
+
+    # A given directory is used without creating a temporary one.
+    monkeypatch.setattr(eeweather_wrapper.tempfile, "TemporaryDirectory", None)
+    with weather_cache_directory(str(tmpdir)) as path:
+        assert path == str(tmpdir)
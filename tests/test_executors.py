@@ -0,0 +1,56 @@
+from thermostat.executors import SerialExecutor, ThreadExecutor, ProcessExecutor
+from thermostat.executors import FuturesExecutor, get_executor, lpt_chunks, imap_chunks
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+def _square(x):
+    return x * x
+
+
+@pytest.mark.parametrize("executor", [
+    SerialExecutor(),
+    ThreadExecutor(2),
+    ProcessExecutor(2, chunksize=3),
+    FuturesExecutor(ThreadPoolExecutor(2), shutdown=True),
+])
+def test_executor_imap(executor):
+    with executor:
+        assert list(executor.imap(_square, range(10))) == [x * x for x in range(10)]
+        assert sorted(executor.imap(_square, range(10), ordered=False)) == [x * x for x in range(10)]
+
+
+def test_get_executor():
+    assert isinstance(get_executor(), ProcessExecutor)
+    assert get_executor("process", 3).processes == 3
+    assert isinstance(get_executor("serial"), SerialExecutor)
+    assert get_executor("thread", 2).workers == 2
+
+    executor = SerialExecutor()
+    assert get_executor(executor) is executor
+    with ThreadPoolExecutor(1) as pool:
+        assert get_executor(pool).executor is pool
+
+    with pytest.raises(ValueError):
+        get_executor("cluster")
+    with pytest.raises(TypeError):
+        get_executor(4)
+
+
+def test_lpt_chunks():
+    costs = [1, 10, 1, 1, 8, 1, 1, 1, 1, 1]
+    chunks = lpt_chunks(costs, n_workers=2, chunks_per_worker=2)
+    # Expensive jobs first and on their own, cheap ones batched in order.
+    assert chunks == [[1], [4], [0, 2, 3, 5, 6, 7, 8], [9]]
+    assert sorted(i for chunk in chunks for i in chunk) == list(range(len(costs)))
+    assert lpt_chunks([], 4) == []
+
+
+def test_imap_chunks():
+    items = list(range(10, 20))
+    chunks = lpt_chunks(items, n_workers=2)
+    with ProcessExecutor(2) as executor:
+        results = sorted(imap_chunks(executor, _square, items, chunks))
+    assert results == [(i, x * x) for i, x in enumerate(items)]
@@ -1,5 +1,9 @@
 from thermostat.importers import from_csv
+from thermostat.importers import from_parquet
+from thermostat.convert import csv_to_parquet
 from thermostat.importers import normalize_utc_offset
+from thermostat.importers import group_rows_by_station, _read_metadata_csv
+from thermostat.stations import get_closest_station_by_zipcode
 from thermostat.util.testing import get_data_path
 import datetime
 
@@ -46,3 +50,94 @@ def test_utc_offset(thermostat_type_1_utc, thermostat_type_1_utc_bad):
     # Load a thermostat with utc offset == 0
     assert(isinstance(thermostat_type_1_utc.cool_runtime, pd.Series))
     assert(thermostat_type_1_utc_bad is None)
+
+def test_import_csv_fast_csv(thermostat_type_1):
+    thermostat = next(from_csv(
+        get_data_path("data/metadata_type_1_single.csv"), fast_csv=True))
+
+    for attribute in [
+            "cool_runtime", "heat_runtime",
+            "auxiliary_heat_runtime", "emergency_heat_runtime",
+            "cooling_setpoint", "heating_setpoint",
+            "temperature_in", "temperature_out"]:
+        pd.testing.assert_series_equal(
+            getattr(thermostat, attribute), getattr(thermostat_type_1, attribute))
+
+def test_from_parquet(thermostat_type_1, tmpdir):
+    dataset_path = str(tmpdir.join("dataset"))
+    metadata = csv_to_parquet(get_data_path("data/metadata_type_1_single.csv"), dataset_path)
+    assert metadata.thermostat_id.tolist() == [thermostat_type_1.thermostat_id]
+
+    thermostats = list(from_parquet(dataset_path))
+    assert len(thermostats) == 1
+    thermostat = thermostats[0]
+    assert thermostat.equipment_type == thermostat_type_1.equipment_type
+    assert thermostat.zipcode == thermostat_type_1.zipcode
+
+    for attribute in [
+            "cool_runtime", "heat_runtime",
+            "auxiliary_heat_runtime", "emergency_heat_runtime",
+            "cooling_setpoint", "heating_setpoint",
+            "temperature_in", "temperature_out"]:
+        pd.testing.assert_series_equal(
+            getattr(thermostat, attribute), getattr(thermostat_type_1, attribute))
+
+def test_import_csv_stream(thermostat_type_1):
+    thermostats = from_csv(get_data_path("data/metadata_type_1_single.csv"), stream=True, window=1)
+    assert not isinstance(thermostats, list)
+    thermostats = list(thermostats)
+    assert len(thermostats) == 1
+    pd.testing.assert_series_equal(thermostats[0].temperature_in, thermostat_type_1.temperature_in)
+
+
+def test_import_csv_stream_missing(caplog):
+    thermostats = list(from_csv(
+        get_data_path("data/metadata_type_1_single_utc_offset_bad.csv"), stream=True))
+    assert thermostats == []
+    assert "Unable to load 1 thermostat records" in caplog.text
+
+    with pytest.raises(ValueError):
+        list(from_csv(get_data_path("data/metadata_type_1_single.csv"), stream=True, window=0))
+
+
+def test_group_rows_by_station():
+    metadata = _read_metadata_csv(get_data_path("data/metadata.csv"))
+    groups = group_rows_by_station(metadata, n_workers=4)
+
+    indices = sorted(i for _, rows in groups for i, _ in rows)
+    assert indices == list(metadata.index)
+    for station, rows in groups:
+        assert 0 < len(rows) <= 9
+        for _, row in rows:
+            assert get_closest_station_by_zipcode(row.zipcode) == station
+    sizes = [len(rows) for _, rows in groups]
+    assert sizes == sorted(sizes, reverse=True)
+
+    # Each station has three rows, split into groups of at most two.
+    metadata = pd.concat([metadata] * 3, ignore_index=True)
+    groups = group_rows_by_station(metadata, n_workers=1, max_group_size=2)
+    assert max(len(rows) for _, rows in groups) == 2
+    assert sorted(i for _, rows in groups for i, _ in rows) == list(metadata.index)
+
+    # Shuffling only reorders groups of the same size.
+    shuffled = group_rows_by_station(metadata, n_workers=1, max_group_size=2, shuffle=True)
+    assert [len(rows) for _, rows in shuffled] == [len(rows) for _, rows in groups]
+    assert sorted(i for _, rows in shuffled for i, _ in rows) == list(metadata.index)
+
+
+def test_import_csv_group_by_station():
+    metadata_filename = get_data_path("data/metadata_single_emg_aux_constant_on_outlier.csv")
+    # Grouping is the default and replaces shuffling the rows, so the
+    # thermostats come back in the order of the metadata.
+    grouped = list(from_csv(metadata_filename))
+    ungrouped = list(from_csv(metadata_filename, shuffle=False, group_by_station=False))
+    assert len(grouped) == len(ungrouped) == 5
+
+    assert [t.thermostat_id for t in grouped] == \
+        _read_metadata_csv(metadata_filename).thermostat_id.tolist()
+    for a, b in zip(grouped, ungrouped):
+        assert a.station == b.station
+        pd.testing.assert_series_equal(a.temperature_out, b.temperature_out)
+
+    streamed = list(from_csv(metadata_filename, stream=True, window=2))
+    assert sorted(t.thermostat_id for t in streamed) == sorted(t.thermostat_id for t in ungrouped)
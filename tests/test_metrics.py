@@ -1,5 +1,7 @@
-from thermostat.exporters import metrics_to_csv
+from thermostat.exporters import metrics_to_csv, MetricsTable, COLUMNS
 from thermostat.multiple import multiple_thermostat_calculate_epa_field_savings_metrics
+from thermostat.multiple import multiple_thermostat_calculate_epa_field_savings_metrics_from_csv
+from thermostat.util.testing import get_data_path
 
 import pandas as pd
 import numpy as np
@@ -69,6 +71,21 @@ def test_multiple_thermostat_calculate_epa_field_savings_metrics_type_1(metrics_
         else:
             assert_allclose(test_value, target_value, rtol=RTOL, atol=ATOL)
 
+def test_multiple_thermostat_calculate_epa_field_savings_metrics_from_csv(metrics_type_1_multiple):
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics_from_csv(
+        get_data_path("data/metadata_type_1_single.csv"))
+    assert len(metrics) == len(metrics_type_1_multiple)
+
+    for test_metrics, target_metrics in zip(metrics, metrics_type_1_multiple):
+        assert test_metrics.keys() == target_metrics.keys()
+        for key in test_metrics.keys():
+            test_value = test_metrics[key]
+            target_value = target_metrics[key]
+            if isinstance(test_value, six.string_types) or test_value is None:
+                assert test_value == target_value
+            else:
+                assert_allclose(test_value, target_value, rtol=RTOL, atol=ATOL)
+
 def test_calculate_epa_field_savings_metrics_type_2(thermostat_type_2):
     metrics_type_2_entire = thermostat_type_2.calculate_epa_field_savings_metrics()
     assert len(metrics_type_2_entire) == 2
@@ -327,3 +344,56 @@ def test_metrics_to_csv(metrics_type_1):
 	    'rhu2_50F_to_60F_compressor_duty_cycle',
 
         ]
+
+def test_metrics_table(metrics_type_1, thermostat_type_2):
+    metrics = metrics_type_1 + thermostat_type_2.calculate_epa_field_savings_metrics()
+    expected = pd.DataFrame(metrics, columns=COLUMNS)
+
+    table = MetricsTable(capacity=1)
+    table.extend(metrics)
+    assert len(table) == len(metrics)
+    pd.testing.assert_frame_equal(table.to_dataframe(), expected)
+
+    # Collected by the calculation itself, and combined with other tables.
+    collected = thermostat_type_2.calculate_epa_field_savings_metrics(
+        metrics_table=MetricsTable())
+    combined = MetricsTable(capacity=1)
+    combined.extend(metrics_type_1)
+    combined.extend(collected)
+    pd.testing.assert_frame_equal(combined.to_dataframe(), expected)
+
+    fd, fname = tempfile.mkstemp()
+    pd.testing.assert_frame_equal(metrics_to_csv(table, fname), expected)
+    assert pd.read_csv(fname).equals(pd.read_csv(six.StringIO(expected.to_csv(index=False))))
+
+    arrow_table = table.to_arrow()
+    assert arrow_table.column_names == COLUMNS
+    pd.testing.assert_frame_equal(arrow_table.to_pandas(), expected)
+
+def test_multiple_thermostat_calculate_epa_field_savings_metrics_dataframe(metrics_type_1_multiple):
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics_from_csv(
+        get_data_path("data/metadata_type_1_single.csv"), result_format="dataframe")
+    pd.testing.assert_frame_equal(metrics, pd.DataFrame(metrics_type_1_multiple, columns=COLUMNS))
+
+    with pytest.raises(ValueError):
+        multiple_thermostat_calculate_epa_field_savings_metrics([], result_format="dict")
+
+
+def test_multiple_thermostat_calculate_epa_field_savings_metrics_order(thermostat_type_1, thermostat_type_4):
+    # Type 1 thermostats are scheduled first, but the input order is kept.
+    thermostats = [thermostat_type_4, thermostat_type_1]
+    expected = [metric for thermostat in thermostats
+                for metric in thermostat.calculate_epa_field_savings_metrics()]
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics(thermostats)
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(metrics, columns=COLUMNS), pd.DataFrame(expected, columns=COLUMNS))
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread"])
+def test_multiple_thermostat_calculate_epa_field_savings_metrics_executor(
+        thermostat_type_1, metrics_type_1_multiple, executor):
+    # Duplicate thermostat IDs are counted once, as with the default pool.
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics(
+        [thermostat_type_1, thermostat_type_1], executor=executor)
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(metrics, columns=COLUMNS), pd.DataFrame(metrics_type_1_multiple, columns=COLUMNS))
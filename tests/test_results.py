@@ -0,0 +1,107 @@
+from thermostat.results import ResultStore, MetricsJournal, metrics_key
+from thermostat.exporters import metrics_to_csv, COLUMNS
+from thermostat.multiple import multiple_thermostat_calculate_epa_field_savings_metrics
+from thermostat.multiple import multiple_thermostat_calculate_epa_field_savings_metrics_from_csv
+from thermostat.util.testing import get_data_path
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+import pytest
+
+from .fixtures.thermostats import thermostat_type_1
+
+
+def test_metrics_key(thermostat_type_1):
+    key = metrics_key(thermostat_type_1)
+    assert key == metrics_key(thermostat_type_1, core_cooling_day_set_method="entire_dataset")
+    assert key != metrics_key(thermostat_type_1, core_cooling_day_set_method="year_end_to_end")
+
+    # New weather data for the station changes the key.
+    changed = copy.copy(thermostat_type_1)
+    changed.temperature_out = thermostat_type_1.temperature_out + 0.5
+    assert key != metrics_key(changed)
+
+    with pytest.raises(TypeError):
+        metrics_key(thermostat_type_1, climate_zone_mapping={})
+
+
+def test_result_store(tmpdir):
+    store = ResultStore(str(tmpdir.join("results")))
+    metrics = [{"ct_identifier": "a", "n_days": np.int64(3), "rhu": np.nan, "tau": 1.25, "zone": None}]
+    assert store.get("abc") is None
+
+    store.put("abc", metrics)
+    assert "abc" in store
+    stored = store.get("abc")
+    assert stored[0]["n_days"] == 3 and np.isnan(stored[0]["rhu"])
+    assert stored[0]["tau"] == 1.25 and stored[0]["zone"] is None
+
+    store.put("def", metrics)
+    assert store.prune(["def"]) == 1
+    assert store.keys() == ["def"]
+
+
+def test_multiple_thermostat_calculate_epa_field_savings_metrics_result_store(thermostat_type_1, tmpdir):
+    path = str(tmpdir.join("results"))
+    expected = metrics_to_csv(
+        multiple_thermostat_calculate_epa_field_savings_metrics([thermostat_type_1]),
+        str(tmpdir.join("expected.csv")))
+
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics([thermostat_type_1], result_store=path)
+    metrics_to_csv(metrics, str(tmpdir.join("stored.csv")))
+    with open(str(tmpdir.join("expected.csv"))) as f1, open(str(tmpdir.join("stored.csv"))) as f2:
+        assert f1.read() == f2.read()
+
+    # Unchanged thermostats are read from the store rather than recalculated.
+    store = ResultStore(path)
+    key = metrics_key(thermostat_type_1)
+    assert store.keys() == [key]
+    stored = store.get(key)
+    stored[0]["percent_savings_baseline_percentile"] = 12.5
+    store.put(key, stored)
+
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics(
+        [thermostat_type_1], result_format="dataframe", result_store=store)
+    assert metrics["percent_savings_baseline_percentile"][0] == 12.5
+    assert len(metrics) == len(expected)
+
+
+def test_metrics_journal(tmpdir):
+    path = str(tmpdir.join("journal.db"))
+    with MetricsJournal(path) as journal:
+        journal.record([("a", [{"tau": 1.5}]), None, (2, [{"tau": np.float64(2.5)}])])
+        assert journal.thermostat_ids() == {"a", 2}
+
+    with MetricsJournal(path, resume=True) as journal:
+        assert journal.items() == [("a", [{"tau": 1.5}]), (2, [{"tau": 2.5}])]
+
+    with MetricsJournal(path) as journal:
+        assert journal.items() == []
+
+
+def test_multiple_thermostat_calculate_epa_field_savings_metrics_checkpoint(thermostat_type_1, tmpdir):
+    path = str(tmpdir.join("journal.db"))
+    expected = multiple_thermostat_calculate_epa_field_savings_metrics([thermostat_type_1])
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics([thermostat_type_1], checkpoint=path)
+    pd.testing.assert_frame_equal(pd.DataFrame(metrics, columns=COLUMNS), pd.DataFrame(expected, columns=COLUMNS))
+
+    # Journaled thermostats are skipped when resuming, and the metadata
+    # order is kept.
+    with MetricsJournal(path) as journal:
+        journal.append("not_in_metadata", [{"ct_identifier": "not_in_metadata"}])
+        journal.append(thermostat_type_1.thermostat_id, [{"ct_identifier": "journaled"}])
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics(
+        [thermostat_type_1], checkpoint=path, resume=True)
+    assert metrics == [{"ct_identifier": "journaled"}]
+
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics_from_csv(
+        get_data_path("data/metadata_type_1_single.csv"), checkpoint=path, resume=True)
+    assert metrics == [{"ct_identifier": "journaled"}]
+
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics_from_csv(
+        get_data_path("data/metadata_type_1_single.csv"), checkpoint=path, result_format="dataframe")
+    assert len(metrics) == len(expected)
+    assert metrics["ct_identifier"].tolist() == [m["ct_identifier"] for m in expected]
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_allclose, assert_array_equal
+
+from thermostat.rhu import RHU_RUNTIMES, digitize_bins, resistance_heat_utilization_bins
+
+
+def test_digitize_bins():
+    temperature = np.array([-5, 0, 0.5, 10, 10.5, 60, 61, np.nan])
+    bin_index, low, high = digitize_bins(temperature, [[0, 10, 20, 60], [-np.inf, 10, 60]])
+    assert_array_equal(bin_index, [
+        [-1, -1, 0, 0, 1, 2, -1, -1],
+        [3, 3, 3, 3, 4, 4, -1, -1]])
+    assert_array_equal(low, [0, 10, 20, -np.inf, 10])
+    assert_array_equal(high, [10, 20, 60, 10, 60])
+
+
+def test_resistance_heat_utilization_bins():
+    rng = np.random.RandomState(0)
+    n_days = 200
+    runtime_temp = pd.DataFrame({
+        "temperature": rng.uniform(-15, 70, n_days),
+        "heat_runtime": rng.uniform(0, 600, n_days),
+        "aux_runtime": rng.uniform(0, 200, n_days),
+        "emg_runtime": rng.uniform(0, 50, n_days),
+        "total_minutes": 1440,
+    })
+    runtime_temp.loc[3, "temperature"] = np.nan
+    runtime_temp.loc[7, "heat_runtime"] = np.nan
+    # More aux than heat runtime in the warmest bin.
+    runtime_temp.loc[runtime_temp.temperature > 55, "aux_runtime"] = 1000
+
+    bin_schemes = [list(range(0, 65, 5)), [-np.inf, 10, 20, 30, 40, 50, 60]]
+    runtimes = runtime_temp[list(RHU_RUNTIMES)].values.T
+    rhu = resistance_heat_utilization_bins(
+        runtimes, runtime_temp.temperature.values, bin_schemes, (None, 4500))
+    assert rhu.shape == (2, 18)
+
+    for row, min_runtime in enumerate((None, 4500)):
+        expected = pd.concat([
+            runtime_temp.groupby(pd.cut(runtime_temp.temperature, bins))[list(RHU_RUNTIMES)].sum()
+            for bins in bin_schemes])
+        expected["rhu"] = (expected.aux_runtime + expected.emg_runtime) / \
+            (expected.heat_runtime + expected.emg_runtime)
+        expected["total_runtime"] = expected.heat_runtime + expected.aux_runtime + expected.emg_runtime
+        expected["aux_duty_cycle"] = expected.aux_runtime / expected.total_minutes
+        if min_runtime:
+            not_run = expected.total_runtime < min_runtime
+            expected.loc[not_run, ["rhu", "total_runtime", "aux_duty_cycle"]] = np.nan
+        nonsense = expected.aux_runtime > expected.heat_runtime
+        expected.loc[nonsense, "rhu"] = np.nan
+
+        assert_array_equal(rhu[row]["low"], [interval.left for interval in expected.index])
+        assert_array_equal(rhu[row]["data_is_nonsense"], nonsense)
+        for name in RHU_RUNTIMES + ("rhu", "total_runtime", "aux_duty_cycle"):
+            assert_allclose(rhu[row][name], expected[name])
+
+    assert rhu[0]["data_is_nonsense"][11]
+    assert np.isnan(rhu[1]["rhu"]).sum() > np.isnan(rhu[0]["rhu"]).sum()
@@ -0,0 +1,132 @@
+from thermostat import stations
+from thermostat.stations import (
+    get_closest_station_by_zipcode,
+    resolve_station,
+    write_station_table,
+    load_station_table,
+    main,
+    StationIndex,
+    get_station_index,
+)
+
+from eeweather import zcta_to_lat_long
+
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_allclose
+
+import pytest
+
+
+@pytest.fixture
+def resolve_calls(monkeypatch):
+    calls = []
+    _resolve_station = stations._resolve_station
+
+    def counting_resolve_station(zipcode):
+        calls.append(zipcode)
+        return _resolve_station(zipcode)
+
+    monkeypatch.setattr(stations, "_resolve_station", counting_resolve_station)
+    monkeypatch.setattr(stations, "_resolved_stations", {})
+    monkeypatch.setattr(stations, "_station_table_loaded", False)
+    monkeypatch.delenv(stations.STATION_TABLE_VARIABLE, raising=False)
+    return calls
+
+
+def test_get_closest_station_by_zipcode_memoized(resolve_calls, caplog):
+    station = get_closest_station_by_zipcode("95979")
+    first_messages = caplog.text
+    assert "too far" in first_messages
+
+    caplog.clear()
+    assert get_closest_station_by_zipcode("95979") == station
+    assert caplog.text == first_messages
+    assert resolve_calls == ["95979"]
+
+    resolution = resolve_station("95979")
+    assert resolution["station"] == station
+    assert resolution["lat"] == pytest.approx(39.301463)
+
+
+def test_unrecognized_zcta(resolve_calls):
+    resolution = resolve_station("00000")
+    assert resolution["station"] is None
+    assert resolution["lat"] is None
+    assert resolution["messages"][0][0] == logging.WARNING
+
+
+def test_station_table(resolve_calls, tmpdir, monkeypatch):
+    table_filename = str(tmpdir.join("stations.json"))
+    assert write_station_table(table_filename, ["04469", "33155"]) == 2
+    with open(table_filename) as f:
+        table = json.load(f)
+    expected = {zipcode: resolution["station"] for zipcode, resolution in table.items()}
+
+    # A new process loads the table named by the environment instead of
+    # resolving the stations again.
+    monkeypatch.setattr(stations, "_resolved_stations", {})
+    monkeypatch.setattr(stations, "_station_table_loaded", False)
+    monkeypatch.setenv(stations.STATION_TABLE_VARIABLE, table_filename)
+    del resolve_calls[:]
+    for zipcode, station in expected.items():
+        assert get_closest_station_by_zipcode(zipcode) == station
+    assert resolve_calls == []
+
+    monkeypatch.setattr(stations, "_resolved_stations", {})
+    assert load_station_table(table_filename) == 2
+
+
+def test_station_table_main(resolve_calls, tmpdir):
+    table_filename = str(tmpdir.join("stations.json"))
+    main([table_filename, "04469"])
+    with open(table_filename) as f:
+        assert list(json.load(f)) == ["04469"]
+
+
+def _station_metadata(rows):
+    return pd.DataFrame(
+        rows, columns=["usaf_id", "latitude", "longitude", "rough_quality"]).set_index("usaf_id")
+
+
+@pytest.mark.parametrize("zipcode", ["04469", "33155", "78660", "95979", "00850"])
+def test_station_index_matches_full_ranking(zipcode):
+    lat, lon = zcta_to_lat_long(zipcode)
+    expected = stations._rank_stations_by_distance_and_quality(lat, lon)
+    ranking = get_station_index().rank_stations(lat, lon)
+    if ranking is None:
+        # Tied stations come first; the full ranking decides.
+        return
+    # Same order up to the first station which is not skipped.
+    n = next(i for i, usaf_id in enumerate(ranking.index) if usaf_id[0] != 'A') + 1
+    assert ranking.index[:n].tolist() == expected.index[:n].tolist()
+    assert_allclose(ranking.distance_meters[:n], expected.distance_meters[:n])
+
+
+def test_station_index_skips_a_stations():
+    index = StationIndex(_station_metadata([
+        ["A00001", 40.0, -100.0, "high"],
+        ["000002", 40.1, -100.0, "low"],
+        ["000003", 40.1, -100.0, "high"],
+        ["000004", 45.0, -100.0, "high"],
+        ["000005", np.nan, np.nan, "high"],
+    ]))
+    ranking = index.rank_stations(40.0, -100.0, k=1)
+    assert ranking.index.tolist()[:3] == ["A00001", "000003", "000002"]
+    assert "000005" not in ranking.index
+
+
+def test_station_index_ties():
+    index = StationIndex(_station_metadata([
+        ["000001", 40.1, -100.0, "low"],
+        ["000002", 40.1, -100.0, "low"],
+        ["000003", 41.0, -100.0, "high"],
+    ]))
+    assert index.rank_stations(40.0, -100.0) is None
+    assert index.rank_stations(41.0, -100.0).index[0] == "000003"
+
+    index = StationIndex(_station_metadata([["A00001", 40.0, -100.0, "high"]]))
+    assert index.rank_stations(40.0, -100.0) is None
@@ -1,6 +1,9 @@
 from thermostat.stats import combine_output_dataframes
 from thermostat.stats import compute_summary_statistics
 from thermostat.stats import summary_statistics_to_csv
+from thermostat.stats import filter_mask, combine_filters, identity_filter
+from thermostat.stats import range_filter, percentile_range_filter
+from thermostat.stats import get_filtered_stats, QUANTILE
 from .fixtures.thermostats import thermostat_emg_aux_constant_on_outlier
 from thermostat.multiple import multiple_thermostat_calculate_epa_field_savings_metrics
 from thermostat.exporters import COLUMNS
@@ -536,6 +539,77 @@ def test_compute_summary_statistics(combined_dataframe):
     assert stats_df_reread.shape == (9241, 9)
 
 
+def test_filters():
+    df = pd.DataFrame({
+        "tau": [-1, 0, 3, 12, np.nan, 24.9, 25, 8],
+        "percent_savings": [np.nan, 1, 2, 3, 4, 5, 6, 7],
+    }, index=[10, 11, 12, 13, 14, 15, 16, 17])
+
+    tau_filter = range_filter("tau", 0, 25)
+    assert filter_mask(tau_filter, df).tolist() == [
+        False, False, True, True, False, True, False, True]
+
+    # Bounds come from the whole DataFrame, not the rows kept by other filters.
+    savings_filter = percentile_range_filter("percent_savings", 0.01)
+    assert filter_mask(savings_filter, df).tolist() == [
+        False, False, True, True, True, True, True, False]
+
+    def row_filter(row, df):
+        return row["percent_savings"] != 3
+
+    combined = combine_filters([tau_filter, savings_filter, row_filter])
+    expected = [False, False, True, False, False, True, False, False]
+    assert filter_mask(combined, df).tolist() == expected
+    # Usable as a row filter too.
+    assert [combined(row, df) for _, row in df.iterrows()] == expected
+    assert filter_mask(identity_filter(), df).all()
+    assert len(filter_mask(range_filter("missing"), df.iloc[:0])) == 0
+
+
+def test_get_filtered_stats():
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({
+        "tau": rng.uniform(-5, 30, 50),
+        "percent_savings": rng.normal(10, 5, 50),
+        "rhu2_30F_to_35F": rng.uniform(0, 1, 50),
+    })
+    df.loc[[3, 9], "percent_savings"] = np.nan
+    df.loc[4, "percent_savings"] = np.inf
+
+    stats = get_filtered_stats(
+        df, range_filter("tau", 0, 25), "all_tau_filter", "heating",
+        ["percent_savings", "rhu2_30F_to_35F"], "baseline_percentile")[0]
+    assert stats["label"] == "all_tau_filter_heating"
+
+    kept = df[(df.tau >= 0) & (df.tau <= 25)]
+    assert stats["n_thermostat_core_day_sets_kept"] == len(kept)
+    column = kept.percent_savings.replace(np.inf, np.nan).dropna()
+    assert stats["percent_savings_n"] == len(column)
+    assert np.isclose(stats["percent_savings_mean"], column.mean())
+    assert np.isclose(stats["percent_savings_sem"], column.std(ddof=0) / len(column) ** .5)
+    for quantile in QUANTILE:
+        assert np.isclose(stats["percent_savings_q{}".format(quantile)], column.quantile(quantile / 100.))
+
+    rhu2 = kept.rhu2_30F_to_35F
+    rhu2_iqflt = rhu2[rhu2 < rhu2.quantile(0.95)]
+    assert stats["rhu2_30F_to_35F_n_IQFLT"] == len(rhu2_iqflt)
+    assert stats["rhu2_30F_to_35F_n_NOIQ"] == len(rhu2)
+    assert np.isclose(stats["rhu2_30F_to_35F_q50_IQFLT"], rhu2_iqflt.median())
+
+
+def test_compute_summary_statistics_labels(combined_dataframe):
+    labels = [s["label"] for s in compute_summary_statistics(combined_dataframe, advanced_filtering=True)]
+    zones = ["all", "very-cold_cold", "mixed-humid", "mixed-dry_hot-dry", "hot-humid", "marine"]
+    filters = ["no_filter", "tau_filter", "tau_cvrmse_filter", "tau_cvrmse_savings_p01_filter"]
+    expected = [
+        "{}_{}_{}".format(zone, filter_, method)
+        for filter_ in filters for zone in zones for method in ["heating", "cooling"]]
+    # Empty groups are skipped, national weightings come first.
+    group_labels = [label for label in labels if not label.startswith("national")]
+    assert "all_tau_filter_cooling" in group_labels
+    assert group_labels == [label for label in expected if label in group_labels]
+
+
 def test_iqr_filteringa(thermostat_emg_aux_constant_on_outlier):
 
     thermostats_iqflt = list(thermostat_emg_aux_constant_on_outlier)
@@ -0,0 +1,59 @@
+from thermostat.store import write_thermostat_store, ThermostatStore, StoredThermostat, SERIES_NAMES
+
+import pickle
+
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_allclose
+
+import pytest
+
+from .fixtures.thermostats import thermostat_type_1
+from .fixtures.thermostats import core_cooling_day_set_type_1_entire
+
+
+def test_write_thermostat_store(thermostat_type_1, tmpdir):
+    path = str(tmpdir.join("store"))
+    write_thermostat_store([thermostat_type_1], path, dtype="float64")
+
+    store = ThermostatStore(path)
+    assert len(store) == 1
+    thermostat = store.get(thermostat_type_1.thermostat_id)
+    assert isinstance(thermostat, StoredThermostat)
+    assert store.get("missing") is None
+
+    assert thermostat.thermostat_id == thermostat_type_1.thermostat_id
+    assert thermostat.equipment_type == thermostat_type_1.equipment_type
+    assert thermostat.zipcode == thermostat_type_1.zipcode
+    assert thermostat.station == thermostat_type_1.station
+    for name in SERIES_NAMES:
+        pd.testing.assert_series_equal(
+            getattr(thermostat, name), getattr(thermostat_type_1, name), check_freq=False)
+
+
+def test_thermostat_store_float32(thermostat_type_1, core_cooling_day_set_type_1_entire, tmpdir):
+    store = write_thermostat_store([thermostat_type_1], str(tmpdir.join("store")))
+    thermostat = next(iter(store))
+
+    assert thermostat.temperature_in.dtype == np.float32
+    assert_allclose(thermostat.temperature_in, thermostat_type_1.temperature_in, rtol=1e-6)
+
+    expected = thermostat_type_1.get_cooling_demand(core_cooling_day_set_type_1_entire)
+    result = thermostat.get_cooling_demand(core_cooling_day_set_type_1_entire)
+    assert_allclose(result[0], expected[0], rtol=1e-3, atol=1e-3)
+
+
+def test_stored_thermostat_pickle(thermostat_type_1, tmpdir):
+    store = write_thermostat_store([thermostat_type_1], str(tmpdir.join("store")))
+    thermostat = next(iter(store))
+
+    # Loaded series are not pickled, only the location of the data.
+    thermostat.temperature_in
+    assert len(pickle.dumps(thermostat)) < 10000
+
+    # Replaced series are kept.
+    index = pd.date_range("2011-01-01", periods=3, freq="H")
+    thermostat.heating_setpoint = pd.Series([1.0, 2.0, 3.0], index=index)
+    unpickled = pickle.loads(pickle.dumps(thermostat))
+    pd.testing.assert_series_equal(unpickled.heating_setpoint, thermostat.heating_setpoint)
+    pd.testing.assert_series_equal(unpickled.temperature_in, thermostat.temperature_in)
@@ -0,0 +1,174 @@
+import thermostat
+from thermostat.transport import share_thermostats, SharedThermostat
+from thermostat.store import SERIES_NAMES
+from thermostat import multiple
+from thermostat.multiple import multiple_thermostat_calculate_epa_field_savings_metrics
+from thermostat.exporters import COLUMNS
+from thermostat.executors import ProcessExecutor
+
+import copy
+import gc
+import multiprocessing
+import os
+import pickle
+import subprocess
+import sys
+import textwrap
+
+import pandas as pd
+
+import pytest
+
+shared_memory = pytest.importorskip("multiprocessing.shared_memory")
+
+from .fixtures.thermostats import thermostat_type_1
+
+
+def test_share_thermostats(thermostat_type_1):
+    with share_thermostats([thermostat_type_1, thermostat_type_1]) as shared:
+        assert len(shared) == 2
+        block_name = shared.block.name
+        thermostat = pickle.loads(pickle.dumps(shared.thermostats[1]))
+        assert isinstance(thermostat, SharedThermostat)
+        assert len(pickle.dumps(shared.thermostats[1])) < 10000
+
+        assert thermostat.thermostat_id == thermostat_type_1.thermostat_id
+        for name in SERIES_NAMES:
+            pd.testing.assert_series_equal(
+                getattr(thermostat, name), getattr(thermostat_type_1, name), check_freq=False)
+        del thermostat
+
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=block_name)
+
+
+def test_share_thermostats_reattach(thermostat_type_1):
+    with share_thermostats([thermostat_type_1]) as first, share_thermostats([thermostat_type_1]) as second:
+        temperature_in = pickle.loads(pickle.dumps(first.thermostats[0])).temperature_in
+        expected = temperature_in.copy()
+        mapping = temperature_in.values.base.base
+
+        # Attaching the second block releases the first, which stays mapped
+        # while its series are in use, and can be attached again.
+        pickle.loads(pickle.dumps(second.thermostats[0])).temperature_in
+        assert not mapping.closed
+        pd.testing.assert_series_equal(temperature_in, expected)
+        thermostat = pickle.loads(pickle.dumps(first.thermostats[0]))
+        pd.testing.assert_series_equal(thermostat.temperature_in, expected)
+
+        del temperature_in
+        gc.collect()
+        assert mapping.closed
+        del thermostat
+
+
+def test_multiple_thermostat_calculate_epa_field_savings_metrics_shared_memory(thermostat_type_1, monkeypatch):
+    expected = multiple_thermostat_calculate_epa_field_savings_metrics([thermostat_type_1])
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics([thermostat_type_1], shared_memory=True)
+    pd.testing.assert_frame_equal(pd.DataFrame(metrics, columns=COLUMNS), pd.DataFrame(expected, columns=COLUMNS))
+
+    # Thermostats are sent in several blocks when they do not fit in one.
+    thermostats = []
+    for i in range(3):
+        thermostats.append(copy.copy(thermostat_type_1))
+        thermostats[-1].thermostat_id = "{}_{}".format(thermostat_type_1.thermostat_id, i)
+    expected = multiple_thermostat_calculate_epa_field_savings_metrics(thermostats)
+    monkeypatch.setattr(multiple, "SHARED_MEMORY_BATCH_SIZE", 1)
+    metrics = multiple_thermostat_calculate_epa_field_savings_metrics(thermostats, shared_memory=True)
+    assert len(metrics) == 6
+    pd.testing.assert_frame_equal(pd.DataFrame(metrics, columns=COLUMNS), pd.DataFrame(expected, columns=COLUMNS))
+
+
+class RecordingExecutor(ProcessExecutor):
+    """ Runs calls in this process, recording when chunks are submitted and
+    when their results are consumed.
+    """
+
+    n_workers = 1
+
+    def __init__(self):
+        ProcessExecutor.__init__(self)
+        self.events = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def imap(self, func, iterable, ordered=True):
+        self.events.append("submit")
+        items = list(iterable)
+
+        def results():
+            for item in items:
+                self.events.append("result")
+                yield func(item)
+        return results()
+
+
+def _thermostat_id(thermostat):
+    return thermostat.thermostat_id
+
+
+def test_imap_thermostats_shares_next_block(thermostat_type_1, monkeypatch):
+    monkeypatch.setattr(multiple, "SHARED_MEMORY_BATCH_SIZE", 1)
+    executor = RecordingExecutor()
+    results = list(multiple._imap_thermostats(
+        executor, _thermostat_id, [thermostat_type_1] * 3, shared_memory=True))
+    assert sorted(results) == [(i, thermostat_type_1.thermostat_id) for i in range(3)]
+    # The second block is submitted before results of the first are in,
+    # and a third only once the first is done.
+    assert executor.events == ["submit", "submit", "result", "submit", "result", "result"]
+
+
+SHARE_WITH_WORKERS = """
+    import multiprocessing
+    import sys
+    from types import SimpleNamespace
+
+    import numpy as np
+    import pandas as pd
+
+    from thermostat.executors import ProcessExecutor
+    from thermostat.transport import share_thermostats
+
+
+    def total(thermostat):
+        return float(thermostat.temperature_in.sum())
+
+
+    def fake(i):
+        index = pd.date_range("2011-01-01", periods=48, freq="H")
+        series = pd.Series(np.arange(48.0) + i, index=index)
+        return SimpleNamespace(
+            thermostat_id=str(i), equipment_type=1, zipcode="01234", station="1",
+            temperature_in=series, temperature_out=series, cooling_setpoint=None,
+            heating_setpoint=None, cool_runtime=None, heat_runtime=None,
+            auxiliary_heat_runtime=None, emergency_heat_runtime=None)
+
+
+    if __name__ == "__main__":
+        multiprocessing.set_start_method(sys.argv[1])
+        # With fork, the second run starts workers which share the parent's
+        # resource tracker; spawned workers always share it.
+        for _ in range(2):
+            with ProcessExecutor(2) as executor, share_thermostats([fake(i) for i in range(4)]) as shared:
+                assert list(executor.imap(total, shared.thermostats)) == [1128.0, 1176.0, 1224.0, 1272.0]
+"""
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_share_thermostats_with_workers(tmpdir, start_method):
+    if start_method not in multiprocessing.get_all_start_methods():
+        pytest.skip("{} is not available".format(start_method))
+    # Blocks attached by workers must not be reported as leaked or unlinked
+    # by a resource tracker, which only shows in the output of the process.
+    script = tmpdir.join("share_with_workers.py")
+    script.write(textwrap.dedent(SHARE_WITH_WORKERS))
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(thermostat.__file__)))
+    result = subprocess.run(
+        [sys.executable, str(script), start_method], env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+    assert "resource_tracker" not in result.stderr
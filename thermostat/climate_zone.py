@@ -1,7 +1,15 @@
+import os
+
 import pandas as pd
 from pkg_resources import resource_stream
 from collections import namedtuple
 
+ClimateZone = namedtuple('ClimateZone', ['climate_zone', 'baseline_regional_cooling_comfort_temperature', 'baseline_regional_heating_comfort_temperature'])
+
+# Lookups loaded by this process, keyed by mapping filename (None for the
+# default mapping) and modification time.
+_climate_zone_lookups = {}
+
 
 def _load_mapping(filename_or_buffer):
     df = pd.read_csv(
@@ -14,6 +22,121 @@ def _load_mapping(filename_or_buffer):
     return dict(df.to_records('index'))
 
 
+def _load_regional_baselines():
+    with resource_stream('thermostat.resources', 'regional_baselines.csv') as f:
+        df = pd.read_csv(
+            f, usecols=[
+                'EIA Climate Zone',
+                'Baseline heating temp (F)',
+                'Baseline cooling temp (F)'
+            ])
+        df = df.where((pd.notnull(df)), None)
+        df = df.set_index('EIA Climate Zone')
+        cooling_regional_baseline_temps = {k: v for k, v in df['Baseline cooling temp (F)'].items()}
+        heating_regional_baseline_temps = {k: v for k, v in df['Baseline heating temp (F)'].items()}
+    return cooling_regional_baseline_temps, heating_regional_baseline_temps
+
+
+class ClimateZoneLookup(object):
+    """ A zipcode to climate zone mapping and the regional baseline comfort
+    temperatures of each climate zone, loaded once.
+
+    Parameters
+    ----------
+
+    climate_zone_mapping : filename or buffer, default: None
+
+        A mapping from climate zone to zipcode. If None is provided, uses
+        default zipcode to climate zone mapping provided in tutorial.
+    """
+
+    def __init__(self, climate_zone_mapping=None):
+        if climate_zone_mapping is None:
+            with resource_stream(
+                    'thermostat.resources',
+                    'Building America Climate Zone to Zipcode Database_Rev2_2016.09.08.csv') as f:
+                self.mapping = _load_mapping(f)
+        else:
+            try:
+                self.mapping = _load_mapping(climate_zone_mapping)
+            except Exception as e:
+                raise ValueError("Could not load climate zone mapping: %s" % e)
+
+        self.cooling_regional_baseline_temps, self.heating_regional_baseline_temps = \
+            _load_regional_baselines()
+
+    def get(self, zipcode):
+        """ Returns the climate zone and baseline regional comfort
+        temperatures of a zipcode, as :code:`retrieve_climate_zone` does.
+        """
+        climate_zone = self.mapping.get(zipcode)
+        return ClimateZone(
+            climate_zone,
+            self.cooling_regional_baseline_temps.get(climate_zone, None),
+            self.heating_regional_baseline_temps.get(climate_zone, None))
+
+    def lookup(self, zipcodes):
+        """ Looks up the climate zones and baseline regional comfort
+        temperatures of many zipcodes at once.
+
+        Parameters
+        ----------
+
+        zipcodes : pandas.Series or sequence of str
+            Zipcodes to look up, e.g. the :code:`zipcode` column of the
+            metadata read by :code:`thermostat.importers.from_csv`.
+
+        Returns
+        -------
+
+        climate_zones : pandas.DataFrame
+            One row per zipcode, with the index of :code:`zipcodes` if it is a
+            Series, and the columns of :code:`ClimateZone`. Unknown zipcodes
+            and missing baselines are NaN.
+        """
+        zipcodes = pd.Series(zipcodes)
+        climate_zones = zipcodes.map(self.mapping)
+        return pd.DataFrame({
+            'climate_zone': climate_zones,
+            'baseline_regional_cooling_comfort_temperature': climate_zones.map(self.cooling_regional_baseline_temps),
+            'baseline_regional_heating_comfort_temperature': climate_zones.map(self.heating_regional_baseline_temps),
+        }, index=zipcodes.index)
+
+
+def get_climate_zone_lookup(climate_zone_mapping=None):
+    """ Returns the :code:`ClimateZoneLookup` for a mapping, loading it once
+    per process (and again if the mapping file changes). Mappings given as
+    buffers are loaded on every call.
+
+    Parameters
+    ----------
+
+    climate_zone_mapping : filename or buffer, default: None
+
+        A mapping from climate zone to zipcode, or None for the default.
+
+    Returns
+    -------
+
+    lookup : ClimateZoneLookup
+    """
+    if climate_zone_mapping is None:
+        key = None
+    elif isinstance(climate_zone_mapping, (str, os.PathLike)):
+        try:
+            key = (os.path.abspath(climate_zone_mapping), os.path.getmtime(climate_zone_mapping))
+        except OSError as e:
+            raise ValueError("Could not load climate zone mapping: %s" % e)
+    else:
+        return ClimateZoneLookup(climate_zone_mapping)
+
+    lookup = _climate_zone_lookups.get(key)
+    if lookup is None:
+        lookup = ClimateZoneLookup(climate_zone_mapping)
+        _climate_zone_lookups[key] = lookup
+    return lookup
+
+
 def retrieve_climate_zone(climate_zone_mapping, zipcode):
     """ Loads the Climate Zone to Zipcode database
     and returns the climate zone and baseline regional comfort temperatures.
@@ -34,35 +157,12 @@ def retrieve_climate_zone(climate_zone_mapping, zipcode):
     climate_zone_nt : named tuple
        Named Tuple consisting of the Climate Zone, baseline_regional_cooling_comfort_temperature, and baseline_regional_heating_comfort_temperature
     """
+    return get_climate_zone_lookup(climate_zone_mapping).get(zipcode)
 
-    ClimateZone = namedtuple('ClimateZone', ['climate_zone', 'baseline_regional_cooling_comfort_temperature', 'baseline_regional_heating_comfort_temperature'])
-    if climate_zone_mapping is None:
-        with resource_stream(
-                'thermostat.resources',
-                'Building America Climate Zone to Zipcode Database_Rev2_2016.09.08.csv') as f:
-            mapping = _load_mapping(f)
-    else:
-        try:
-            mapping = _load_mapping(climate_zone_mapping)
-        except Exception as e:
-            raise ValueError("Could not load climate zone mapping: %s" % e)
-
-    with resource_stream('thermostat.resources', 'regional_baselines.csv') as f:
-        df = pd.read_csv(
-            f, usecols=[
-                'EIA Climate Zone',
-                'Baseline heating temp (F)',
-                'Baseline cooling temp (F)'
-            ])
-        df = df.where((pd.notnull(df)), None)
-        df = df.set_index('EIA Climate Zone')
-        cooling_regional_baseline_temps = {k: v for k, v in df['Baseline cooling temp (F)'].iteritems()}
-        heating_regional_baseline_temps = {k: v for k, v in df['Baseline heating temp (F)'].iteritems()}
-
-    climate_zone = mapping.get(zipcode)
-    baseline_regional_cooling_comfort_temperature = cooling_regional_baseline_temps.get(climate_zone, None)
-    baseline_regional_heating_comfort_temperature = heating_regional_baseline_temps.get(climate_zone, None)
-
-    climate_zone_nt = ClimateZone(climate_zone, baseline_regional_cooling_comfort_temperature, baseline_regional_heating_comfort_temperature)
 
-    return climate_zone_nt
+def retrieve_climate_zones(climate_zone_mapping, zipcodes):
+    """ Returns the climate zones and baseline regional comfort temperatures
+    of many zipcodes, e.g. :code:`metadata.zipcode`. See
+    :code:`ClimateZoneLookup.lookup`.
+    """
+    return get_climate_zone_lookup(climate_zone_mapping).lookup(zipcodes)
@@ -0,0 +1,106 @@
+""" Converts interval data from the metadata-and-CSV layout read by
+:code:`thermostat.importers.from_csv` into the Parquet dataset read by
+:code:`thermostat.importers.from_parquet`.
+
+Usage::
+
+    python -m thermostat.convert path/to/metadata.csv path/to/dataset
+"""
+import argparse
+import logging
+import os
+import warnings
+from urllib.parse import quote
+
+import pandas as pd
+
+from thermostat.importers import (
+    PARQUET_METADATA_FILENAME,
+    PARQUET_INTERVAL_DATA_DIRECTORY,
+    _get_equipment_type,
+    _read_interval_data_fast,
+    _read_metadata_csv,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def csv_to_parquet(metadata_filename, dataset_path):
+    """ Writes the thermostats listed in a metadata CSV to a Parquet dataset.
+
+    Each thermostat's interval data is written to its own partition,
+    :code:`interval_data/thermostat_id=<thermostat_id>/part-0.parquet`,
+    keeping only the columns its equipment type uses. The metadata is
+    written to :code:`metadata.parquet` with :code:`interval_data_filename`
+    pointing at those partitions.
+
+    Parameters
+    ----------
+    metadata_filename : str
+        Path to a file containing the thermostat metadata, as for
+        :code:`from_csv`.
+    dataset_path : str
+        Directory to write the dataset to. It is created if needed.
+
+    Returns
+    -------
+    metadata : pd.DataFrame
+        The metadata written to the dataset. Thermostats which could not be
+        converted are left out.
+    """
+    metadata = _read_metadata_csv(metadata_filename)
+
+    os.makedirs(os.path.join(dataset_path, PARQUET_INTERVAL_DATA_DIRECTORY), exist_ok=True)
+
+    converted = []
+    for i, row in metadata.iterrows():
+        equipment = _get_equipment_type(row.equipment_type)
+        if equipment is None:
+            warnings.warn(
+                "Skipping conversion of thermostat controlling equipment"
+                " of unsupported type. (id={})".format(row.thermostat_id))
+            continue
+
+        csv_filename = os.path.join(os.path.dirname(metadata_filename), row.interval_data_filename)
+        try:
+            df = _read_interval_data_fast(csv_filename, *equipment)
+        except Exception as e:
+            warnings.warn(
+                "Skipping conversion of thermostat(id={}) because of "
+                "the following error: {}"
+                .format(row.thermostat_id, e))
+            continue
+
+        # Partition names follow the hive convention, with the id escaped so
+        # that any thermostat_id makes a valid directory name.
+        parquet_filename = os.path.join(
+            PARQUET_INTERVAL_DATA_DIRECTORY,
+            "thermostat_id={}".format(quote(row.thermostat_id, safe="")),
+            "part-0.parquet")
+        os.makedirs(os.path.join(dataset_path, os.path.dirname(parquet_filename)), exist_ok=True)
+        df.to_parquet(os.path.join(dataset_path, parquet_filename), index=False)
+        logger.info("Converted thermostat {}".format(row.thermostat_id))
+
+        row = row.copy()
+        row["interval_data_filename"] = parquet_filename
+        converted.append(row)
+
+    metadata = pd.DataFrame(converted, columns=metadata.columns).reset_index(drop=True)
+    metadata.to_parquet(os.path.join(dataset_path, PARQUET_METADATA_FILENAME), index=False)
+    return metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert thermostat metadata and interval data CSVs to a Parquet dataset.")
+    parser.add_argument("metadata_filename", help="Path to the metadata CSV.")
+    parser.add_argument("dataset_path", help="Directory to write the Parquet dataset to.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    metadata = csv_to_parquet(args.metadata_filename, args.dataset_path)
+    logger.info("Wrote {} thermostats to {}".format(len(metadata), args.dataset_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,13 @@ import logging
 
 import pandas as pd
 import numpy as np
-from scipy.optimize import leastsq
 from pkg_resources import resource_stream
 
 from thermostat.regression import runtime_regression
+from thermostat.demand import get_daily_deltaT_array, fit_demands, baseline_demand
 from thermostat import get_version
 from thermostat.climate_zone import retrieve_climate_zone
+from thermostat.rhu import RHU_RUNTIMES, resistance_heat_utilization_bins
 
 try:
     if "0.21." in pd.__version__:
@@ -46,10 +47,63 @@ RESISTANCE_HEAT_USE_BIN_SECOND = [-np.inf, 10, 20, 30, 40, 50, 60]
 RESISTANCE_HEAT_USE_BIN_SECOND_TUPLE = [(RESISTANCE_HEAT_USE_BIN_SECOND[i], RESISTANCE_HEAT_USE_BIN_SECOND[i+1])
                                         for i in range(0, len(RESISTANCE_HEAT_USE_BIN_SECOND) - 1)]
 
+# Days missing more hourly indoor or outdoor temperatures than this are not
+# core days.
+MAX_MISSING_TEMPERATURE_HOURS = 2
+
 # FIXME: Turning off these warnings for now
 pd.set_option('mode.chained_assignment', None)
 
 
+def _wall_clock(index):
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values
+
+
+def count_daily_nulls(series, daily_index):
+    """ Counts the missing values of an hourly series on each day of a
+    daily index.
+
+    When the hourly index covers exactly the days of the daily index, the
+    values are reshaped to (n_days, 24) and counted in one pass; otherwise
+    hours are matched to days by date.
+
+    Parameters
+    ----------
+    series : pandas.Series
+        Hourly series, e.g. :code:`temperature_in`.
+    daily_index : pandas.DatetimeIndex
+        Days to count missing values on.
+
+    Returns
+    -------
+    null_counts : numpy.ndarray
+        Number of missing hourly values on each day, or -1 for days without
+        any hourly values in the series.
+    """
+    isnull = pd.isnull(series.values)
+    n_days = len(daily_index)
+    days = _wall_clock(daily_index).astype('datetime64[D]')
+    hours = _wall_clock(series.index)
+
+    if n_days > 0 and len(hours) == 24 * n_days \
+            and hours[0] == days[0] \
+            and np.all(np.diff(hours) == np.timedelta64(1, 'h')) \
+            and np.all(np.diff(days) == np.timedelta64(1, 'D')):
+        return isnull.reshape(n_days, 24).sum(axis=1)
+
+    hourly_days = hours.astype('datetime64[D]')
+    sorter = np.argsort(days, kind='stable')
+    positions = np.searchsorted(days, hourly_days, sorter=sorter)
+    matched = positions < n_days
+    positions[matched] = sorter[positions[matched]]
+    matched[matched] = days[positions[matched]] == hourly_days[matched]
+    null_counts = np.bincount(positions[matched], weights=isnull[matched], minlength=n_days)
+    present = np.bincount(positions[matched], minlength=n_days) > 0
+    return np.where(present, null_counts, -1).astype(int)
+
+
 class Thermostat(object):
     """ Main thermostat data container. Each parameter which contains
     timeseries data should be a pandas.Series with a datetimeIndex, and that
@@ -242,6 +296,108 @@ class Thermostat(object):
                       " called for equipment_type {}".format(function_name, self.equipment_type)
             raise ValueError(message)
 
+    def __getstate__(self):
+        # Cached intermediates are rebuilt where they are needed rather than
+        # sent to other processes.
+        state = self.__dict__.copy()
+        state.pop("_intermediates", None)
+        return state
+
+    def get_intermediate(self, key, dependencies, compute):
+        """ Returns an intermediate result shared between metric
+        calculations, computing it on first use.
+
+        A cached result is reused only while each of its dependencies is
+        the same object it was computed from, so replacing a series or
+        passing a different core day set with the same name recomputes it.
+        Results changed in place are not detected; call
+        :code:`invalidate_cache` after modifying a series in place.
+
+        Parameters
+        ----------
+        key : tuple
+            (kind, core day set name or None) identifying the result.
+        dependencies : tuple
+            Objects the result is computed from, compared by identity.
+        compute : callable
+            Computes the result.
+
+        Returns
+        -------
+        result : object
+            The cached or newly computed result. It is shared, so it must
+            not be modified.
+        """
+        intermediates = self.__dict__.setdefault("_intermediates", {})
+        cached = intermediates.get(key)
+        if cached is not None:
+            cached_dependencies, result = cached
+            if len(cached_dependencies) == len(dependencies) and all(
+                    a is b for a, b in zip(cached_dependencies, dependencies)):
+                return result
+        result = compute()
+        intermediates[key] = (dependencies, result)
+        return result
+
+    def invalidate_cache(self, core_day_set_name=None):
+        """ Drops cached intermediate results (see :code:`get_intermediate`).
+
+        Parameters
+        ----------
+        core_day_set_name : str, optional
+            Only drop results for the core day set with this name. By
+            default every cached result is dropped.
+        """
+        intermediates = self.__dict__.get("_intermediates")
+        if not intermediates:
+            return
+        if core_day_set_name is None:
+            intermediates.clear()
+        else:
+            for key in [key for key in intermediates if key[1] == core_day_set_name]:
+                del intermediates[key]
+
+    def get_core_day_set_hourly(self, core_day_set, series_name):
+        """ Returns the hourly values of a series on the days of a core day
+        set, e.g. :code:`get_core_day_set_hourly(core_day_set, "temperature_in")`.
+        The slice is cached and shared between metric calculations.
+        """
+        series = getattr(self, series_name)
+        return self.get_intermediate(
+            (series_name, core_day_set.name),
+            (series, core_day_set.hourly),
+            lambda: series[core_day_set.hourly])
+
+    def get_core_day_temperature_mask(self, daily_index):
+        """ Determine the days with enough indoor and outdoor temperature
+        data to be core days: days missing at most
+        :code:`MAX_MISSING_TEMPERATURE_HOURS` hourly values of each.
+
+        The mask is cached (see :code:`get_intermediate`) and shared by
+        :code:`get_core_heating_days` and :code:`get_core_cooling_days`.
+
+        Parameters
+        ----------
+        daily_index : pandas.DatetimeIndex
+            Days to compute the mask for, e.g. :code:`self.heat_runtime.index`.
+
+        Returns
+        -------
+        mask : numpy.ndarray
+            Boolean array over :code:`daily_index`.
+        """
+        def compute():
+            mask = np.ones(len(daily_index), dtype=bool)
+            for temperature in [self.temperature_in, self.temperature_out]:
+                null_counts = count_daily_nulls(temperature, daily_index)
+                mask &= (null_counts >= 0) & (null_counts <= MAX_MISSING_TEMPERATURE_HOURS)
+            return mask
+
+        return self.get_intermediate(
+            ("core_day_temperature_mask", None),
+            (self.temperature_in, self.temperature_out, daily_index),
+            compute)
+
     def get_core_heating_days(self, method="entire_dataset",
             min_minutes_heating=30, max_minutes_cooling=0):
         """ Determine core heating days from data associated with this thermostat
@@ -294,16 +450,8 @@ class Thermostat(object):
 
         meets_thresholds = meets_heating_thresholds & meets_cooling_thresholds
 
-        # enough temperature_in
-        enough_temp_in = \
-                self.temperature_in.groupby(self.temperature_in.index.date) \
-                .apply(lambda x: x.isnull().sum() <= 2)
-
-        enough_temp_out = \
-                self.temperature_out.groupby(self.temperature_out.index.date) \
-                .apply(lambda x: x.isnull().sum() <= 2)
-
-        meets_thresholds &= enough_temp_in & enough_temp_out
+        # enough temperature_in and temperature_out
+        meets_thresholds &= self.get_core_day_temperature_mask(self.heat_runtime.index)
 
         data_start_date = np.datetime64(self.heat_runtime.index[0])
         data_end_date = np.datetime64(self.heat_runtime.index[-1])
@@ -403,16 +551,8 @@ class Thermostat(object):
         meets_cooling_thresholds = self.cool_runtime >= min_minutes_cooling
         meets_thresholds = meets_heating_thresholds & meets_cooling_thresholds
 
-        # enough temperature_in
-        enough_temp_in = \
-                self.temperature_in.groupby(self.temperature_in.index.date) \
-                .apply(lambda x: x.isnull().sum() <= 2)
-
-        enough_temp_out = \
-                self.temperature_out.groupby(self.temperature_out.index.date) \
-                .apply(lambda x: x.isnull().sum() <= 2)
-
-        meets_thresholds &= enough_temp_in & enough_temp_out
+        # enough temperature_in and temperature_out
+        meets_thresholds &= self.get_core_day_temperature_mask(self.cool_runtime.index)
 
         if method == "year_end_to_end":
             start_year = data_start_date.item().year
@@ -556,23 +696,36 @@ class Thermostat(object):
             core_heating_day_set.start_date,
             core_heating_day_set.end_date)
 
+        # The daily readings are shared between calls, so only the core days
+        # are copied out of them.
+        runtime_daily = self.get_intermediate(
+            ("resistance_heat_utilization_daily", None),
+            (self.temperature_out, self.heat_runtime,
+             self.auxiliary_heat_runtime, self.emergency_heat_runtime),
+            self._get_resistance_heat_utilization_daily)
+        in_core_day_set_daily = np.asarray(in_core_day_set_daily, dtype=bool)
+        if len(in_core_day_set_daily) != len(runtime_daily):
+            raise ValueError(
+                "Length of values does not match length of daily runtime")
+
+        # Filter out records that aren't part of the core day set
+        runtime_temp = runtime_daily[in_core_day_set_daily].assign(
+            in_core_daily=True,
+            total_minutes=1440)  # default number of minutes per day
+
+        return runtime_temp
+
+    def _get_resistance_heat_utilization_daily(self):
         # convert hourly to daily
         temp_out_daily = self.temperature_out.resample('D').mean()
         aux_daily = self.auxiliary_heat_runtime.resample('D').sum()
         emg_daily = self.emergency_heat_runtime.resample('D').sum()
 
-        # Build the initial DataFrame based on daily readings
         runtime_temp = pd.DataFrame()
         runtime_temp['temperature'] = temp_out_daily
         runtime_temp['heat_runtime'] = self.heat_runtime
         runtime_temp['aux_runtime'] = aux_daily
         runtime_temp['emg_runtime'] = emg_daily
-        runtime_temp['in_core_daily'] = in_core_day_set_daily
-        runtime_temp['total_minutes'] = 1440  # default number of minutes per day
-
-        # Filter out records that aren't part of the core day set
-        runtime_temp = runtime_temp[runtime_temp['in_core_daily'].map(lambda x: x is True)]
-
         return runtime_temp
 
     def get_resistance_heat_utilization_bins(self, runtime_temp, bins, core_heating_day_set, min_runtime_minutes=None):
@@ -603,49 +756,70 @@ class Thermostat(object):
         if runtime_temp is None:
             return None
 
-        # Create the bins and group by them
-        runtime_temp['bins'] = pd.cut(runtime_temp['temperature'], bins)
-        runtime_rhu = runtime_temp.groupby('bins')['heat_runtime', 'aux_runtime', 'emg_runtime', 'total_minutes'].sum()
-
-        # Calculate the RHU based on the bins
-        runtime_rhu['rhu'] = (runtime_rhu['aux_runtime'] + runtime_rhu['emg_runtime']) / (runtime_rhu['heat_runtime'] + runtime_rhu['emg_runtime'])
-
-        # Currently treating aux_runtime as separate from heat_runtime
-        runtime_rhu['total_runtime'] = runtime_rhu.heat_runtime + runtime_rhu.aux_runtime + runtime_rhu.emg_runtime
-        # Changed to use the number of minutes per eligible day
-        runtime_rhu['aux_duty_cycle'] = runtime_rhu.aux_runtime / runtime_rhu.total_minutes
-        runtime_rhu['emg_duty_cycle'] = runtime_rhu.emg_runtime / runtime_rhu.total_minutes
-        runtime_rhu['compressor_duty_cycle'] = runtime_rhu.heat_runtime / runtime_rhu.total_minutes
-
-        # If we're passed min_runtime_minutes (RHU2) then treat the thermostat as not having run during that period
-        if min_runtime_minutes:
-            runtime_rhu['rhu'].loc[runtime_rhu.total_runtime < min_runtime_minutes] = np.nan
-            runtime_rhu['aux_duty_cycle'].loc[runtime_rhu.total_runtime < min_runtime_minutes] = np.nan
-            runtime_rhu['emg_duty_cycle'].loc[runtime_rhu.total_runtime < min_runtime_minutes] = np.nan
-            runtime_rhu['compressor_duty_cycle'].loc[runtime_rhu.total_runtime < min_runtime_minutes] = np.nan
-            runtime_rhu['total_runtime'].loc[runtime_rhu.total_runtime < min_runtime_minutes] = np.nan
-
-        runtime_rhu['data_is_nonsense'] = (runtime_rhu['aux_runtime'] > runtime_rhu['heat_runtime'])
-        runtime_rhu.loc[runtime_rhu.data_is_nonsense == True, 'rhu'] = np.nan  # noqa: E712
-
-        if runtime_rhu.data_is_nonsense.any():
-            for item in runtime_rhu.itertuples():
-                if item.data_is_nonsense:
-                    warn(
-                        'WARNING: '
-                        'aux heat runtime %s > compressor runtime %s '
-                        'for %sF <= temperature < %sF '
-                        'for thermostat_id %s '
-                        'from %s to %s inclusive' % (
-                            item.aux_runtime,
-                            item.heat_runtime,
-                            item.Index.left,
-                            item.Index.right,
-                            self.thermostat_id,
-                            core_heating_day_set.start_date,
-                            core_heating_day_set.end_date))
-
-        return runtime_rhu
+        rhu = self.get_resistance_heat_utilization(
+            runtime_temp, core_heating_day_set, [bins], (min_runtime_minutes,))[0]
+
+        index = pd.IntervalIndex.from_arrays(rhu["low"], rhu["high"])
+        columns = [name for name in rhu.dtype.names if name not in ("low", "high")]
+        return pd.DataFrame({name: rhu[name] for name in columns}, index=index, columns=columns)
+
+    def get_resistance_heat_utilization(self, runtime_temp, core_heating_day_set,
+            bin_schemes=(RESISTANCE_HEAT_USE_BIN_FIRST, RESISTANCE_HEAT_USE_BIN_SECOND),
+            min_runtime_minutes=(None, VAR_MIN_RHU_RUNTIME)):
+        """ Calculates the resistance heat utilization for several bin
+        schemes and RHU types at once (see
+        :code:`thermostat.rhu.resistance_heat_utilization_bins`).
+
+        Parameters
+        ----------
+        runtime_temp: DataFrame
+            Runtime Temperatures Dataframe from get_resistance_heat_utilization_runtime
+        core_heating_day_set : thermostat.core.CoreDaySet
+            Core heating day set for which to calculate total runtime.
+        bin_schemes : list of list
+            Bins (rightmost-edge aligned) of each scheme. By default the
+            bins of RHU output columns.
+        min_runtime_minutes : tuple
+            Minimum runtime of each RHU type; by default None (RHU1) and
+            :code:`VAR_MIN_RHU_RUNTIME` (RHU2).
+
+        Returns
+        -------
+        RHUs : numpy.ndarray or None
+            Structured array of shape (number of RHU types, number of bins),
+            with the bins of each scheme in ascending order. Returns None if
+            the thermostat does not control the appropriate equipment or if
+            the runtime_temp is None.
+        """
+        self._protect_aux_emerg()
+
+        if self.equipment_type != 1:
+            return None
+
+        if runtime_temp is None:
+            return None
+
+        runtimes = np.array([runtime_temp[name].values for name in RHU_RUNTIMES], dtype=float)
+        rhu = resistance_heat_utilization_bins(
+            runtimes, runtime_temp['temperature'].values, bin_schemes, min_runtime_minutes)
+
+        # Bins are the same for every RHU type, so each is only reported once.
+        for item in rhu[0][rhu[0]["data_is_nonsense"]]:
+            warn(
+                'WARNING: '
+                'aux heat runtime %s > compressor runtime %s '
+                'for %sF <= temperature < %sF '
+                'for thermostat_id %s '
+                'from %s to %s inclusive' % (
+                    item["aux_runtime"],
+                    item["heat_runtime"],
+                    item["low"],
+                    item["high"],
+                    self.thermostat_id,
+                    core_heating_day_set.start_date,
+                    core_heating_day_set.end_date))
+
+        return rhu
 
     def get_ignored_days(self, core_day_set):
         """ Determine how many days are ignored for a particular core day set
@@ -708,6 +882,63 @@ class Thermostat(object):
                 result = np.nan
             return result
 
+    def get_demand_inputs(self, core_day_set, method):
+        """ Collects the inputs to the demand fit for a core day set, in the
+        form used by :code:`thermostat.demand.fit_demands`.
+
+        Parameters
+        ----------
+        core_day_set : thermostat.core.CoreDaySet
+            Core day set over which to calculate demand.
+        method : {"cooling", "heating"}
+            Which runtime to fit demand against.
+
+        Returns
+        -------
+        daily_index : pd.DatetimeIndex
+            Days in the core day set.
+        daily_deltaT : np.ndarray
+            Hourly indoor minus outdoor temperature, of shape (n_days, 24).
+        daily_runtime : np.ndarray
+            Daily cooling or heating runtime.
+        """
+        if method == "cooling":
+            self._protect_cooling()
+            runtime = self.cool_runtime
+        elif method == "heating":
+            self._protect_heating()
+            runtime = self.heat_runtime
+        else:
+            raise NotImplementedError
+
+        core_day_set_temp_in = self.get_core_day_set_hourly(core_day_set, "temperature_in")
+        core_day_set_temp_out = self.get_core_day_set_hourly(core_day_set, "temperature_out")
+        daily_deltaT = get_daily_deltaT_array(core_day_set_temp_in - core_day_set_temp_out)
+        daily_index = core_day_set.daily[core_day_set.daily].index
+        daily_runtime = np.asarray(runtime[core_day_set.daily], dtype=float)
+        return daily_index, daily_deltaT, daily_runtime
+
+    def get_demands(self, core_day_sets, method):
+        """ Fits cooling or heating demand for several core day sets in one
+        batch; see :code:`get_cooling_demand` and :code:`get_heating_demand`.
+
+        Parameters
+        ----------
+        core_day_sets : list of thermostat.core.CoreDaySet
+            Core day sets over which to calculate demand.
+        method : {"cooling", "heating"}
+            Which demand to fit.
+
+        Returns
+        -------
+        demands : list of tuple
+            One tuple per core day set with the same fields as returned by
+            :code:`get_cooling_demand` and :code:`get_heating_demand`.
+        """
+        return fit_demands([
+            self.get_demand_inputs(core_day_set, method)
+            for core_day_set in core_day_sets], method)
+
     def get_cooling_demand(self, core_cooling_day_set):
         """
         Calculates a measure of cooling demand using the hourlyavgCTD method.
@@ -771,67 +1002,7 @@ class Thermostat(object):
 
         self._protect_cooling()
 
-        core_day_set_temp_in = self.temperature_in[core_cooling_day_set.hourly]
-        core_day_set_temp_out = self.temperature_out[core_cooling_day_set.hourly]
-        core_day_set_deltaT = core_day_set_temp_in - core_day_set_temp_out
-
-        daily_index = core_cooling_day_set.daily[core_cooling_day_set.daily].index
-
-        def calc_cdd(tau):
-            hourly_cdd = (tau - core_day_set_deltaT).apply(lambda x: np.maximum(x, 0))
-            # Note - `x / 24` this should be thought of as a unit conversion, not an average.
-            return np.array([cdd.sum() / 24 for day, cdd in hourly_cdd.groupby(core_day_set_deltaT.index.date)])
-
-        daily_runtime = self.cool_runtime[core_cooling_day_set.daily]
-        total_runtime = daily_runtime.sum()
-
-        def calc_estimates(tau):
-            cdd = calc_cdd(tau)
-            total_cdd = np.sum(cdd)
-            try:
-                alpha_estimate = total_runtime / total_cdd
-            except ZeroDivisionError:
-                logger.debug(
-                    'Alpha Estimate divided by zero: %s / %s'
-                    'for thermostat %s' % (
-                        total_runtime, total_cdd,
-                        self.thermostat_id))
-                alpha_estimate = np.nan
-            runtime_estimate = cdd * alpha_estimate
-            errors = daily_runtime - runtime_estimate
-            return cdd, alpha_estimate, errors
-
-        def estimate_errors(tau_estimate):
-            _, _, errors = calc_estimates(tau_estimate)
-            return errors
-
-        tau_starting_guess = 0
-        try:
-            y, _ = leastsq(estimate_errors, tau_starting_guess)
-        except TypeError: # len 0
-            assert daily_runtime.shape[0] == 0 # make sure no other type errors are sneaking in
-            return pd.Series([], index=daily_index), np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan
-
-        tau_estimate = y[0]
-
-        cdd, alpha_estimate, errors = calc_estimates(tau_estimate)
-        mse = np.nanmean((errors)**2)
-        rmse = mse ** 0.5
-        mean_daily_runtime = np.nanmean(daily_runtime)
-        try:
-            cvrmse = rmse / mean_daily_runtime
-        except ZeroDivisionError:
-            logger.debug(
-                'CVRMSE divided by zero: %s / %s '
-                'for thermostat_id %s ' % (
-                    rmse, mean_daily_runtime,
-                    self.thermostat_id))
-            cvrmse = np.nan
-
-        mape = np.nanmean(np.absolute(errors / mean_daily_runtime))
-        mae = np.nanmean(np.absolute(errors))
-
-        return pd.Series(cdd, index=daily_index), tau_estimate, alpha_estimate, mse, rmse, cvrmse, mape, mae
+        return self.get_demands([core_cooling_day_set], "cooling")[0]
 
     def get_heating_demand(self, core_heating_day_set):
         """
@@ -893,77 +1064,7 @@ class Thermostat(object):
 
         self._protect_heating()
 
-        core_day_set_temp_in = self.temperature_in[core_heating_day_set.hourly]
-        core_day_set_temp_out = self.temperature_out[core_heating_day_set.hourly]
-        core_day_set_deltaT = core_day_set_temp_in - core_day_set_temp_out
-
-        daily_index = core_heating_day_set.daily[core_heating_day_set.daily].index
-
-        def calc_hdd(tau):
-            hourly_hdd = (core_day_set_deltaT - tau).apply(lambda x: np.maximum(x, 0))
-            # Note - this `x / 24` should be thought of as a unit conversion, not an average.
-            return np.array([hdd.sum() / 24 for day, hdd in hourly_hdd.groupby(core_day_set_deltaT.index.date)])
-
-        daily_runtime = self.heat_runtime[core_heating_day_set.daily]
-        total_runtime = daily_runtime.sum()
-
-        def calc_estimates(tau):
-            hdd = calc_hdd(tau)
-            total_hdd = np.sum(hdd)
-            try:
-                alpha_estimate = total_runtime / total_hdd
-            except ZeroDivisionError:
-                logger.debug(
-                    'alpha_estimate divided by zero: %s / %s '
-                    'for thermostat_id %s ' % (
-                        total_runtime, total_hdd,
-                        self.thermostat_id))
-                alpha_estimate = np.nan
-            runtime_estimate = hdd * alpha_estimate
-            errors = daily_runtime - runtime_estimate
-            return hdd, alpha_estimate, errors
-
-        def estimate_errors(tau_estimate):
-            _, _, errors = calc_estimates(tau_estimate)
-            return errors
-
-        tau_starting_guess = 0
-
-        try:
-            y, _ = leastsq(estimate_errors, tau_starting_guess)
-        except TypeError: # len 0
-            assert daily_runtime.shape[0] == 0 # make sure no other type errors are sneaking in
-            return pd.Series([], index=daily_index), np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan
-
-        tau_estimate = y[0]
-
-        hdd, alpha_estimate, errors = calc_estimates(tau_estimate)
-        mse = np.nanmean((errors)**2)
-        rmse = mse ** 0.5
-        mean_daily_runtime = np.nanmean(daily_runtime)
-        try:
-            cvrmse = rmse / mean_daily_runtime
-        except ZeroDivisionError:
-            logger.warn(
-                'CVRMSE divided by zero: %s / %s '
-                'for thermostat_id %s ' % (
-                    rmse, mean_daily_runtime,
-                    self.thermostat_id))
-            cvrmse = np.nan
-
-        mape = np.nanmean(np.absolute(errors / mean_daily_runtime))
-        mae = np.nanmean(np.absolute(errors))
-
-        return (
-            pd.Series(hdd, index=daily_index),
-            tau_estimate,
-            alpha_estimate,
-            mse,
-            rmse,
-            cvrmse,
-            mape,
-            mae
-        )
+        return self.get_demands([core_heating_day_set], "heating")[0]
 
     def get_core_cooling_day_baseline_setpoint(self, core_cooling_day_set,
             method='tenth_percentile', source='temperature_in'):
@@ -997,7 +1098,7 @@ class Thermostat(object):
         if source == 'cooling_setpoint':
             return self.cooling_setpoint[core_cooling_day_set.hourly].dropna().quantile(.1)
         elif source == 'temperature_in':
-            return self.temperature_in[core_cooling_day_set.hourly].dropna().quantile(.1)
+            return self.get_core_day_set_hourly(core_cooling_day_set, "temperature_in").dropna().quantile(.1)
         else:
             raise NotImplementedError
 
@@ -1033,10 +1134,44 @@ class Thermostat(object):
         if source == 'heating_setpoint':
             return self.heating_setpoint[core_heating_day_set.hourly].dropna().quantile(.9)
         elif source == 'temperature_in':
-            return self.temperature_in[core_heating_day_set.hourly].dropna().quantile(.9)
+            return self.get_core_day_set_hourly(core_heating_day_set, "temperature_in").dropna().quantile(.9)
+        else:
+            raise NotImplementedError
+
+
+    def get_baseline_demands(self, core_day_set, temp_baselines, tau, method):
+        """ Calculate baseline demand for several baseline comfort
+        temperatures at once over a core day set; see
+        :code:`get_baseline_cooling_demand` and
+        :code:`get_baseline_heating_demand`.
+
+        Parameters
+        ----------
+        core_day_set : thermostat.core.CoreDaySet
+            Core days over which to calculate baseline demand.
+        temp_baselines : list of float
+            Baseline comfort temperatures.
+        tau : float
+            From fitted demand model.
+        method : {"cooling", "heating"}
+            Whether to calculate baseline cooling or heating demand.
+
+        Returns
+        -------
+        baseline_demands : numpy.ndarray
+            Array of shape (len(temp_baselines), number of core days) holding
+            the baseline daily demand for each baseline comfort temperature.
+        """
+        if method == "cooling":
+            self._protect_cooling()
+        elif method == "heating":
+            self._protect_heating()
         else:
             raise NotImplementedError
 
+        hourly_temp_out = self.get_core_day_set_hourly(core_day_set, "temperature_out")
+        daily_temp_out = get_daily_deltaT_array(hourly_temp_out)
+        return baseline_demand(daily_temp_out, temp_baselines, tau, method)
 
     def get_baseline_cooling_demand(self, core_cooling_day_set, temp_baseline, tau):
         """ Calculate baseline cooling demand for a particular core cooling
@@ -1069,12 +1204,8 @@ class Thermostat(object):
             A series containing baseline daily heating demand for the core
             cooling day set.
         """
-        self._protect_cooling()
-
-        hourly_temp_out = self.temperature_out[core_cooling_day_set.hourly]
-
-        hourly_cdd = (tau - (temp_baseline - hourly_temp_out)).apply(lambda x: np.maximum(x, 0))
-        demand = np.array([cdd.sum() / 24 for day, cdd in hourly_cdd.groupby(hourly_temp_out.index.date)])
+        demand = self.get_baseline_demands(
+            core_cooling_day_set, [temp_baseline], tau, "cooling")[0]
 
         index = core_cooling_day_set.daily[core_cooling_day_set.daily].index
         return pd.Series(demand, index=index)
@@ -1109,12 +1240,8 @@ class Thermostat(object):
         baseline_heating_demand : pandas.Series
             A series containing baseline daily heating demand for the core heating days.
         """
-        self._protect_heating()
-
-        hourly_temp_out = self.temperature_out[core_heating_day_set.hourly]
-
-        hourly_hdd = (temp_baseline - hourly_temp_out - tau).apply(lambda x: np.maximum(x, 0))
-        demand = np.array([hdd.sum() / 24 for day, hdd in hourly_hdd.groupby(hourly_temp_out.index.date)])
+        demand = self.get_baseline_demands(
+            core_heating_day_set, [temp_baseline], tau, "heating")[0]
 
         index = core_heating_day_set.daily[core_heating_day_set.daily].index
         return pd.Series(demand, index=index)
@@ -1170,7 +1297,7 @@ class Thermostat(object):
     def calculate_epa_field_savings_metrics(self,
             core_cooling_day_set_method="entire_dataset",
             core_heating_day_set_method="entire_dataset",
-            climate_zone_mapping=None):
+            climate_zone_mapping=None, metrics_table=None):
         """ Calculates metrics for connected thermostat savings as defined by
         the specification defined by the EPA Energy Star program and stakeholders.
 
@@ -1200,19 +1327,30 @@ class Thermostat(object):
 
             :download:`default mapping <./resources/Building America Climate Zone to Zipcode Database_Rev2_2016.09.08.csv>`
 
+        metrics_table : thermostat.exporters.MetricsTable, default: None
+            If given, the metrics for each set of core days are appended to
+            this table as they are calculated, rather than kept as a list of
+            dictionaries.
+
         Returns
         -------
-        metrics : list
+        metrics : list or thermostat.exporters.MetricsTable
             list of dictionaries of output metrics; one per set of core heating
-            or cooling days.
+            or cooling days. If :code:`metrics_table` is given, that table.
         """
 
-        retval = retrieve_climate_zone(climate_zone_mapping, self.zipcode)
+        if climate_zone_mapping is None or isinstance(climate_zone_mapping, str):
+            retval = self.get_intermediate(
+                ("climate_zone", None),
+                (self.zipcode, climate_zone_mapping),
+                lambda: retrieve_climate_zone(climate_zone_mapping, self.zipcode))
+        else:
+            retval = retrieve_climate_zone(climate_zone_mapping, self.zipcode)
         climate_zone = retval.climate_zone
         baseline_regional_cooling_comfort_temperature = retval.baseline_regional_cooling_comfort_temperature
         baseline_regional_heating_comfort_temperature = retval.baseline_regional_heating_comfort_temperature
 
-        metrics = []
+        metrics = [] if metrics_table is None else metrics_table
 
         def avoided(baseline, observed):
             return baseline - observed
@@ -1230,8 +1368,11 @@ class Thermostat(object):
             return savings
 
         if self.equipment_type in self.COOLING_EQUIPMENT_TYPES:
-            for core_cooling_day_set in self.get_core_cooling_days(
-                    method=core_cooling_day_set_method):
+            core_cooling_day_sets = self.get_core_cooling_days(
+                method=core_cooling_day_set_method)
+            # Demand is fit for every core day set in one batch.
+            cooling_demands = self.get_demands(core_cooling_day_sets, "cooling")
+            for core_cooling_day_set, cooling_demand in zip(core_cooling_day_sets, cooling_demands):
 
                 baseline10_comfort_temperature = \
                     self.get_core_cooling_day_baseline_setpoint(core_cooling_day_set)
@@ -1247,7 +1388,7 @@ class Thermostat(object):
                     cvrmse,
                     mape,
                     mae,
-                ) = self.get_cooling_demand(core_cooling_day_set)
+                ) = cooling_demand
 
                 total_runtime_core_cooling = daily_runtime.sum()
                 n_days = core_cooling_day_set.daily.sum()
@@ -1270,11 +1411,21 @@ class Thermostat(object):
                     average_daily_cooling_runtime = np.nan
                 np.seterr(**old_err_state)
 
-                baseline10_demand = self.get_baseline_cooling_demand(
+                # Baseline demand for the percentile and regional baselines
+                # is computed at once, one row per baseline.
+                baseline_comfort_temperatures = [baseline10_comfort_temperature]
+                if baseline_regional_cooling_comfort_temperature is not None:
+                    baseline_comfort_temperatures.append(
+                        baseline_regional_cooling_comfort_temperature)
+                baseline_demands = self.get_baseline_demands(
                     core_cooling_day_set,
-                    baseline10_comfort_temperature,
+                    baseline_comfort_temperatures,
                     tau,
+                    "cooling",
                 )
+                core_day_index = core_cooling_day_set.daily[core_cooling_day_set.daily].index
+
+                baseline10_demand = pd.Series(baseline_demands[0], index=core_day_index)
 
                 baseline10_runtime = self.get_baseline_cooling_runtime(
                     baseline10_demand,
@@ -1287,11 +1438,7 @@ class Thermostat(object):
 
                 if baseline_regional_cooling_comfort_temperature is not None:
 
-                    baseline_regional_demand = self.get_baseline_cooling_demand(
-                        core_cooling_day_set,
-                        baseline_regional_cooling_comfort_temperature,
-                        tau
-                    )
+                    baseline_regional_demand = pd.Series(baseline_demands[1], index=core_day_index)
 
                     baseline_regional_runtime = self.get_baseline_cooling_runtime(
                         baseline_regional_demand,
@@ -1329,8 +1476,10 @@ class Thermostat(object):
                 n_core_cooling_days = self.get_core_day_set_n_days(core_cooling_day_set)
                 n_days_in_inputfile_date_range = self.get_inputfile_date_range(core_cooling_day_set)
 
-                core_cooling_days_mean_indoor_temperature = self.temperature_in[core_cooling_day_set.hourly].mean()
-                core_cooling_days_mean_outdoor_temperature = self.temperature_out[core_cooling_day_set.hourly].mean()
+                core_cooling_days_mean_indoor_temperature = \
+                    self.get_core_day_set_hourly(core_cooling_day_set, "temperature_in").mean()
+                core_cooling_days_mean_outdoor_temperature = \
+                    self.get_core_day_set_hourly(core_cooling_day_set, "temperature_out").mean()
 
                 outputs = {
                     "sw_version": get_version(),
@@ -1386,7 +1535,9 @@ class Thermostat(object):
                 metrics.append(outputs)
 
         if self.equipment_type in self.HEATING_EQUIPMENT_TYPES:
-            for core_heating_day_set in self.get_core_heating_days(method=core_heating_day_set_method):
+            core_heating_day_sets = self.get_core_heating_days(method=core_heating_day_set_method)
+            heating_demands = self.get_demands(core_heating_day_sets, "heating")
+            for core_heating_day_set, heating_demand in zip(core_heating_day_sets, heating_demands):
 
                 baseline90_comfort_temperature = \
                         self.get_core_heating_day_baseline_setpoint(core_heating_day_set)
@@ -1403,7 +1554,7 @@ class Thermostat(object):
                     cvrmse,
                     mape,
                     mae,
-                ) = self.get_heating_demand(core_heating_day_set)
+                ) = heating_demand
 
                 total_runtime_core_heating = daily_runtime.sum()
                 n_days = core_heating_day_set.daily.sum()
@@ -1426,11 +1577,21 @@ class Thermostat(object):
                     average_daily_heating_runtime = np.nan
                 np.seterr(**old_err_state)
 
-                baseline90_demand = self.get_baseline_heating_demand(
+                # Baseline demand for the percentile and regional baselines
+                # is computed at once, one row per baseline.
+                baseline_comfort_temperatures = [baseline90_comfort_temperature]
+                if baseline_regional_heating_comfort_temperature is not None:
+                    baseline_comfort_temperatures.append(
+                        baseline_regional_heating_comfort_temperature)
+                baseline_demands = self.get_baseline_demands(
                     core_heating_day_set,
-                    baseline90_comfort_temperature,
+                    baseline_comfort_temperatures,
                     tau,
+                    "heating",
                 )
+                core_day_index = core_heating_day_set.daily[core_heating_day_set.daily].index
+
+                baseline90_demand = pd.Series(baseline_demands[0], index=core_day_index)
 
                 baseline90_runtime = self.get_baseline_heating_runtime(
                     baseline90_demand,
@@ -1443,11 +1604,7 @@ class Thermostat(object):
 
                 if baseline_regional_heating_comfort_temperature is not None:
 
-                    baseline_regional_demand = self.get_baseline_heating_demand(
-                        core_heating_day_set,
-                        baseline_regional_heating_comfort_temperature,
-                        tau,
-                    )
+                    baseline_regional_demand = pd.Series(baseline_demands[1], index=core_day_index)
 
                     baseline_regional_runtime = self.get_baseline_heating_runtime(
                         baseline_regional_demand,
@@ -1486,8 +1643,10 @@ class Thermostat(object):
                 n_core_heating_days = self.get_core_day_set_n_days(core_heating_day_set)
                 n_days_in_inputfile_date_range = self.get_inputfile_date_range(core_heating_day_set)
 
-                core_heating_days_mean_indoor_temperature = self.temperature_in[core_heating_day_set.hourly].mean()
-                core_heating_days_mean_outdoor_temperature = self.temperature_out[core_heating_day_set.hourly].mean()
+                core_heating_days_mean_indoor_temperature = \
+                    self.get_core_day_set_hourly(core_heating_day_set, "temperature_in").mean()
+                core_heating_days_mean_outdoor_temperature = \
+                    self.get_core_day_set_hourly(core_heating_day_set, "temperature_out").mean()
 
                 outputs = {
                     "sw_version": get_version(),
@@ -1551,78 +1710,27 @@ class Thermostat(object):
                                 core_heating_day_set),
                     }
 
-                    # Add RHU Calculations
-                    for rhu_type in ('rhu1', 'rhu2'):
-                        if rhu_type == 'rhu2':
-                            min_runtime_minutes = VAR_MIN_RHU_RUNTIME
-                        else:
-                            min_runtime_minutes = None
+                    # Add RHU Calculations; both RHU types and bin schemes
+                    # come from one pass over the core heating days.
+                    rhu_runtime = self.get_resistance_heat_utilization_runtime(core_heating_day_set)
+                    rhu = self.get_resistance_heat_utilization(rhu_runtime, core_heating_day_set)
 
-                        rhu_runtime = self.get_resistance_heat_utilization_runtime(core_heating_day_set)
+                    # Add duty cycle records
+                    heat_runtime = rhu_runtime.heat_runtime.sum()
+                    aux_runtime = rhu_runtime.aux_runtime.sum()
+                    emg_runtime = rhu_runtime.emg_runtime.sum()
+                    total_minutes = rhu_runtime.total_minutes.sum()
 
-                        # Add duty cycle records
-                        heat_runtime = rhu_runtime.heat_runtime.sum()
-                        aux_runtime = rhu_runtime.aux_runtime.sum()
-                        emg_runtime = rhu_runtime.emg_runtime.sum()
-                        total_minutes = rhu_runtime.total_minutes.sum()
+                    for row, rhu_type in enumerate(('rhu1', 'rhu2')):
                         additional_outputs[rhu_type + '_aux_duty_cycle'] = aux_runtime / total_minutes
                         additional_outputs[rhu_type + '_emg_duty_cycle'] = emg_runtime / total_minutes
                         additional_outputs[rhu_type + '_compressor_duty_cycle'] = heat_runtime / total_minutes
 
-                        rhu_first = self.get_resistance_heat_utilization_bins(
-                                rhu_runtime,
-                                RESISTANCE_HEAT_USE_BIN_FIRST,
-                                core_heating_day_set,
-                                min_runtime_minutes)
-
-                        rhu_second = self.get_resistance_heat_utilization_bins(
-                                rhu_runtime,
-                                RESISTANCE_HEAT_USE_BIN_SECOND,
-                                core_heating_day_set,
-                                min_runtime_minutes)
-
                         for duty_cycle in (None, 'aux_duty_cycle', 'emg_duty_cycle', 'compressor_duty_cycle'):
-
-                            if rhu_first is not None:
-
-                                for item in rhu_first.itertuples():
-                                    column = self._format_rhu(
-                                        rhu_type=rhu_type,
-                                        low=item.Index.left,
-                                        high=item.Index.right,
-                                        duty_cycle=duty_cycle)
-                                    if duty_cycle is None:
-                                        additional_outputs[column] = item.rhu
-                                    else:
-                                        additional_outputs[column] = getattr(item, duty_cycle)
-                            else:
-                                for (low, high) in RESISTANCE_HEAT_USE_BIN_FIRST_TUPLE:
-                                    column = self._format_rhu(
-                                            rhu_type,
-                                            low,
-                                            high,
-                                            duty_cycle)
-                                    additional_outputs[column] = None
-
-                            if rhu_second is not None:
-                                for item in rhu_second.itertuples():
-                                    column = self._format_rhu(
-                                        rhu_type=rhu_type,
-                                        low=item.Index.left,
-                                        high=item.Index.right,
-                                        duty_cycle=duty_cycle)
-                                    if duty_cycle is None:
-                                        additional_outputs[column] = item.rhu
-                                    else:
-                                        additional_outputs[column] = getattr(item, duty_cycle)
-                            else:
-                                for (low, high) in RESISTANCE_HEAT_USE_BIN_SECOND_TUPLE:
-                                    column = self._format_rhu(
-                                            rhu_type,
-                                            low,
-                                            high,
-                                            duty_cycle)
-                                    additional_outputs[column] = None
+                            values = rhu[row]['rhu' if duty_cycle is None else duty_cycle]
+                            for low, high, value in zip(rhu[row]['low'], rhu[row]['high'], values.tolist()):
+                                column = self._format_rhu(rhu_type, low, high, duty_cycle)
+                                additional_outputs[column] = value
 
                     outputs.update(additional_outputs)
 
@@ -0,0 +1,303 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import leastsq
+
+HOURS_PER_DAY = 24
+
+
+def get_daily_deltaT_array(hourly_deltaT):
+    """ Reshapes hourly deltaT for a core day set into one row per day.
+
+    Parameters
+    ----------
+    hourly_deltaT : pd.Series or np.ndarray
+        Hourly indoor minus outdoor temperature for the days in a core day
+        set. Core day sets always select whole days, so the length is a
+        multiple of 24.
+
+    Returns
+    -------
+    daily_deltaT : np.ndarray
+        Array of shape (n_days, 24).
+    """
+    values = np.asarray(hourly_deltaT, dtype=float)
+    if values.shape[0] % HOURS_PER_DAY != 0:
+        raise ValueError(
+            "Hourly deltaT of length {} does not cover whole days."
+            .format(values.shape[0]))
+    return values.reshape((-1, HOURS_PER_DAY))
+
+
+def daily_demand(daily_deltaT, tau, method):
+    """ Daily thermal demand for a given tau, computed over all days at once.
+
+    Cooling demand is :math:`\\sum_n [\\tau_c - \\Delta T_{d.n}]_{+} / 24` and
+    heating demand is :math:`\\sum_n [\\Delta T_{d.n} - \\tau_h]_{+} / 24`.
+    Null hours contribute nothing to the daily sum.
+
+    Parameters
+    ----------
+    daily_deltaT : np.ndarray
+        Array of shape (n_days, 24) from :code:`get_daily_deltaT_array`, or
+        any stack of such arrays with hours along the last axis.
+    tau : float or np.ndarray
+        Balance point :math:`\\tau` for the demand calculation; arrays are
+        broadcast against :code:`daily_deltaT`.
+    method : {"cooling", "heating"}
+        Which side of tau counts as demand.
+
+    Returns
+    -------
+    demand : np.ndarray
+        Daily demand, one value per day (row) of :code:`daily_deltaT`.
+    """
+    if method == "cooling":
+        hourly_demand = tau - daily_deltaT
+    elif method == "heating":
+        hourly_demand = daily_deltaT - tau
+    else:
+        raise NotImplementedError
+
+    # fmax treats nan as missing, matching the skipna sum used previously.
+    # Note - `x / 24` this should be thought of as a unit conversion, not an average.
+    return np.fmax(hourly_demand, 0).sum(axis=-1) / HOURS_PER_DAY
+
+
+def baseline_demand(daily_temp_out, temp_baselines, tau, method):
+    """ Daily baseline demand for several baseline comfort temperatures at
+    once, using the hourly :math:`\\Delta T` between each baseline comfort
+    temperature and the outdoor temperature.
+
+    Parameters
+    ----------
+    daily_temp_out : np.ndarray
+        Hourly outdoor temperatures of shape (n_days, 24), e.g. from
+        :code:`get_daily_deltaT_array`.
+    temp_baselines : array_like
+        Baseline comfort temperatures, one per baseline.
+    tau : float
+        From the fitted demand model.
+    method : {"cooling", "heating"}
+        Which side of tau counts as demand.
+
+    Returns
+    -------
+    demand : np.ndarray
+        Array of shape (n_baselines, n_days) holding the daily demand for
+        each baseline comfort temperature.
+    """
+    temp_baselines = np.asarray(temp_baselines, dtype=float)
+    baseline_deltaT = temp_baselines[:, np.newaxis, np.newaxis] - daily_temp_out
+    return daily_demand(baseline_deltaT, tau, method)
+
+
+def fit_tau(daily_deltaT, daily_runtime, method):
+    """ Finds the tau that minimizes the sum of squared errors between daily
+    runtime and :math:`\\alpha \\cdot \\text{demand}`, with :math:`\\alpha`
+    solved in closed form as total runtime over total demand.
+
+    The fit uses :code:`scipy.optimize.leastsq` starting from a tau of 0,
+    with the daily demand for each trial tau computed over all days at once
+    by :code:`daily_demand`.
+
+    Parameters
+    ----------
+    daily_deltaT : np.ndarray
+        Array of shape (n_days, 24) from :code:`get_daily_deltaT_array`.
+    daily_runtime : array_like
+        Runtime for each day (row) of :code:`daily_deltaT`.
+    method : {"cooling", "heating"}
+        Which side of tau counts as demand.
+
+    Returns
+    -------
+    tau : float
+        The fitted tau, or nan if there are no days.
+    """
+    daily_deltaT = np.asarray(daily_deltaT, dtype=float)
+    daily_runtime = np.asarray(daily_runtime, dtype=float)
+    if daily_runtime.shape[0] == 0:
+        return np.nan
+    total_runtime = np.nansum(daily_runtime)
+
+    def estimate_errors(tau):
+        demand = daily_demand(daily_deltaT, tau[0], method)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            alpha = total_runtime / np.sum(demand)
+        return daily_runtime - demand * alpha
+
+    tau_starting_guess = 0
+    y, _ = leastsq(estimate_errors, tau_starting_guess)
+    return float(y[0])
+
+
+def fit_tau_batch(daily_deltaT, daily_runtime, method, day_mask=None):
+    """ Fits tau for many core day sets; see :code:`fit_tau`.
+
+    Each set is fit on its own days only, so padding costs nothing.
+
+    Parameters
+    ----------
+    daily_deltaT : np.ndarray
+        Array of shape (n_sets, n_days, 24). Sets with fewer days are padded
+        with nan, e.g. by :code:`stack_daily_arrays`.
+    daily_runtime : np.ndarray
+        Array of shape (n_sets, n_days), padded with nan.
+    method : {"cooling", "heating"}
+        Which side of tau counts as demand.
+    day_mask : np.ndarray, optional
+        Boolean array of shape (n_sets, n_days); days that are False are
+        left out of the fit entirely.
+
+    Returns
+    -------
+    tau : np.ndarray
+        The fitted tau for each set, with the same conventions as
+        :code:`fit_tau`.
+    """
+    if method not in ("cooling", "heating"):
+        raise NotImplementedError
+
+    daily_deltaT = np.asarray(daily_deltaT, dtype=float)
+    daily_runtime = np.asarray(daily_runtime, dtype=float)
+    if day_mask is None:
+        day_mask = ~(np.isnan(daily_deltaT).all(axis=2) & np.isnan(daily_runtime))
+
+    tau = np.empty(daily_deltaT.shape[0])
+    for i, mask in enumerate(day_mask):
+        tau[i] = fit_tau(daily_deltaT[i][mask], daily_runtime[i][mask], method)
+    return tau
+
+
+def stack_daily_arrays(daily_deltaTs, daily_runtimes):
+    """ Stacks core day set inputs of different lengths into padded arrays
+    for :code:`fit_demand_batch`.
+
+    Parameters
+    ----------
+    daily_deltaTs : list of np.ndarray
+        Arrays of shape (n_days, 24) from :code:`get_daily_deltaT_array`.
+    daily_runtimes : list of array_like
+        Daily runtime matching each array in :code:`daily_deltaTs`.
+
+    Returns
+    -------
+    daily_deltaT : np.ndarray
+        Array of shape (n_sets, max_n_days, 24), padded with nan.
+    daily_runtime : np.ndarray
+        Array of shape (n_sets, max_n_days), padded with nan.
+    day_mask : np.ndarray
+        Boolean array of shape (n_sets, max_n_days), True for real days.
+    """
+    n_sets = len(daily_deltaTs)
+    n_days = max([len(d) for d in daily_deltaTs] + [0])
+
+    daily_deltaT = np.full((n_sets, n_days, HOURS_PER_DAY), np.nan)
+    daily_runtime = np.full((n_sets, n_days), np.nan)
+    day_mask = np.zeros((n_sets, n_days), dtype=bool)
+    for i, (deltaT, runtime) in enumerate(zip(daily_deltaTs, daily_runtimes)):
+        length = len(deltaT)
+        daily_deltaT[i, :length] = deltaT
+        daily_runtime[i, :length] = runtime
+        day_mask[i, :length] = True
+    return daily_deltaT, daily_runtime, day_mask
+
+
+def fit_demand_batch(daily_deltaT, daily_runtime, method, day_mask=None):
+    """ Fits the demand model for many core day sets at once.
+
+    Parameters
+    ----------
+    daily_deltaT : np.ndarray
+        Array of shape (n_sets, n_days, 24), padded with nan.
+    daily_runtime : np.ndarray
+        Array of shape (n_sets, n_days), padded with nan.
+    method : {"cooling", "heating"}
+        Which side of tau counts as demand.
+    day_mask : np.ndarray, optional
+        Boolean array of shape (n_sets, n_days), True for real days. If not
+        given, every day is treated as real.
+
+    Returns
+    -------
+    demand : np.ndarray
+        Daily demand of shape (n_sets, n_days), nan outside the mask.
+    tau : np.ndarray
+        Estimate of :math:`\\tau` for each set.
+    alpha : np.ndarray
+        Estimate of :math:`\\alpha` for each set.
+    mse : np.ndarray
+        Mean squared error in runtime estimates.
+    rmse : np.ndarray
+        Root mean squared error in runtime estimates.
+    cvrmse : np.ndarray
+        Coefficient of variation of root mean squared error in runtime estimates.
+    mape : np.ndarray
+        Mean absolute percent error
+    mae : np.ndarray
+        Mean absolute error
+
+    Sets without any days get nan for every value, matching
+    :code:`Thermostat.get_cooling_demand` on an empty core day set.
+    """
+    daily_deltaT = np.asarray(daily_deltaT, dtype=float)
+    daily_runtime = np.asarray(daily_runtime, dtype=float)
+    if day_mask is None:
+        day_mask = np.ones(daily_runtime.shape, dtype=bool)
+    else:
+        daily_runtime = np.where(day_mask, daily_runtime, np.nan)
+
+    tau = fit_tau_batch(daily_deltaT, daily_runtime, method, day_mask)
+    demand = daily_demand(daily_deltaT, tau[:, np.newaxis, np.newaxis], method)
+    demand = np.where(day_mask, demand, np.nan)
+
+    with warnings.catch_warnings(), \
+            np.errstate(divide="ignore", invalid="ignore"):
+        # Empty sets give all-nan means; those are reported as nan.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        alpha = np.nansum(daily_runtime, axis=1) / np.nansum(demand, axis=1)
+        errors = daily_runtime - demand * alpha[:, np.newaxis]
+        mse = np.nanmean(errors ** 2, axis=1)
+        rmse = mse ** 0.5
+        mean_daily_runtime = np.nanmean(daily_runtime, axis=1)
+        cvrmse = rmse / mean_daily_runtime
+        mape = np.nanmean(np.absolute(errors / mean_daily_runtime[:, np.newaxis]), axis=1)
+        mae = np.nanmean(np.absolute(errors), axis=1)
+
+    empty = ~day_mask.any(axis=1)
+    tau = np.where(empty, np.nan, tau)
+    alpha = np.where(empty, np.nan, alpha)
+    return demand, tau, alpha, mse, rmse, cvrmse, mape, mae
+
+
+def fit_demands(inputs, method):
+    """ Fits the demand model for several core day sets in one batch.
+
+    Parameters
+    ----------
+    inputs : list of (pd.DatetimeIndex, np.ndarray, np.ndarray)
+        Days, daily deltaT and daily runtime of each core day set, as
+        returned by :code:`Thermostat.get_demand_inputs`.
+    method : {"cooling", "heating"}
+        Which side of tau counts as demand.
+
+    Returns
+    -------
+    demands : list of tuple
+        One tuple per core day set with the same fields as returned by
+        :code:`Thermostat.get_cooling_demand` and
+        :code:`Thermostat.get_heating_demand`.
+    """
+    daily_deltaT, daily_runtime, day_mask = stack_daily_arrays(
+        [daily_deltaT for _, daily_deltaT, _ in inputs],
+        [daily_runtime for _, _, daily_runtime in inputs])
+
+    results = fit_demand_batch(daily_deltaT, daily_runtime, method, day_mask)
+
+    demands = []
+    for i, (daily_index, _, _) in enumerate(inputs):
+        demand = pd.Series(results[0][i, :len(daily_index)], index=daily_index)
+        demands.append((demand,) + tuple(result[i] for result in results[1:]))
+    return demands
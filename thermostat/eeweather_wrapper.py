@@ -1,6 +1,12 @@
+from contextlib import contextmanager, ExitStack
 from datetime import datetime
+from functools import lru_cache
+import os
+import tempfile
 import eeweather
+from eeweather.exceptions import ISDDataNotAvailableError
 
+import numpy as np
 import pandas as pd
 
 # This routine is a compact and distilled version of code that was originally
@@ -36,6 +42,104 @@ def _convert_to_farenheit(x):
     return 1.8 * x + 32
 
 
+# Environment variable naming a directory where resampled station-years are
+# shared between processes. Set by :code:`weather_cache_directory`.
+WEATHER_CACHE_DIRECTORY_VARIABLE = "EPATHERMOSTAT_WEATHER_CACHE_DIRECTORY"
+
+# Station-years kept in memory by each process (about 70kB each).
+WEATHER_CACHE_SIZE = 256
+
+
+@contextmanager
+def weather_cache_directory(path=None):
+    """ Shares resampled station-years between the processes started within
+    this context, so that each station-year is fetched from eeweather and
+    resampled once.
+
+    Parameters
+    ----------
+    path : str, optional
+        Directory to keep the station-years in, which is kept afterwards
+        and may be reused by later runs. If None and no directory is
+        configured yet, a temporary directory is used and removed on exit.
+    """
+    previous = os.environ.get(WEATHER_CACHE_DIRECTORY_VARIABLE)
+    if path is None and previous is not None:
+        yield previous
+        return
+
+    with ExitStack() as stack:
+        if path is None:
+            path = stack.enter_context(tempfile.TemporaryDirectory(prefix="epathermostat_weather_"))
+        os.makedirs(path, exist_ok=True)
+        os.environ[WEATHER_CACHE_DIRECTORY_VARIABLE] = path
+        try:
+            yield path
+        finally:
+            if previous is None:
+                del os.environ[WEATHER_CACHE_DIRECTORY_VARIABLE]
+            else:
+                os.environ[WEATHER_CACHE_DIRECTORY_VARIABLE] = previous
+
+
+def _load_station_year(usaf_id, year):
+    """ Fetches a year of hourly temperatures in Fahrenheit from eeweather.
+    Returns an empty array if there is no data for that year, otherwise one
+    value per hour of the year.
+    """
+    start = pd.to_datetime(datetime(year, 1, 1), utc=True)
+    end = pd.to_datetime(datetime(year, 12, 31, 23, 59), utc=True)
+    try:
+        tempC, warnings = eeweather.load_isd_hourly_temp_data(
+            usaf_id, start, end, error_on_missing_years=True)
+    except ISDDataNotAvailableError:
+        return np.array([], dtype=float)
+    if len(tempC) == 0:
+        return np.array([], dtype=float)
+    tempC = tempC.resample('H').mean().reindex(
+        pd.date_range(start, end.floor('H'), freq='H'))
+    return _convert_to_farenheit(tempC.values.astype(float))
+
+
+@lru_cache(maxsize=WEATHER_CACHE_SIZE)
+def get_station_year_temperatures(usaf_id, year):
+    """ Returns a year of hourly temperatures in Fahrenheit for a station,
+    fetching and resampling it once per process, or once per run when a
+    :code:`weather_cache_directory` is set.
+
+    Parameters
+    ----------
+    usaf_id : string
+        USAF ID of the station to look up
+    year : int
+        Year to look up
+
+    Returns
+    -------
+    temperatures : numpy.ndarray
+        Read-only array with one temperature per hour of the year, starting
+        at midnight UTC on January 1st, or an empty array if eeweather has
+        no data for that year.
+    """
+    directory = os.environ.get(WEATHER_CACHE_DIRECTORY_VARIABLE)
+    if directory is None:
+        values = _load_station_year(usaf_id, year)
+    else:
+        filename = os.path.join(directory, "{}-{}.npy".format(usaf_id, year))
+        try:
+            values = np.load(filename)
+        except (OSError, ValueError):
+            values = _load_station_year(usaf_id, year)
+            # Written under a temporary name and renamed so that other
+            # processes never read a partial file.
+            fd, temporary_filename = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, values)
+            os.replace(temporary_filename, filename)
+    values.setflags(write=False)
+    return values
+
+
 def get_indexed_temperatures_eeweather(usaf_id, index):
     """ Helper routine to return average temperatures over the given index in Fahrenheit
 
@@ -55,9 +159,20 @@ def get_indexed_temperatures_eeweather(usaf_id, index):
     if index.shape == (0,):
         return pd.Series([], index=index, dtype=float)
     years = sorted(index.groupby(index.year).keys())
+    year_values = [get_station_year_temperatures(usaf_id, year) for year in years]
+    if all(len(values) == 0 for values in year_values):
+        raise ValueError(
+            "No ISD data available for station {} in {}".format(usaf_id, years))
+
+    # Years without data are filled with NaN, as eeweather does when
+    # loading several years at once.
     start = pd.to_datetime(datetime(years[0], 1, 1), utc=True)
-    end = pd.to_datetime(datetime(years[-1], 12, 31, 23, 59), utc=True)
-    tempC, warnings = eeweather.load_isd_hourly_temp_data(usaf_id, start, end)
-    tempC = tempC.resample('H').mean()[index]
-    tempF = _convert_to_farenheit(tempC)
+    end = pd.to_datetime(datetime(years[-1], 12, 31, 23), utc=True)
+    hourly_index = pd.date_range(start, end, freq='H')
+    values = np.full(len(hourly_index), np.nan)
+    for year, year_value in zip(years, year_values):
+        if len(year_value) > 0:
+            offset = hourly_index.get_loc(pd.Timestamp(datetime(year, 1, 1), tz='UTC'))
+            values[offset:offset + len(year_value)] = year_value
+    tempF = pd.Series(values, index=hourly_index)[index]
     return tempF
@@ -0,0 +1,309 @@
+""" Executor backends for running a function over many thermostats.
+
+Every backend implements :code:`imap(func, iterable, ordered=True)`, which
+yields :code:`func` of each item, either in the order of the items or in the
+order they finish, and is a context manager which releases its workers on
+exit:
+
+- :code:`SerialExecutor`: runs in the calling process, e.g. for profiling.
+- :code:`ThreadExecutor`: a pool of threads.
+- :code:`ProcessExecutor`: a :code:`multiprocessing.Pool` with a
+  configurable number of processes and chunksize.
+- :code:`FuturesExecutor`: any :code:`concurrent.futures.Executor`.
+- :code:`DaskExecutor`: a dask.distributed cluster, if dask is installed.
+
+Functions which accept an executor also accept the name of a backend, see
+:code:`get_executor`.
+
+:code:`lpt_chunks` and :code:`imap_chunks` schedule jobs of uneven cost:
+the most expensive jobs are sent first, each on its own, and cheap ones are
+batched, so that workers finish at about the same time.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from multiprocessing import Pool, cpu_count
+import os
+
+import numpy as np
+
+# Chunks scheduled per worker by lpt_chunks; more chunks balance better but
+# each costs a round trip to a worker.
+CHUNKS_PER_WORKER = 4
+
+# dask is optional; it is only needed for DaskExecutor.
+try:
+    import dask.distributed
+except ImportError:
+    dask = None
+
+
+class SerialExecutor(object):
+    """ Runs every call in the calling process, one at a time. """
+
+    n_workers = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def imap(self, func, iterable, ordered=True):
+        """ Yields :code:`func(item)` for each item.
+
+        Parameters
+        ----------
+        func : callable
+            Function of one argument.
+        iterable : iterable
+            Arguments to call :code:`func` with.
+        ordered : boolean
+            Set to False to allow results in the order they finish.
+        """
+        return map(func, iterable)
+
+
+class FuturesExecutor(SerialExecutor):
+    """ Runs calls on a :code:`concurrent.futures.Executor`.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor
+        Executor to submit calls to. It is shut down on exit if
+        :code:`shutdown` is True.
+    shutdown : boolean
+        Set to True to shut the executor down on exit.
+    """
+
+    def __init__(self, executor, shutdown=False):
+        self.executor = executor
+        self.shutdown = shutdown
+
+    @property
+    def n_workers(self):
+        return getattr(self.executor, "_max_workers", None) or cpu_count()
+
+    def __exit__(self, *exc_info):
+        if self.shutdown:
+            self.executor.shutdown()
+
+    def imap(self, func, iterable, ordered=True):
+        futures = [self.executor.submit(func, item) for item in iterable]
+        if not ordered:
+            futures = as_completed(futures)
+        return (future.result() for future in futures)
+
+
+class ThreadExecutor(FuturesExecutor):
+    """ Runs calls in a pool of threads.
+
+    Parameters
+    ----------
+    workers : int
+        Number of threads. Defaults to that of
+        :code:`concurrent.futures.ThreadPoolExecutor`.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers
+        self.executor = None
+        self.shutdown = True
+
+    @property
+    def n_workers(self):
+        # The default of ThreadPoolExecutor.
+        return self.workers or min(32, (os.cpu_count() or 1) + 4)
+
+    def __enter__(self):
+        self.executor = ThreadPoolExecutor(self.workers)
+        return self
+
+
+class ProcessExecutor(SerialExecutor):
+    """ Runs calls in a :code:`multiprocessing.Pool`.
+
+    Parameters
+    ----------
+    processes : int
+        Number of worker processes. Defaults to the number of CPUs.
+    chunksize : int
+        Number of items sent to a worker at a time.
+    """
+
+    def __init__(self, processes=None, chunksize=1):
+        self.processes = processes
+        self.chunksize = chunksize
+        self.pool = None
+
+    @property
+    def n_workers(self):
+        return self.processes or cpu_count()
+
+    def __enter__(self):
+        self.pool = Pool(self.processes)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.pool.close()
+        self.pool.join()
+
+    def imap(self, func, iterable, ordered=True):
+        imap = self.pool.imap if ordered else self.pool.imap_unordered
+        return imap(func, iterable, self.chunksize)
+
+
+class DaskExecutor(FuturesExecutor):
+    """ Runs calls on a dask.distributed cluster.
+
+    Parameters
+    ----------
+    address : str
+        Address of the scheduler. A local cluster is started if None.
+    **kwargs
+        Passed to :code:`dask.distributed.Client`.
+    """
+
+    def __init__(self, address=None, **kwargs):
+        if dask is None:
+            raise ImportError("DaskExecutor requires dask.distributed.")
+        self.address = address
+        self.kwargs = kwargs
+        self.client = None
+        self.shutdown = False
+
+    def __enter__(self):
+        self.client = dask.distributed.Client(self.address, **self.kwargs)
+        self.executor = self.client.get_executor()
+        return self
+
+    @property
+    def n_workers(self):
+        if self.client is None:
+            return cpu_count()
+        return sum(self.client.nthreads().values()) or 1
+
+    def __exit__(self, *exc_info):
+        self.client.close()
+
+
+EXECUTORS = {
+    "serial": SerialExecutor,
+    "thread": ThreadExecutor,
+    "process": ProcessExecutor,
+    "dask": DaskExecutor,
+}
+
+
+def get_executor(executor=None, processes=None):
+    """ Resolves an executor argument.
+
+    Parameters
+    ----------
+    executor : str, executor or concurrent.futures.Executor
+        A backend instance, a :code:`concurrent.futures.Executor` to wrap in
+        a :code:`FuturesExecutor`, or one of :code:`"serial"`,
+        :code:`"thread"`, :code:`"process"` and :code:`"dask"`. Defaults to
+        a :code:`ProcessExecutor`.
+    processes : int
+        Number of workers of a :code:`ProcessExecutor` or
+        :code:`ThreadExecutor` created by name or by default.
+
+    Returns
+    -------
+    executor : executor
+        An executor backend, not yet entered.
+    """
+    if executor is None:
+        executor = "process"
+    if isinstance(executor, str):
+        if executor not in EXECUTORS:
+            raise ValueError("executor must be one of {}, not {!r}".format(
+                tuple(EXECUTORS), executor))
+        if executor in ("process", "thread"):
+            return EXECUTORS[executor](processes)
+        return EXECUTORS[executor]()
+    if hasattr(executor, "imap"):
+        return executor
+    if hasattr(executor, "submit"):
+        return FuturesExecutor(executor)
+    raise TypeError("Unsupported executor: {!r}".format(executor))
+
+
+def lpt_chunks(costs, n_workers, chunks_per_worker=CHUNKS_PER_WORKER):
+    """ Groups jobs into chunks in longest-processing-time-first order.
+
+    Jobs are sorted by decreasing cost. Jobs costing at least the target
+    chunk cost, :code:`sum(costs) / (n_workers * chunks_per_worker)`, form a
+    chunk of their own; cheaper ones are batched until a chunk reaches the
+    target. The cheap chunks at the end fill in the gaps left by the
+    expensive ones.
+
+    Parameters
+    ----------
+    costs : list of float
+        Estimated cost of each job.
+    n_workers : int
+        Number of workers the chunks are run on.
+    chunks_per_worker : int
+        Number of chunks to aim for per worker.
+
+    Returns
+    -------
+    chunks : list of list of int
+        Positions of the jobs of each chunk, in the order to run them.
+    """
+    costs = np.asarray(costs, dtype=float)
+    if len(costs) == 0:
+        return []
+    target = costs.sum() / max(n_workers * chunks_per_worker, 1)
+    chunks = []
+    chunk = []
+    chunk_cost = 0.0
+    # A stable sort keeps jobs of equal cost in their input order.
+    for i in np.argsort(-costs, kind="stable").tolist():
+        chunk.append(i)
+        chunk_cost += costs[i]
+        if chunk_cost >= target:
+            chunks.append(chunk)
+            chunk = []
+            chunk_cost = 0.0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _run_chunk(func, chunk):
+    return [(i, func(item)) for i, item in chunk]
+
+
+def _flatten(chunk_results):
+    for results in chunk_results:
+        for result in results:
+            yield result
+
+
+def imap_chunks(executor, func, items, chunks):
+    """ Runs func over chunks of items on an entered executor.
+
+    Parameters
+    ----------
+    executor : executor
+        Entered executor backend.
+    func : callable
+        Function of one item.
+    items : list or dict
+        Items, by position.
+    chunks : list of list of int
+        Positions of the items of each chunk, e.g. from :code:`lpt_chunks`.
+
+    Returns
+    -------
+    results : iterator of (int, object)
+        Position and result of each item, in the order they finish. The
+        chunks are submitted before the iterator is returned, so work on
+        them starts while results of earlier calls are still consumed.
+    """
+    return _flatten(executor.imap(
+        partial(_run_chunk, func),
+        [[(i, items[i]) for i in chunk] for chunk in chunks],
+        ordered=False))
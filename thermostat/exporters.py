@@ -1,5 +1,12 @@
+import numpy as np
 import pandas as pd
 
+# pyarrow is optional; it is only needed for MetricsTable.to_arrow.
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 COLUMNS = [
     'sw_version',
 
@@ -225,14 +232,153 @@ COLUMNS = [
     ]
 
 
+# Columns holding text (or dates formatted as text) rather than numbers.
+TEXT_COLUMNS = [
+    'sw_version',
+    'ct_identifier',
+    'heating_or_cooling',
+    'zipcode',
+    'station',
+    'climate_zone',
+    'start_date',
+    'end_date',
+    ]
+
+
+class MetricsTable(object):
+    """ Collects metrics into preallocated typed columns keyed by
+    :code:`COLUMNS`, instead of keeping a dict for every core day set.
+
+    Numeric columns are float arrays and text columns are object arrays.
+    Columns grow by doubling when full. Metrics which are not in the
+    schema are dropped and missing metrics are null, as in
+    :code:`metrics_to_csv`.
+
+    Parameters
+    ----------
+    capacity : int, default 1024
+        Number of rows to preallocate.
+    columns : list of str, default COLUMNS
+        Output columns, in order.
+    """
+
+    def __init__(self, capacity=1024, columns=COLUMNS):
+        self.columns = list(columns)
+        self._capacity = max(int(capacity), 1)
+        self._n_rows = 0
+        self._values = {name: self._allocate(name, self._capacity) for name in self.columns}
+        # Numeric columns which only hold integers are returned as integers,
+        # as pandas infers for a list of dicts.
+        self._integral = {name: True for name in self.columns if name not in TEXT_COLUMNS}
+
+    @staticmethod
+    def _allocate(name, n_rows):
+        if name in TEXT_COLUMNS:
+            return np.full(n_rows, None, dtype=object)
+        return np.full(n_rows, np.nan)
+
+    def __len__(self):
+        return self._n_rows
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        for name, values in self._values.items():
+            grown = self._allocate(name, capacity)
+            grown[:self._n_rows] = values[:self._n_rows]
+            self._values[name] = grown
+        self._capacity = capacity
+
+    def append(self, metrics):
+        """ Appends the metrics for one core day set.
+
+        Parameters
+        ----------
+        metrics : dict
+            Metrics for a core day set, as returned by
+            :code:`thermostat.core.Thermostat.calculate_epa_field_savings_metrics`.
+        """
+        if self._n_rows == self._capacity:
+            self._grow()
+        row = self._n_rows
+        for name in self.columns:
+            value = metrics.get(name)
+            if name in self._integral:
+                if value is None:
+                    self._integral[name] = False
+                    continue
+                if self._integral[name] and not isinstance(value, (int, np.integer)):
+                    self._integral[name] = False
+            self._values[name][row] = value
+        self._n_rows += 1
+
+    def extend(self, metrics):
+        """ Appends the metrics for several core day sets.
+
+        Parameters
+        ----------
+        metrics : list of dict or MetricsTable
+            Metrics for each core day set.
+        """
+        if not isinstance(metrics, MetricsTable):
+            for row in metrics:
+                self.append(row)
+            return
+
+        n_rows = len(metrics)
+        if n_rows == 0:
+            return
+        while self._capacity < self._n_rows + n_rows:
+            self._grow()
+        for name in self.columns:
+            if name in metrics._values:
+                self._values[name][self._n_rows:self._n_rows + n_rows] = metrics._values[name][:n_rows]
+            if name in self._integral:
+                self._integral[name] = self._integral[name] and metrics._integral.get(name, False)
+        self._n_rows += n_rows
+
+    def _column(self, name):
+        values = self._values[name][:self._n_rows]
+        if self._integral.get(name) and self._n_rows > 0:
+            values = values.astype(np.int64)
+        return values
+
+    def to_dataframe(self):
+        """ Returns the metrics as a DataFrame with one row per core day set.
+
+        Returns
+        -------
+        df : pd.DataFrame
+            DataFrame with the columns of the table.
+        """
+        return pd.DataFrame(
+            {name: self._column(name) for name in self.columns},
+            columns=self.columns)
+
+    def to_arrow(self):
+        """ Returns the metrics as an Arrow table with one row per core day
+        set. Requires pyarrow.
+
+        Returns
+        -------
+        table : pyarrow.Table
+            Table with the columns of the table.
+        """
+        if pyarrow is None:
+            raise ImportError("pyarrow is required for MetricsTable.to_arrow")
+        return pyarrow.Table.from_arrays(
+            [pyarrow.array(self._column(name), from_pandas=True) for name in self.columns],
+            names=self.columns)
+
+
 def metrics_to_csv(metrics, filepath):
     """ Writes metrics outputs to the file specified.
 
     Parameters
     ----------
-    metrics : list of dict
+    metrics : list of dict, MetricsTable or pd.DataFrame
         list of outputs from the function
-        `thermostat.calculate_epa_draft_rccs_field_savings_metrics()`
+        `thermostat.calculate_epa_draft_rccs_field_savings_metrics()`, or
+        the same outputs collected in columns.
     filepath : str
         filepath specification for location of output CSV file.
 
@@ -242,6 +388,9 @@ def metrics_to_csv(metrics, filepath):
         DataFrame containing data output to CSV.
     """
 
-    output_dataframe = pd.DataFrame(metrics, columns=COLUMNS)
+    if isinstance(metrics, MetricsTable):
+        output_dataframe = metrics.to_dataframe()
+    else:
+        output_dataframe = pd.DataFrame(metrics, columns=COLUMNS)
     output_dataframe.to_csv(filepath, index=False, columns=COLUMNS)
     return output_dataframe
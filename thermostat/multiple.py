@@ -1,7 +1,28 @@
-from multiprocessing import Pool
+from collections import deque
+from functools import partial
+from multiprocessing import cpu_count
+import os
 
+import pandas as pd
 
-def _calc_epa_func(thermostat):
+from thermostat import importers
+from thermostat.demand import fit_demands
+from thermostat.exporters import MetricsTable
+from thermostat.results import ResultStore, MetricsJournal
+from thermostat.executors import get_executor, ProcessExecutor, lpt_chunks, imap_chunks
+from thermostat.transport import share_thermostats, SHARED_MEMORY_BATCH_SIZE, SHARED_MEMORY_BLOCKS_IN_FLIGHT
+from thermostat.eeweather_wrapper import weather_cache_directory
+
+# Result formats of the multiple thermostat metrics functions.
+RESULT_FORMATS = ("list", "dataframe", "arrow")
+
+# Relative cost per day of the metrics of each equipment type, used to
+# schedule the most expensive thermostats first. Type 1 adds resistance
+# heat utilization; types 4 and 5 only heat or only cool.
+EQUIPMENT_TYPE_COST = {1: 1.6, 2: 1.0, 3: 1.0, 4: 0.65, 5: 0.65}
+
+
+def _calc_epa_func(thermostat, columnar=False, result_store=None):
     """ Takes an individual thermostat and runs the
     calculate_epa_field_savings_metrics method. This method is necessary for
     the multiprocessing pool as map / imap need a function to run on.
@@ -9,58 +30,433 @@ def _calc_epa_func(thermostat):
     Parameters
     ----------
     thermostat : thermostat
+    columnar : boolean
+        Set to True to collect the metrics in a
+        :code:`thermostat.exporters.MetricsTable`.
+    result_store : thermostat.results.ResultStore
+        If given, metrics are read from this store when the thermostat is
+        unchanged, and stored after being calculated otherwise.
 
     Returns
     -------
     results : results from running calculate_epa_field_savings_metrics
     """
+    if result_store is not None:
+        results = result_store.calculate_epa_field_savings_metrics(thermostat)
+        if columnar:
+            metrics_table = MetricsTable(capacity=max(len(results), 1))
+            metrics_table.extend(results)
+            return metrics_table
+        return results
+    if columnar:
+        return thermostat.calculate_epa_field_savings_metrics(
+            metrics_table=MetricsTable(capacity=2))
     results = thermostat.calculate_epa_field_savings_metrics()
     return results
 
 
-def multiple_thermostat_calculate_epa_field_savings_metrics(thermostats):
+def _calc_epa_func_with_id(thermostat, columnar=False, result_store=None):
+    """ As :code:`_calc_epa_func`, also returning the thermostat id so that
+    results can be collected in the order they finish.
+    """
+    return thermostat.thermostat_id, _calc_epa_func(thermostat, columnar, result_store)
+
+
+def _thermostat_cost(thermostat):
+    """ Estimated relative cost of calculating a thermostat's metrics. """
+    runtime = thermostat.heat_runtime if thermostat.heat_runtime is not None else thermostat.cool_runtime
+    n_days = len(runtime) if runtime is not None else 0
+    return max(n_days, 1) * EQUIPMENT_TYPE_COST.get(thermostat.equipment_type, 1.0)
+
+
+def _metadata_cost(metadata, metadata_filename):
+    """ Estimated relative cost of importing a thermostat and calculating
+    its metrics, from the size of its interval data file, which grows with
+    the number of days.
+    """
+    _, row = metadata
+    try:
+        size = os.path.getsize(os.path.join(os.path.dirname(metadata_filename), row.interval_data_filename))
+    except (OSError, TypeError):
+        size = 0
+    return max(size, 1) * EQUIPMENT_TYPE_COST.get(row.equipment_type, 1.0)
+
+
+def _n_workers(executor):
+    return getattr(executor, "n_workers", None) or cpu_count()
+
+
+def _imap_scheduled(executor, func, items, costs):
+    """ Runs func over items on an entered executor, most expensive first
+    and with cheap items batched (see :code:`thermostat.executors.lpt_chunks`).
+    Yields (position, result) pairs in the order they finish.
+    """
+    return imap_chunks(executor, func, items, lpt_chunks(costs, _n_workers(executor)))
+
+
+def _imap_thermostats(executor, func, thermostats, shared_memory=False):
+    """ Runs func over thermostats on an entered executor, scheduled by
+    their estimated cost. With shared_memory, thermostats are sent to
+    process pool workers through shared memory blocks of up to
+    :code:`SHARED_MEMORY_BATCH_SIZE` thermostats, in the scheduled order,
+    with up to :code:`SHARED_MEMORY_BLOCKS_IN_FLIGHT` blocks shared at once.
+    Yields (position, result) pairs in the order they finish.
+    """
+    costs = [_thermostat_cost(thermostat) for thermostat in thermostats]
+    if not (shared_memory and isinstance(executor, ProcessExecutor)):
+        for result in _imap_scheduled(executor, func, thermostats, costs):
+            yield result
+        return
+
+    chunks = lpt_chunks(costs, _n_workers(executor))
+    # Blocks whose thermostats are submitted, with their results. The next
+    # block is submitted before the current one finishes, so workers move on
+    # to it rather than waiting for the slowest thermostats of each block.
+    pending = deque()
+    try:
+        for batch in _shared_memory_batches(chunks):
+            positions = [i for chunk in batch for i in chunk]
+            shared = share_thermostats([thermostats[i] for i in positions])
+            try:
+                items = dict(zip(positions, shared.thermostats))
+                pending.append((shared, imap_chunks(executor, func, items, batch)))
+            except BaseException:
+                shared.close()
+                raise
+            if len(pending) == SHARED_MEMORY_BLOCKS_IN_FLIGHT:
+                for result in _drain_block(pending):
+                    yield result
+        while pending:
+            for result in _drain_block(pending):
+                yield result
+    finally:
+        for shared, _ in pending:
+            shared.close()
+
+
+def _shared_memory_batches(chunks):
+    """ Groups consecutive chunks into batches of up to
+    :code:`SHARED_MEMORY_BATCH_SIZE` thermostats, one per shared memory block.
+    """
+    start = 0
+    while start < len(chunks):
+        # Take chunks in order until the batch would exceed the block size.
+        end = start + 1
+        batch_size = len(chunks[start])
+        while end < len(chunks) and batch_size + len(chunks[end]) <= SHARED_MEMORY_BATCH_SIZE:
+            batch_size += len(chunks[end])
+            end += 1
+        yield chunks[start:end]
+        start = end
+
+
+def _drain_block(pending):
+    """ Yields the results of the oldest pending block, then removes the
+    block once every thermostat in it is done.
+    """
+    shared, results = pending[0]
+    for result in results:
+        yield result
+    pending.popleft()
+    shared.close()
+
+
+def _in_order(results, n_items):
+    """ Collects (position, result) pairs into a list by position. """
+    ordered_results = [None] * n_items
+    for i, result in results:
+        ordered_results[i] = result
+    return ordered_results
+
+
+def _check_result_format(result_format):
+    if result_format not in RESULT_FORMATS:
+        raise ValueError("result_format must be one of {}, not {!r}".format(
+            RESULT_FORMATS, result_format))
+
+
+def _get_result_store(result_store):
+    if result_store is None or isinstance(result_store, ResultStore):
+        return result_store
+    return ResultStore(result_store)
+
+
+def multiple_thermostat_calculate_epa_field_savings_metrics(thermostats, result_format="list",
+                                                           result_store=None, checkpoint=None, resume=False,
+                                                           executor=None, shared_memory=False):
     """ Takes a list of thermostats and uses Python's Multiprocessing module to
-    run as many processes in parallel as the system will allow.
+    run as many processes in parallel as the system will allow, or another
+    executor backend. Thermostats with the most days of the most expensive
+    equipment types are sent first, and the cheapest are sent in chunks,
+    so that no long thermostat is left running alone at the end.
 
     Parameters
     ----------
     thermostats : thermostats iterator
         A list of the thermostats run the calculate_epa_field_savings_metrics
         upon.
+    result_format : {"list", "dataframe", "arrow"}, default: "list"
+        Return the metrics as a list of dicts, or collect them in columns
+        (see :code:`thermostat.exporters.MetricsTable`) and return a
+        DataFrame or a pyarrow Table with the columns of
+        :code:`thermostat.exporters.COLUMNS`, without keeping a dict per
+        core day set.
+    result_store : thermostat.results.ResultStore or str
+        A result store, or the directory of one. Thermostats whose data is
+        unchanged since their metrics were stored are not recalculated.
+    checkpoint : str
+        Path of a :code:`thermostat.results.MetricsJournal`. If given, the
+        metrics of each thermostat are written to the journal as soon as it
+        finishes, and the returned metrics are read back from it.
+    resume : boolean
+        Set to True to skip thermostats already in the checkpoint journal,
+        e.g. to continue a run which was interrupted. Otherwise the journal
+        is cleared first.
+    executor : str or executor
+        Backend to run the thermostats on, as accepted by
+        :code:`thermostat.executors.get_executor`, e.g. :code:`"serial"` to
+        run in this process. Defaults to a process pool with a process per
+        CPU.
+    shared_memory : boolean
+        Set to True to send the thermostats' time series to process pool
+        workers through shared memory (see :code:`thermostat.transport`)
+        rather than pickling each thermostat. Ignored by other executors.
+        Requires Python 3.8 or later.
 
     Returns
     -------
-    metrics : list
-        Returns a list of the metrics calculated for the thermostats
+    metrics : list, pd.DataFrame or pyarrow.Table
+        Returns the metrics calculated for the thermostats
     """
+    _check_result_format(result_format)
+    result_store = _get_result_store(result_store)
+
     # Convert the thermostats iterator to a list
     thermostats_list = list(thermostats)
 
-    pool = Pool()
-    results = pool.imap(_calc_epa_func, thermostats_list)
-    pool.close()
-    pool.join()
-
-    metrics_dict = {}
-    for output in results:
-        thermostat_id = output[0]['ct_identifier']
-        metrics_dict[thermostat_id] = []
-        for individual_output in output:
-            metrics_dict[thermostat_id].append(individual_output)
-
     # Get the order of the thermostats from the original input so the output
     # matches the order that was sent in
     thermostat_ids = \
         [thermostat.thermostat_id for thermostat in thermostats_list]
-    metrics = []
+
+    executor = get_executor(executor)
+
+    if checkpoint is not None:
+        with MetricsJournal(checkpoint, resume=resume) as journal:
+            journaled_ids = journal.thermostat_ids()
+            with executor:
+                journal.record(result for _, result in _imap_thermostats(
+                    executor,
+                    partial(_calc_epa_func_with_id, result_store=result_store),
+                    [thermostat for thermostat in thermostats_list
+                     if thermostat.thermostat_id not in journaled_ids],
+                    shared_memory=shared_memory))
+            outputs = journal.items()
+        return _order_metrics(outputs, thermostat_ids, result_format)
+
+    with executor:
+        results = _in_order(_imap_thermostats(
+            executor,
+            partial(_calc_epa_func, columnar=result_format != "list", result_store=result_store),
+            thermostats_list, shared_memory=shared_memory), len(thermostats_list))
+
+    # Results are put back in the order of the thermostats.
+    outputs = list(zip(thermostat_ids, results))
+
+    return _order_metrics(outputs, thermostat_ids, result_format)
+
+
+def _import_and_calc_epa_func(metadata, columnar=False, result_store=None, **kwargs):
+    """ Imports a single thermostat and runs the
+    calculate_epa_field_savings_metrics method on it in the same process,
+    so the thermostat itself never has to be sent between processes.
+
+    Parameters
+    ----------
+    metadata : tuple
+        (index, row) of the thermostat metadata.
+    columnar : boolean
+        Set to True to collect the metrics in a
+        :code:`thermostat.exporters.MetricsTable`.
+    result_store : thermostat.results.ResultStore
+        As for :code:`_calc_epa_func`.
+    **kwargs
+        Passed to :code:`thermostat.importers.multiprocess_func`.
+
+    Returns
+    -------
+    results : (thermostat_id, list of dict or MetricsTable) or None
+        The thermostat id and its metrics, or None if the thermostat could
+        not be imported.
+    """
+    thermostat = importers.multiprocess_func(metadata, **kwargs)
+    if thermostat is None:
+        return None
+    return thermostat.thermostat_id, _calc_epa_func(thermostat, columnar, result_store)
+
+
+def multiple_thermostat_calculate_epa_field_savings_metrics_from_csv(
+        metadata_filename, verbose=False, save_cache=False, cache_path=None,
+        fast_csv=False, processes=None, result_format="list", result_store=None,
+        checkpoint=None, resume=False, executor=None):
+    """ Imports thermostats and calculates their metrics in a single pool.
+    Each worker reads the interval data, fetches weather, builds the
+    thermostat and runs calculate_epa_field_savings_metrics, and only the
+    metrics are sent back, rather than round-tripping each thermostat
+    through the parent as :code:`from_csv` followed by
+    :code:`multiple_thermostat_calculate_epa_field_savings_metrics` does.
+
+    Parameters
+    ----------
+    metadata_filename : str
+        Path to a file containing the thermostat metadata, as for
+        :code:`thermostat.importers.from_csv`, or to a Parquet dataset
+        directory as for :code:`thermostat.importers.from_parquet`.
+    verbose : boolean
+        Set to True to output a more detailed log of import activity.
+    save_cache: boolean
+        Set to True to save the cached data to a json file (based on Thermostat ID).
+    cache_path: str
+        Directory path to save the cached data
+    fast_csv: boolean
+        Set to True to use the fast columnar reader for the interval data.
+    processes : int
+        Number of worker processes, or threads of a :code:`"thread"`
+        executor. Defaults to :code:`thermostat.importers.AVAILABLE_PROCESSES`,
+        since every worker may fetch weather data.
+    result_format : {"list", "dataframe", "arrow"}, default: "list"
+        As for :code:`multiple_thermostat_calculate_epa_field_savings_metrics`.
+    result_store : thermostat.results.ResultStore or str
+        As for :code:`multiple_thermostat_calculate_epa_field_savings_metrics`.
+    checkpoint : str
+        As for :code:`multiple_thermostat_calculate_epa_field_savings_metrics`.
+    resume : boolean
+        As for :code:`multiple_thermostat_calculate_epa_field_savings_metrics`.
+        Thermostats which could not be imported are not journaled, so they
+        are tried again.
+    executor : str or executor
+        As for :code:`multiple_thermostat_calculate_epa_field_savings_metrics`.
+        Defaults to a process pool of :code:`processes` processes.
+
+    Returns
+    -------
+    metrics : list, pd.DataFrame or pyarrow.Table
+        Returns the metrics calculated for the thermostats, in the
+        order of the metadata.
+    """
+    _check_result_format(result_format)
+    result_store = _get_result_store(result_store)
+    importers.__prime_eeweather_cache()
+
+    if os.path.isdir(metadata_filename):
+        metadata_filename = os.path.join(metadata_filename, importers.PARQUET_METADATA_FILENAME)
+        metadata = pd.read_parquet(metadata_filename)
+    else:
+        metadata = importers._read_metadata_csv(metadata_filename)
+
+    if processes is None:
+        processes = importers.AVAILABLE_PROCESSES
+
+    import_and_calc_epa_func = partial(
+        _import_and_calc_epa_func,
+        result_store=result_store,
+        metadata_filename=metadata_filename,
+        verbose=verbose,
+        save_cache=save_cache,
+        cache_path=cache_path,
+        fast_csv=fast_csv)
+
+    executor = get_executor(executor, processes)
+
+    if checkpoint is not None:
+        with MetricsJournal(checkpoint, resume=resume) as journal, weather_cache_directory():
+            pending = list(metadata[~metadata.thermostat_id.isin(journal.thermostat_ids())].iterrows())
+            costs = [_metadata_cost(row, metadata_filename) for row in pending]
+            with executor:
+                journal.record(result for _, result in _imap_scheduled(
+                    executor, import_and_calc_epa_func, pending, costs))
+            outputs = journal.items()
+    else:
+        rows = list(metadata.iterrows())
+        costs = [_metadata_cost(row, metadata_filename) for row in rows]
+        with weather_cache_directory(), executor:
+            results = _in_order(_imap_scheduled(
+                executor, partial(import_and_calc_epa_func, columnar=result_format != "list"),
+                rows, costs), len(rows))
+
+        # Thermostats which could not be imported return None so remove those.
+        outputs = [output for output in results if output is not None]
+    importers._log_missing_thermostats(
+        metadata, [thermostat_id for thermostat_id, _ in outputs])
+
+    return _order_metrics(outputs, list(metadata.thermostat_id), result_format)
+
+
+def _order_metrics(outputs, thermostat_ids, result_format="list"):
+    """ Flattens per-thermostat metrics into a single list in the order of
+    the given thermostat ids, counting duplicate thermostat IDs once.
+
+    Parameters
+    ----------
+    outputs : list of (thermostat_id, list of dict or MetricsTable)
+        Metrics for each thermostat, in any order.
+    thermostat_ids : list
+        Thermostat ids in the order the metrics should be returned.
+    result_format : {"list", "dataframe", "arrow"}, default: "list"
+        Return a list of dicts, or collect the metrics in a
+        :code:`thermostat.exporters.MetricsTable` and return a DataFrame or
+        pyarrow Table.
+
+    Returns
+    -------
+    metrics : list, pd.DataFrame or pyarrow.Table
+        Returns the metrics calculated for the thermostats
+    """
+    metrics_dict = {}
+    for thermostat_id, output in outputs:
+        metrics_dict[thermostat_id] = output
+
+    if result_format == "list":
+        metrics = []
+    else:
+        metrics = MetricsTable(capacity=sum(len(output) for output in metrics_dict.values()))
+
     for thermostat_id in thermostat_ids:
         try:
-            for metric in metrics_dict[thermostat_id]:
-                metrics.append(metric)
+            metrics.extend(metrics_dict[thermostat_id])
             # Prevent duplicate thermostat IDs from being double-counted
             metrics_dict.pop(thermostat_id, None)
         # Trap for missing keys
         except KeyError:
             pass
 
+    if result_format == "dataframe":
+        return metrics.to_dataframe()
+    if result_format == "arrow":
+        return metrics.to_arrow()
     return metrics
+
+
+def multiple_thermostat_get_demand(thermostats, core_day_sets, method):
+    """ Fits cooling or heating demand for many thermostats together in a
+    single batch, rather than one thermostat at a time.
+
+    Parameters
+    ----------
+    thermostats : list of thermostat.core.Thermostat
+        Thermostats to fit.
+    core_day_sets : list of thermostat.core.CoreDaySet
+        Core day set to fit for each thermostat.
+    method : {"cooling", "heating"}
+        Which demand to fit.
+
+    Returns
+    -------
+    demands : list of tuple
+        One tuple per thermostat with the same fields as returned by
+        :code:`Thermostat.get_cooling_demand` and
+        :code:`Thermostat.get_heating_demand`.
+    """
+    return fit_demands([
+        thermostat.get_demand_inputs(core_day_set, method)
+        for thermostat, core_day_set in zip(thermostats, core_day_sets)], method)
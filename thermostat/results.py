@@ -0,0 +1,319 @@
+""" Content-addressed storage of thermostat metrics.
+
+A result store is a directory of JSON files, one per computed thermostat,
+named by a key which hashes everything the metrics depend on:
+
+- the thermostat's identifiers and equipment type,
+- the values and index of each of its time series, including the outdoor
+  temperatures of its weather station,
+- :code:`thermostat.get_version()`,
+- the method arguments of :code:`calculate_epa_field_savings_metrics`,
+  including the contents of a climate zone mapping file.
+
+A thermostat whose interval data and weather are unchanged between runs
+therefore maps to the same key, and its metrics are read back rather than
+recalculated. Changed thermostats get a new key; stale entries are never
+read again and can be removed with :code:`ResultStore.prune`.
+
+A :code:`MetricsJournal` instead records the metrics of a single run as
+each thermostat finishes, so that an interrupted run can be resumed.
+"""
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import tempfile
+
+import numpy as np
+
+from thermostat import get_version
+from thermostat.core import Thermostat
+from thermostat.store import SERIES_NAMES
+
+_METHOD_SIGNATURE = inspect.signature(Thermostat.calculate_epa_field_savings_metrics)
+
+
+def _json_default(value):
+    # Metrics may hold numpy scalars.
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError("Object of type {} is not JSON serializable".format(type(value).__name__))
+
+
+def method_arguments(**kwargs):
+    """ Normalizes arguments of :code:`calculate_epa_field_savings_metrics`
+    so that omitted and explicitly given default values hash the same.
+
+    Parameters
+    ----------
+    **kwargs
+        Arguments to :code:`calculate_epa_field_savings_metrics`, other than
+        :code:`metrics_table`.
+
+    Returns
+    -------
+    arguments : dict
+        Every method argument, by name. A climate zone mapping given as a
+        filename is replaced by a hash of the file contents.
+    """
+    bound = _METHOD_SIGNATURE.bind(None, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    del arguments["self"]
+    arguments.pop("metrics_table", None)
+
+    climate_zone_mapping = arguments.get("climate_zone_mapping")
+    if climate_zone_mapping is not None:
+        if not isinstance(climate_zone_mapping, str):
+            raise TypeError("Only a climate zone mapping filename can be stored.")
+        with open(climate_zone_mapping, "rb") as f:
+            arguments["climate_zone_mapping"] = hashlib.sha256(f.read()).hexdigest()
+    return arguments
+
+
+def thermostat_digest(thermostat):
+    """ Hashes the data of a thermostat which its metrics depend on.
+
+    Parameters
+    ----------
+    thermostat : thermostat.core.Thermostat
+        Thermostat to hash.
+
+    Returns
+    -------
+    digest : hashlib.sha256
+        Hash object, which may be updated further.
+    """
+    digest = hashlib.sha256()
+    header = [str(thermostat.thermostat_id), int(thermostat.equipment_type),
+              str(thermostat.zipcode), str(thermostat.station)]
+    digest.update(json.dumps(header).encode("utf-8"))
+    for name in SERIES_NAMES:
+        series = getattr(thermostat, name)
+        if series is None:
+            digest.update(b"\0none")
+            continue
+        values = np.ascontiguousarray(series.values)
+        index = np.ascontiguousarray(series.index.asi8)
+        digest.update("\0{}:{}:{}:{}".format(name, values.dtype.str, len(values), series.index.tz).encode("utf-8"))
+        digest.update(values.tobytes())
+        digest.update(index.tobytes())
+    return digest
+
+
+def metrics_key(thermostat, **kwargs):
+    """ Computes the result store key of a thermostat's metrics.
+
+    Parameters
+    ----------
+    thermostat : thermostat.core.Thermostat
+        Thermostat whose metrics are stored.
+    **kwargs
+        Arguments to :code:`calculate_epa_field_savings_metrics`.
+
+    Returns
+    -------
+    key : str
+        Hexadecimal SHA-256 key.
+    """
+    digest = thermostat_digest(thermostat)
+    digest.update(json.dumps([get_version(), method_arguments(**kwargs)], sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultStore(object):
+    """ A directory of thermostat metrics keyed by :code:`metrics_key`.
+
+    Entries are written atomically, so several processes may share a store.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the store, created if it does not exist.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def __repr__(self):
+        return "ResultStore({!r})".format(self.path)
+
+    def _filename(self, key):
+        return os.path.join(self.path, "{}.json".format(key))
+
+    def __contains__(self, key):
+        return os.path.exists(self._filename(key))
+
+    def keys(self):
+        """ Lists the keys of all stored results. """
+        return [filename[:-len(".json")] for filename in os.listdir(self.path)
+                if filename.endswith(".json")]
+
+    def get(self, key):
+        """ Reads stored metrics.
+
+        Parameters
+        ----------
+        key : str
+            Key as returned by :code:`metrics_key`.
+
+        Returns
+        -------
+        metrics : list of dict or None
+            The stored metrics, or None if there are none for the key.
+        """
+        try:
+            with open(self._filename(key)) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def put(self, key, metrics):
+        """ Stores metrics under a key, replacing any stored before.
+
+        Parameters
+        ----------
+        key : str
+            Key as returned by :code:`metrics_key`.
+        metrics : list of dict
+            Metrics as returned by :code:`calculate_epa_field_savings_metrics`.
+        """
+        fd, temp_filename = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(metrics, f, default=_json_default)
+            os.replace(temp_filename, self._filename(key))
+        except BaseException:
+            os.remove(temp_filename)
+            raise
+
+    def prune(self, keys):
+        """ Removes stored results other than the given ones.
+
+        Parameters
+        ----------
+        keys : iterable of str
+            Keys to keep, e.g. those of the latest run.
+
+        Returns
+        -------
+        removed : int
+            Number of results removed.
+        """
+        keys = set(keys)
+        removed = 0
+        for key in self.keys():
+            if key not in keys:
+                os.remove(self._filename(key))
+                removed += 1
+        return removed
+
+    def calculate_epa_field_savings_metrics(self, thermostat, **kwargs):
+        """ Returns the stored metrics of a thermostat, calculating and
+        storing them first if its data or the arguments changed.
+
+        Parameters
+        ----------
+        thermostat : thermostat.core.Thermostat
+            Thermostat to calculate metrics for.
+        **kwargs
+            Arguments to :code:`calculate_epa_field_savings_metrics`, other
+            than :code:`metrics_table`.
+
+        Returns
+        -------
+        metrics : list of dict
+            As returned by :code:`calculate_epa_field_savings_metrics`.
+        """
+        key = metrics_key(thermostat, **kwargs)
+        metrics = self.get(key)
+        if metrics is None:
+            metrics = thermostat.calculate_epa_field_savings_metrics(**kwargs)
+            self.put(key, metrics)
+        return metrics
+
+
+class MetricsJournal(object):
+    """ An append-only SQLite journal of the metrics of completed
+    thermostats, used to checkpoint long runs.
+
+    Each thermostat's metrics are committed as soon as they are recorded,
+    so a run which is interrupted loses at most the thermostats which were
+    still being calculated.
+
+    Parameters
+    ----------
+    path : str
+        Path of the journal database, created if it does not exist.
+    resume : boolean
+        Set to True to keep the thermostats already journaled. Otherwise the
+        journal is cleared.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS metrics "
+                "(sequence INTEGER PRIMARY KEY, thermostat_id, metrics TEXT)")
+            if not resume:
+                self.connection.execute("DELETE FROM metrics")
+
+    def __repr__(self):
+        return "MetricsJournal({!r})".format(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def thermostat_ids(self):
+        """ Returns the set of journaled thermostat ids. """
+        return set(row[0] for row in self.connection.execute(
+            "SELECT DISTINCT thermostat_id FROM metrics"))
+
+    def append(self, thermostat_id, metrics):
+        """ Journals the metrics of a thermostat.
+
+        Parameters
+        ----------
+        thermostat_id : str or int
+            Id of the thermostat.
+        metrics : list of dict
+            Metrics as returned by :code:`calculate_epa_field_savings_metrics`.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO metrics (thermostat_id, metrics) VALUES (?, ?)",
+                (thermostat_id, json.dumps(metrics, default=_json_default)))
+
+    def record(self, outputs):
+        """ Journals (thermostat_id, metrics) pairs as they are produced,
+        skipping None.
+
+        Parameters
+        ----------
+        outputs : iterable of (str, list of dict) or None
+            Metrics of each thermostat, e.g. from a pool.
+        """
+        for output in outputs:
+            if output is not None:
+                self.append(*output)
+
+    def items(self):
+        """ Reads back every journaled thermostat.
+
+        Returns
+        -------
+        outputs : list of (str, list of dict)
+            Thermostat id and metrics, in the order they were journaled.
+        """
+        return [(thermostat_id, json.loads(metrics)) for thermostat_id, metrics in self.connection.execute(
+            "SELECT thermostat_id, metrics FROM metrics ORDER BY sequence")]
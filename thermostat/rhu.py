@@ -0,0 +1,119 @@
+import numpy as np
+
+# Daily runtimes summed into each temperature bin, in this order.
+RHU_RUNTIMES = ("heat_runtime", "aux_runtime", "emg_runtime", "total_minutes")
+
+RHU_DTYPE = np.dtype(
+    [("low", float), ("high", float)] +
+    [(name, float) for name in RHU_RUNTIMES] +
+    [("rhu", float), ("total_runtime", float),
+     ("aux_duty_cycle", float), ("emg_duty_cycle", float), ("compressor_duty_cycle", float),
+     ("data_is_nonsense", bool)])
+
+
+def digitize_bins(temperature, bin_schemes):
+    """ Assigns each day to a temperature bin of every bin scheme, numbering
+    the bins of all schemes consecutively.
+
+    Bins are closed on the right, as with :code:`pandas.cut`.
+
+    Parameters
+    ----------
+    temperature : np.ndarray
+        Daily outdoor temperature.
+    bin_schemes : list of list of float
+        Bin edges of each scheme, ascending.
+
+    Returns
+    -------
+    bin_index : np.ndarray
+        Array of shape (n_schemes, n_days) holding the bin of each day, or
+        -1 for days outside the scheme's edges or without a temperature.
+    low, high : np.ndarray
+        Left and right edge of each bin.
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    bin_index = np.empty((len(bin_schemes), len(temperature)), dtype=np.intp)
+    lows, highs = [], []
+    offset = 0
+    for scheme, edges in enumerate(bin_schemes):
+        edges = np.asarray(edges, dtype=float)
+        # nan is placed after the last edge, so it falls outside every bin.
+        index = np.digitize(temperature, edges, right=True)
+        inside = (index > 0) & (index < len(edges))
+        bin_index[scheme] = np.where(inside, index - 1 + offset, -1)
+        lows.append(edges[:-1])
+        highs.append(edges[1:])
+        offset += len(edges) - 1
+    return bin_index, np.concatenate(lows), np.concatenate(highs)
+
+
+def resistance_heat_utilization_bins(runtimes, temperature, bin_schemes, min_runtime_minutes=(None,)):
+    """ Calculates resistance heat utilization (RHU) and duty cycles in
+    temperature bins for several bin schemes and RHU types in one pass.
+
+    Daily runtimes are summed into the bins of every scheme with a single
+    :code:`np.bincount`. RHU types only differ in which bins are treated
+    as not having run, so they share the sums.
+
+    Parameters
+    ----------
+    runtimes : np.ndarray
+        Array of shape (4, n_days) holding daily heat, auxiliary and
+        emergency runtime and total minutes, in the order of
+        :code:`RHU_RUNTIMES`. Null runtimes count as zero.
+    temperature : np.ndarray
+        Daily outdoor temperature.
+    bin_schemes : list of list of float
+        Bin edges of each scheme, ascending.
+    min_runtime_minutes : tuple
+        One entry per RHU type. Bins with a total runtime below the entry,
+        if it is set, are treated as the thermostat not having run.
+
+    Returns
+    -------
+    rhu : np.ndarray
+        Structured array of dtype :code:`RHU_DTYPE` and shape
+        (n_rhu_types, n_bins), with the bins of each scheme in order.
+        RHU is null in bins where auxiliary runtime exceeds heat runtime,
+        which are flagged in :code:`data_is_nonsense`.
+    """
+    runtimes = np.asarray(runtimes, dtype=float)
+    n_runtimes = len(RHU_RUNTIMES)
+    bin_index, low, high = digitize_bins(temperature, bin_schemes)
+    n_bins = len(low)
+
+    # One key per (runtime, bin) over the days of every scheme.
+    binned = bin_index >= 0
+    day = np.nonzero(binned)[1]
+    keys = np.arange(n_runtimes)[:, np.newaxis] * n_bins + bin_index[binned]
+    weights = np.nan_to_num(runtimes[:, day], nan=0.0)
+    sums = np.bincount(keys.ravel(), weights=weights.ravel(), minlength=n_runtimes * n_bins)
+    heat_runtime, aux_runtime, emg_runtime, total_minutes = sums.reshape((n_runtimes, n_bins))
+
+    rhu = np.zeros((len(min_runtime_minutes), n_bins), dtype=RHU_DTYPE)
+    rhu["low"] = low
+    rhu["high"] = high
+    for name, values in zip(RHU_RUNTIMES, (heat_runtime, aux_runtime, emg_runtime, total_minutes)):
+        rhu[name] = values
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rhu["rhu"] = (aux_runtime + emg_runtime) / (heat_runtime + emg_runtime)
+        # Currently treating aux_runtime as separate from heat_runtime
+        rhu["total_runtime"] = heat_runtime + aux_runtime + emg_runtime
+        # Changed to use the number of minutes per eligible day
+        rhu["aux_duty_cycle"] = aux_runtime / total_minutes
+        rhu["emg_duty_cycle"] = emg_runtime / total_minutes
+        rhu["compressor_duty_cycle"] = heat_runtime / total_minutes
+
+    # If given a minimum runtime (RHU2) then treat the thermostat as not having run during that period
+    for row, min_runtime in enumerate(min_runtime_minutes):
+        if min_runtime:
+            not_run = rhu["total_runtime"][row] < min_runtime
+            for name in ("rhu", "aux_duty_cycle", "emg_duty_cycle",
+                         "compressor_duty_cycle", "total_runtime"):
+                rhu[name][row, not_run] = np.nan
+
+    rhu["data_is_nonsense"] = aux_runtime > heat_runtime
+    rhu["rhu"][rhu["data_is_nonsense"]] = np.nan
+    return rhu
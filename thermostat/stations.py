@@ -1,8 +1,18 @@
+import argparse
 import logging
 import json
+import os
+import tempfile
 from pkg_resources import resource_stream
+
+import numpy as np
+import pandas as pd
+import pyproj
+from scipy.spatial import cKDTree
+from eeweather.ranking import cached_data
 from eeweather import (
         get_isd_file_metadata,
+        get_zcta_ids,
         zcta_to_lat_long,
         rank_stations,
         select_station)
@@ -19,6 +29,24 @@ zipcode_usaf = json.loads(zipcode_usaf_json)
 # Sort order for rough_quality (returned by eeweather).
 QUALITY_SORT = {'high': 0, 'medium': 1, 'low': 2}
 
+# Environment variable naming a station table written by
+# write_station_table, which is loaded on the first station lookup.
+STATION_TABLE_VARIABLE = "EPATHERMOSTAT_STATION_TABLE"
+
+# Mean radius of the earth, used to place stations on a sphere for the
+# spatial index.
+EARTH_RADIUS_METERS = 6371008.8
+
+# Great-circle distances on that sphere are within 0.6% of the WGS84
+# geodesic distances used by eeweather; searches are widened by this factor
+# so no station which is nearer on the ellipsoid is missed.
+GEODESIC_TOLERANCE = 1.02
+
+# Stations resolved in this process (or loaded from a station table), by
+# zipcode.
+_resolved_stations = {}
+_station_table_loaded = False
+
 
 def _rank_stations_by_distance_and_quality(lat, lon):
     """ Ranks the stations by distance and quality based on latitude / longitude
@@ -41,6 +69,138 @@ def _rank_stations_by_distance_and_quality(lat, lon):
     return station_ranking
 
 
+def _to_cartesian(lat, lon):
+    lat = np.radians(lat)
+    lon = np.radians(lon)
+    return np.column_stack([
+        np.cos(lat) * np.cos(lon),
+        np.cos(lat) * np.sin(lon),
+        np.sin(lat),
+    ]) * EARTH_RADIUS_METERS
+
+
+class StationIndex(object):
+    """ A KD-tree of ISD station locations, with the rough quality of each
+    station and whether it is skipped for beginning with 'A'.
+
+    :code:`rank_stations` answers a ranking query by visiting only the
+    nearest stations, instead of computing and sorting the distance to
+    every station as :code:`eeweather.rank_stations` does.
+
+    Parameters
+    ----------
+    station_metadata : pandas.DataFrame, optional
+        Station metadata indexed by USAF ID, with :code:`latitude`,
+        :code:`longitude` and :code:`rough_quality` columns. Defaults to the
+        metadata eeweather ranks.
+    """
+
+    def __init__(self, station_metadata=None):
+        if station_metadata is None:
+            station_metadata = cached_data.all_station_metadata
+        located = station_metadata[
+            station_metadata.latitude.notnull() & station_metadata.longitude.notnull()]
+
+        self.usaf_ids = located.index.values
+        self.latitude = located.latitude.values.astype(float)
+        self.longitude = located.longitude.values.astype(float)
+        self.rough_quality = located.rough_quality.values
+        self.enumerated_quality = located.rough_quality.map(QUALITY_SORT).values.astype(float)
+        self.excluded = np.array([str(usaf_id)[0] == 'A' for usaf_id in self.usaf_ids], dtype=bool)
+        self.tree = cKDTree(_to_cartesian(self.latitude, self.longitude))
+        self.geod = pyproj.Geod(ellps="WGS84")
+
+    def _distances(self, lat, lon, indices):
+        return self.geod.inv(
+            np.full(len(indices), lon), np.full(len(indices), lat),
+            self.longitude[indices], self.latitude[indices])[2]
+
+    def rank_stations(self, lat, lon, k=8):
+        """ Ranks the stations nearest to a location by distance and quality.
+
+        Parameters
+        ----------
+        lat : float
+            latitude for the search
+        lon : float
+            longitude for the search
+        k : int
+            Number of stations to look at first; more are looked at if
+            they are all skipped.
+
+        Returns
+        -------
+        station_ranking : Pandas.DataFrame or None
+            The first rows of the ranking made by
+            :code:`_rank_stations_by_distance_and_quality`, up to at least
+            the first station not beginning with 'A'. None if there is no
+            such station, or if stations tied in distance and quality come
+            before it, whose order only the full ranking decides.
+        """
+        point = _to_cartesian(lat, lon)[0]
+        n_stations = len(self.usaf_ids)
+        k = min(k, n_stations)
+        while True:
+            _, indices = self.tree.query(point, k=k)
+            indices = np.atleast_1d(indices)
+            eligible = ~self.excluded[indices]
+            if eligible.any() or k == n_stations:
+                break
+            k = min(2 * k, n_stations)
+        if not eligible.any():
+            return None
+
+        # Every station at most as far as the nearest eligible one on the
+        # ellipsoid, which may come before it in the ranking.
+        nearest = self._distances(lat, lon, indices[eligible]).min()
+        angle = nearest * GEODESIC_TOLERANCE / EARTH_RADIUS_METERS
+        radius = 2 * EARTH_RADIUS_METERS * np.sin(min(angle, np.pi) / 2) + 1.0
+        indices = np.sort(self.tree.query_ball_point(point, radius))
+
+        distances = self._distances(lat, lon, indices)
+        order = np.lexsort((self.enumerated_quality[indices], distances))
+        indices = indices[order]
+        distances = distances[order]
+        quality = self.enumerated_quality[indices]
+
+        # eeweather orders stations at exactly the same distance (stations
+        # sharing coordinates) by an unstable sort over every station, so
+        # if such a tie comes before the selected station the full ranking
+        # is needed to select the same one.
+        selected = np.argmax(~self.excluded[indices])
+        n_ranked = selected + 1
+        while (n_ranked < len(indices) and distances[n_ranked] == distances[selected]
+               and quality[n_ranked] == quality[selected]):
+            n_ranked += 1
+        same_as_next = (distances[1:n_ranked] == distances[:n_ranked - 1]) & \
+            ((quality[1:n_ranked] == quality[:n_ranked - 1]) |
+             (np.isnan(quality[1:n_ranked]) & np.isnan(quality[:n_ranked - 1])))
+        if same_as_next.any():
+            return None
+        station_ranking = pd.DataFrame({
+            "rank": np.arange(1, len(indices) + 1),
+            "distance_meters": distances,
+            "latitude": self.latitude[indices],
+            "longitude": self.longitude[indices],
+            "rough_quality": self.rough_quality[indices],
+            "enumerated_quality": quality,
+        }, index=pd.Index(self.usaf_ids[indices], name="usaf_id"))
+        return station_ranking
+
+
+_station_index = None
+
+
+def get_station_index():
+    """ Returns the :code:`StationIndex` of this process, building it on
+    first use.
+    """
+    global _station_index
+    if _station_index is None:
+        _station_index = StationIndex()
+    return _station_index
+
+
 def _get_closest_station_by_zcta_ranked(zcta):
     """ Selects the nth ranked station from a list of ranked stations
 
@@ -63,11 +223,13 @@ def _get_closest_station_by_zcta_ranked(zcta):
 
     zcta = zcta.zfill(5)  # Ensure that we have 5 characters, and if not left-pad it with zeroes.
     lat, lon = zcta_to_lat_long(zcta)
+    station_ranking = get_station_index().rank_stations(lat, lon)
+    if station_ranking is None:
+        station_ranking = _rank_stations_by_distance_and_quality(lat, lon)
     finding_station = True
     rank = 0
     while finding_station:
         rank = rank + 1
-        station_ranking = _rank_stations_by_distance_and_quality(lat, lon)
         station, warnings = select_station(station_ranking, rank=rank)
 
         # Ignore stations that begin with A
@@ -97,6 +259,10 @@ def get_closest_station_by_zipcode(zipcode):
 
     7. If the station is over 50,000 meters from the ZCTA location then we log a warning message and revert to the backup method.
 
+    The station of each zipcode is resolved once per process (see
+    :code:`resolve_station`), and the messages are logged again on later
+    lookups.
+
     Parameters
     ----------
     zipcode : string
@@ -108,34 +274,78 @@ def get_closest_station_by_zipcode(zipcode):
         Station that maps to the specified zipcode / ZCTA
     """
 
+    resolution = resolve_station(zipcode)
+    for level, message in resolution["messages"]:
+        logging.log(level, message)
+    return resolution["station"]
+
+
+def resolve_station(zipcode):
+    """ Resolves the station of a zipcode as :code:`get_closest_station_by_zipcode`
+    does, without logging. Each zipcode is resolved once per process, or
+    read from the station table named by :code:`EPATHERMOSTAT_STATION_TABLE`
+    (see :code:`write_station_table`) if it covers the zipcode.
+
+    Parameters
+    ----------
+    zipcode : string
+        zipcode / ZCTA to look up
+
+    Returns
+    -------
+    resolution : dict
+        :code:`station` (string or None), :code:`lat` and :code:`lon` of the
+        ZCTA (None if it is unrecognized), and :code:`messages`, the
+        :code:`[level, message]` pairs logged for this zipcode.
+    """
+    global _station_table_loaded
+    if not _station_table_loaded:
+        _station_table_loaded = True
+        table_filename = os.environ.get(STATION_TABLE_VARIABLE)
+        if table_filename:
+            load_station_table(table_filename)
+
+    resolution = _resolved_stations.get(zipcode)
+    if resolution is None:
+        resolution = _resolve_station(zipcode)
+        _resolved_stations[zipcode] = resolution
+    return resolution
+
+
+def _resolve_station(zipcode):
+    messages = []
+
+    def resolved(station, lat=None, lon=None):
+        return {"station": station, "lat": lat, "lon": lon, "messages": messages}
+
     station_lookup_method_by_zipcode = lookup_usaf_station_by_zipcode(zipcode)
     try:
         station, warnings, lat, lon = _get_closest_station_by_zcta_ranked(zipcode)
 
         isd_metadata = get_isd_file_metadata(str(station))
         if len(isd_metadata) == 0:
-            logging.warning("Zipcode %s mapped to station %s, but no ISD metadata was found." % (zipcode, station))
-            return station_lookup_method_by_zipcode
+            messages.append([logging.WARNING, "Zipcode %s mapped to station %s, but no ISD metadata was found." % (zipcode, station)])
+            return resolved(station_lookup_method_by_zipcode, lat, lon)
 
     except UnrecognizedUSAFIDError as e:
-        logging.warning("Closest station %s is not a recognized station. Using backup-method station %s for zipcode %s instead." % (
+        messages.append([logging.WARNING, "Closest station %s is not a recognized station. Using backup-method station %s for zipcode %s instead." % (
             str(station),
             station_lookup_method_by_zipcode,
-            zipcode))
-        return station_lookup_method_by_zipcode
+            zipcode)])
+        return resolved(station_lookup_method_by_zipcode, lat, lon)
 
     except UnrecognizedZCTAError as e:
-        logging.warning("Unrecognized ZCTA %s" % e)
-        return None
+        messages.append([logging.WARNING, "Unrecognized ZCTA %s" % e])
+        return resolved(None)
 
     if str(station) != station_lookup_method_by_zipcode:
-        logging.debug("Previously would have selected station %s instead of %s for zip code %s" % (
+        messages.append([logging.DEBUG, "Previously would have selected station %s instead of %s for zip code %s" % (
             station_lookup_method_by_zipcode,
             str(station),
-            zipcode))
+            zipcode)])
 
     if warnings:
-        logging.warning("Station %s is %d meters over maximum %d meters (%d meters) (zip code %s is at lat/lon %f, %f)" % (
+        messages.append([logging.WARNING, "Station %s is %d meters over maximum %d meters (%d meters) (zip code %s is at lat/lon %f, %f)" % (
             str(station),
             int(warnings[0].data['distance_meters'] - warnings[0].data['max_distance_meters']),
             int(warnings[0].data['max_distance_meters']),
@@ -143,13 +353,71 @@ def get_closest_station_by_zipcode(zipcode):
             zipcode,
             lat,
             lon,
-            ))
-        logging.warning("Closest station %s is too far. Using backup-method station %s instead." % (
+            )])
+        messages.append([logging.WARNING, "Closest station %s is too far. Using backup-method station %s instead." % (
             str(station),
-            station_lookup_method_by_zipcode))
-        return station_lookup_method_by_zipcode
+            station_lookup_method_by_zipcode)])
+        return resolved(station_lookup_method_by_zipcode, lat, lon)
+
+    return resolved(str(station), lat, lon)
 
-    return str(station)
+
+def write_station_table(table_filename, zipcodes=None):
+    """ Resolves the stations of many zipcodes and writes them to a JSON
+    station table. Pointing :code:`EPATHERMOSTAT_STATION_TABLE` at the table
+    (or calling :code:`load_station_table`) turns station lookups for those
+    zipcodes into dictionary lookups.
+
+    Parameters
+    ----------
+    table_filename : str
+        Path of the table to write.
+    zipcodes : iterable of str, optional
+        Zipcodes to resolve. Defaults to every ZCTA known to eeweather.
+
+    Returns
+    -------
+    n_zipcodes : int
+        Number of zipcodes in the table.
+    """
+    if zipcodes is None:
+        zipcodes = get_zcta_ids()
+
+    table = {}
+    for i, zipcode in enumerate(zipcodes):
+        table[zipcode] = resolve_station(zipcode)
+        if (i + 1) % 1000 == 0:
+            logging.info("Resolved stations for %d zipcodes" % (i + 1))
+
+    # Written under a temporary name and renamed, so a reader never sees a
+    # partial table.
+    directory = os.path.dirname(os.path.abspath(table_filename))
+    fd, temporary_filename = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(table, f)
+    os.replace(temporary_filename, table_filename)
+    return len(table)
+
+
+def load_station_table(table_filename):
+    """ Loads a station table written by :code:`write_station_table`, so the
+    stations of the zipcodes it covers are not resolved again in this
+    process.
+
+    Parameters
+    ----------
+    table_filename : str
+        Path of the table to load.
+
+    Returns
+    -------
+    n_zipcodes : int
+        Number of zipcodes in the table.
+    """
+    with open(table_filename) as f:
+        table = json.load(f)
+    _resolved_stations.update(table)
+    return len(table)
 
 
 def lookup_usaf_station_by_zipcode(zipcode):
@@ -170,3 +438,19 @@ def lookup_usaf_station_by_zipcode(zipcode):
 
     usaf = zipcode_usaf.get(zipcode, None)
     return usaf
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Precompute the weather station of every ZCTA (or of the given zipcodes).")
+    parser.add_argument("table_filename", help="Path of the JSON station table to write.")
+    parser.add_argument("zipcodes", nargs="*", help="Zipcodes to resolve. Defaults to every ZCTA.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    n_zipcodes = write_station_table(args.table_filename, args.zipcodes or None)
+    logging.info("Wrote stations for %d zipcodes to %s" % (n_zipcodes, args.table_filename))
+
+
+if __name__ == "__main__":
+    main()
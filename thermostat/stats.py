@@ -6,6 +6,7 @@ from collections import OrderedDict
 from collections import defaultdict
 from itertools import chain
 from warnings import warn
+import warnings
 import json
 from functools import reduce
 from pkg_resources import resource_stream
@@ -18,6 +19,15 @@ IQR_FILTER_PARAMETER = 1.5
 TOP_ONLY_PERCENTILE_FILTER = .05  # Filters top 5 percent for RHU2 calculation
 UNFILTERED_PERCENTILE = 1 - TOP_ONLY_PERCENTILE_FILTER
 
+# Climate zones summarized separately, in output order, with their labels.
+CLIMATE_ZONE_LABELS = OrderedDict([
+    ("Very-Cold/Cold", "very-cold_cold"),
+    ("Mixed-Humid", "mixed-humid"),
+    ("Mixed-Dry/Hot-Dry", "mixed-dry_hot-dry"),
+    ("Hot-Humid", "hot-humid"),
+    ("Marine", "marine"),
+])
+
 logger = logging.getLogger('epathermostat')
 
 
@@ -495,13 +505,148 @@ def combine_output_dataframes(dfs):
     return pd.concat(dfs, ignore_index=True)
 
 
+class ColumnFilter(object):
+    """ A filter on the rows of a metrics DataFrame which is evaluated a
+    column at a time rather than row by row.
+
+    Filters combine with :code:`&`, also with row filters (functions of
+    :code:`(row, df)` returning a boolean), and can be called as a row
+    filter themselves.
+
+    Parameters
+    ----------
+    mask : callable
+        Takes a DataFrame and returns a boolean array with one entry per
+        row, True for rows which are kept.
+    """
+
+    def __init__(self, mask):
+        self.mask = mask
+
+    def __and__(self, other):
+        return ColumnFilter(lambda df: self.mask(df) & filter_mask(other, df))
+
+    def __call__(self, row, df):
+        return bool(self.mask(df)[df.index.get_loc(row.name)])
+
+
+def filter_mask(row_filter, df):
+    """ Evaluates a filter over every row of a DataFrame.
+
+    Parameters
+    ----------
+    row_filter : ColumnFilter or callable
+        A :code:`ColumnFilter`, or a row filter taking :code:`(row, df)`,
+        which is evaluated row by row.
+    df : pd.DataFrame
+        Rows to filter.
+
+    Returns
+    -------
+    mask : np.ndarray
+        Boolean array, True for rows which are kept.
+    """
+    if len(df) == 0:
+        # As with row filters, nothing is evaluated for an empty DataFrame.
+        mask = []
+    elif isinstance(row_filter, ColumnFilter):
+        mask = row_filter.mask(df)
+    else:
+        mask = [row_filter(row, df) for i, row in df.iterrows()]
+    return np.asarray(mask, dtype=bool).reshape(len(df))
+
+
+def combine_filters(filters):
+    """ Combines filters into a single :code:`ColumnFilter` which keeps the
+    rows kept by every one of them.
+
+    Parameters
+    ----------
+    filters : list of ColumnFilter or callable
+        Filters to combine, as for :code:`filter_mask`.
+
+    Returns
+    -------
+    row_filter : ColumnFilter
+    """
+    return reduce(lambda x, y: x & y, filters, identity_filter())
+
+
+def identity_filter():
+    """ Returns a filter which keeps every row. """
+    return ColumnFilter(lambda df: np.ones(len(df), dtype=bool))
+
+
+def range_filter(column_name, lower_bound=-np.inf, upper_bound=np.inf):
+    """ Returns a filter which keeps rows with
+    :code:`lower_bound < value < upper_bound` in a column. Rows with null
+    values are dropped.
+    """
+    def _mask(df):
+        values = df[column_name].values
+        return (values > lower_bound) & (values < upper_bound)
+    return ColumnFilter(_mask)
+
+
+def percentile_range_filter(column_name, quantile=0.0):
+    """ Returns a filter which keeps rows between the :code:`quantile` and
+    :code:`1 - quantile` quantiles of the non-null values of a column
+    (exclusive). The quantiles are computed once for each DataFrame
+    filtered.
+    """
+    def _mask(df):
+        column = df[column_name].dropna()
+        lower_bound = column.quantile(0.0 + quantile)
+        upper_bound = column.quantile(1.0 - quantile)
+        return range_filter(column_name, lower_bound, upper_bound).mask(df)
+    return ColumnFilter(_mask)
+
+
+def _column_statistics(values):
+    """ Counts, means, standard errors of the mean and quantiles of every
+    column of a block of metrics at once, ignoring nulls.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Array of shape (n_rows, n_columns); null values are nan.
+
+    Returns
+    -------
+    n, mean, sem : np.ndarray
+        One value per column.
+    quantiles : np.ndarray
+        Array of shape (len(QUANTILE), n_columns).
+    """
+    n = np.count_nonzero(~np.isnan(values), axis=0)
+    with warnings.catch_warnings():
+        # Columns without values have null statistics.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(values, axis=0)
+        sem = np.where(n != 0, np.nanstd(values, axis=0) / n ** .5, np.nan)
+        if len(values) > 0:
+            quantiles = np.nanquantile(values, np.array(QUANTILE) / 100., axis=0)
+        else:
+            quantiles = np.full((len(QUANTILE), values.shape[1]), np.nan)
+    return n, mean, sem, quantiles
+
+
+def _add_column_statistics(stats, column_name, suffix, n, mean, sem):
+    mean, sem = float(mean), float(sem)
+    stats["{}_n{}".format(column_name, suffix)] = int(n)
+    stats["{}_upper_bound_95_perc_conf{}".format(column_name, suffix)] = mean + (1.96 * sem)
+    stats["{}_mean{}".format(column_name, suffix)] = mean
+    stats["{}_lower_bound_95_perc_conf{}".format(column_name, suffix)] = mean - (1.96 * sem)
+    stats["{}_sem{}".format(column_name, suffix)] = sem
+
+
 def get_filtered_stats(
         df, row_filter, label, heating_or_cooling, target_columns,
         target_baseline_method):
 
     n_rows_total = df.shape[0]
 
-    filtered_df = df[[row_filter(row, df) for i, row in df.iterrows()]]
+    filtered_df = df[filter_mask(row_filter, df)]
 
     n_rows_kept = filtered_df.shape[0]
     n_rows_discarded = n_rows_total - n_rows_kept
@@ -515,61 +660,43 @@ def get_filtered_stats(
 
     if n_rows_total > 0:
 
-        for column_name in target_columns:
-            column = filtered_df[column_name].replace([np.inf, -np.inf], np.nan).dropna()
-
-            # calculate quantiles and statistics
-            mean = np.nanmean(pd.to_numeric(column))
-
-            if column.count() != 0:
-                sem = np.nanstd(column) / (column.count() ** .5)
-            else:
-                sem = np.nan
-            lower_bound = mean - (1.96 * sem)
-            upper_bound = mean + (1.96 * sem)
-            stats["{}_n".format(column_name)] = column.count()
-            stats["{}_upper_bound_95_perc_conf".format(column_name)] = upper_bound
-            stats["{}_mean".format(column_name)] = mean
-            stats["{}_lower_bound_95_perc_conf".format(column_name)] = lower_bound
-            stats["{}_sem".format(column_name)] = sem
-
-            for quantile in QUANTILE:
-                stats["{}_q{}".format(column_name, quantile)] = column.quantile(quantile / 100.)
-
-            # Calculate IQR for RHU2 and filter outliers
-            if 'rhu2' in column_name:
-                iqr_filter = (column < column.quantile(UNFILTERED_PERCENTILE))
-                if bool(iqr_filter.any()) is False:
-                    iqr_filter = (column == column)
-                    warn("RHU filtering 5% and min Runtime filtering removed entire dataset from statistics summary for bin. Disabling filter.")
-                iqr_filtered_column = column.loc[iqr_filter]
-
+        values = np.asarray(filtered_df[target_columns], dtype=float, order='F')
+        values[np.isinf(values)] = np.nan
+        column_stats = _column_statistics(values)
+
+        # Calculate IQR for RHU2 and filter outliers
+        rhu2_columns = [i for i, column_name in enumerate(target_columns) if 'rhu2' in column_name]
+        iqr_index = {column: i for i, column in enumerate(rhu2_columns)}
+        if rhu2_columns:
+            rhu2_values = values[:, rhu2_columns]
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                upper = np.nanquantile(rhu2_values, UNFILTERED_PERCENTILE, axis=0) \
+                    if len(rhu2_values) else np.full(len(rhu2_columns), np.nan)
+            iqr_filter = rhu2_values < upper
+            unfiltered = ~iqr_filter.any(axis=0)
+            for _ in range(unfiltered.sum()):
+                warn("RHU filtering 5% and min Runtime filtering removed entire dataset from statistics summary for bin. Disabling filter.")
+            iqr_filter[:, unfiltered] = True
+            iqr_stats = _column_statistics(np.where(iqr_filter, rhu2_values, np.nan))
+
+        for i, column_name in enumerate(target_columns):
+            n, mean, sem, quantiles = (stat[..., i] for stat in column_stats)
+            _add_column_statistics(stats, column_name, "", n, mean, sem)
+
+            for quantile, value in zip(QUANTILE, quantiles.tolist()):
+                stats["{}_q{}".format(column_name, quantile)] = value
+
+            if i in iqr_index:
                 # calculate quantiles and statistics for RHU2 IQR (IQFLT) and
                 # non-IQR filtering (NOIQ)
-                iqr_mean = np.nanmean(pd.to_numeric(iqr_filtered_column))
-                iqr_sem = np.nanstd(iqr_filtered_column) / (iqr_filtered_column.count() ** .5)
-                iqr_lower_bound = iqr_mean - (1.96 * iqr_sem)
-                iqr_upper_bound = iqr_mean + (1.96 * iqr_sem)
-
-                noiq_mean = np.nanmean(pd.to_numeric(column))
-                noiq_sem = np.nanstd(column) / (column.count() ** .5)
-                noiq_lower_bound = noiq_mean - (1.96 * noiq_sem)
-                noiq_upper_bound = noiq_mean + (1.96 * noiq_sem)
-
-                stats["{}_n_IQFLT".format(column_name)] = iqr_filtered_column.count()
-                stats["{}_upper_bound_95_perc_conf_IQFLT".format(column_name)] = iqr_upper_bound
-                stats["{}_mean_IQFLT".format(column_name)] = iqr_mean
-                stats["{}_lower_bound_95_perc_conf_IQFLT".format(column_name)] = iqr_lower_bound
-                stats["{}_sem_IQFLT".format(column_name)] = iqr_sem
-                stats["{}_n_NOIQ".format(column_name)] = column.count()
-                stats["{}_upper_bound_95_perc_conf_NOIQ".format(column_name)] = noiq_upper_bound
-                stats["{}_mean_NOIQ".format(column_name)] = noiq_mean
-                stats["{}_lower_bound_95_perc_conf_NOIQ".format(column_name)] = noiq_lower_bound
-                stats["{}_sem_NOIQ".format(column_name)] = noiq_sem
-
-                for quantile in QUANTILE:
-                    stats["{}_q{}_IQFLT".format(column_name, quantile)] = iqr_filtered_column.quantile(quantile / 100.)
-                    stats["{}_q{}_NOIQ".format(column_name, quantile)] = column.quantile(quantile / 100.)
+                iqr_n, iqr_mean, iqr_sem, iqr_quantiles = (stat[..., iqr_index[i]] for stat in iqr_stats)
+                _add_column_statistics(stats, column_name, "_IQFLT", iqr_n, iqr_mean, iqr_sem)
+                _add_column_statistics(stats, column_name, "_NOIQ", n, mean, sem)
+
+                for quantile, iqr_value, value in zip(QUANTILE, iqr_quantiles.tolist(), quantiles.tolist()):
+                    stats["{}_q{}_IQFLT".format(column_name, quantile)] = iqr_value
+                    stats["{}_q{}_NOIQ".format(column_name, quantile)] = value
 
         return [stats]
     else:
@@ -644,185 +771,71 @@ def compute_summary_statistics(
         )
         raise ValueError(message)
 
-    def _identity_filter(row, df):
-        return True
-
-    def _range_filter(row, column_name, heating_or_cooling, lower_bound=-np.inf, upper_bound=np.inf, target_baseline=False):
-        if target_baseline:
-            full_column_selector = "{}_{}".format(column_name, target_baseline_method)
-        else:
-            full_column_selector = column_name
-        column_value = row[full_column_selector]
-        return lower_bound < column_value < upper_bound
-
-    def _percentile_range_filter(row, column_name, heating_or_cooling, df, quantile=0.0, target_baseline=False):
+    def _column_selector(column_name, target_baseline=False):
         if target_baseline:
-            full_column_selector = "{}_{}".format(column_name, target_baseline_method)
-        else:
-            full_column_selector = column_name
-        lower_bound = df[full_column_selector].dropna().quantile(0.0 + quantile)
-        upper_bound = df[full_column_selector].dropna().quantile(1.0 - quantile)
-        return _range_filter(row, column_name, heating_or_cooling, lower_bound, upper_bound, target_baseline)
-
-    def _tau_filter_heating(row, df):
-        return _range_filter(row, "tau", "heating", 0, 25)
-
-    def _tau_filter_cooling(row, df):
-        return _range_filter(row, "tau", "cooling", 0, 25)
-
-    def _cvrmse_filter_heating(row, df):
-        return _range_filter(row, "cv_root_mean_sq_err", "heating", upper_bound=0.6)
-
-    def _cvrmse_filter_cooling(row, df):
-        return _range_filter(row, "cv_root_mean_sq_err", "cooling", upper_bound=0.6)
-
-    def _savings_filter_p01_heating(row, df):
-        return _percentile_range_filter(row, "percent_savings", "heating", df, 0.01, True)
-
-    def _savings_filter_p01_cooling(row, df):
-        return _percentile_range_filter(row, "percent_savings", "cooling", df, 0.01, True)
-
-    def _combine_filters(filters):
-        def _new_filter(row, df):
-            return reduce(lambda x, y: x and y(row, df), filters, True)
-        return _new_filter
-
-    def heating_stats(df, filter_, label):
-        heating_df = df[["heating" in name for name in df["heating_or_cooling"]]]
-        return get_filtered_stats(
-            heating_df, filter_, label,
-            "heating", REAL_OR_INTEGER_VALUED_COLUMNS_HEATING,
-            target_baseline_method)
-
-    def cooling_stats(df, filter_, label):
-        cooling_df = df[["cooling" in name for name in df["heating_or_cooling"]]]
-        return get_filtered_stats(
-            cooling_df, filter_, label,
-            "cooling", REAL_OR_INTEGER_VALUED_COLUMNS_COOLING,
-            target_baseline_method)
-
-    very_cold_cold_df = metrics_df[[
-        (cz is not None) and "Very-Cold/Cold" in cz
-        for cz in metrics_df["climate_zone"]
-    ]]
-    mixed_humid_df = metrics_df[[
-        (cz is not None) and "Mixed-Humid" in cz
-        for cz in metrics_df["climate_zone"]
-    ]]
-    mixed_dry_hot_dry_df = metrics_df[[
-        (cz is not None) and "Mixed-Dry/Hot-Dry" in cz
-        for cz in metrics_df["climate_zone"]
-    ]]
-    hot_humid_df = metrics_df[[
-        (cz is not None) and "Hot-Humid" in cz
-        for cz in metrics_df["climate_zone"]
-    ]]
-    marine_df = metrics_df[[
-        (cz is not None) and "Marine" in cz
-        for cz in metrics_df["climate_zone"]
-    ]]
-
-    filter_0 = _identity_filter
-    filter_1_heating = _combine_filters([_tau_filter_heating])
-    filter_1_cooling = _combine_filters([_tau_filter_cooling])
-    filter_2_heating = _combine_filters([_tau_filter_heating, _cvrmse_filter_heating])
-    filter_2_cooling = _combine_filters([_tau_filter_cooling, _cvrmse_filter_cooling])
-    filter_3_heating = _combine_filters([_tau_filter_heating, _cvrmse_filter_heating, _savings_filter_p01_heating])
-    filter_3_cooling = _combine_filters([_tau_filter_cooling, _cvrmse_filter_cooling, _savings_filter_p01_cooling])
+            return "{}_{}".format(column_name, target_baseline_method)
+        return column_name
+
+    _tau_filter_heating = range_filter("tau", 0, 25)
+    _tau_filter_cooling = range_filter("tau", 0, 25)
+    _cvrmse_filter_heating = range_filter("cv_root_mean_sq_err", upper_bound=0.6)
+    _cvrmse_filter_cooling = range_filter("cv_root_mean_sq_err", upper_bound=0.6)
+    _savings_filter_p01_heating = percentile_range_filter(
+        _column_selector("percent_savings", True), 0.01)
+    _savings_filter_p01_cooling = percentile_range_filter(
+        _column_selector("percent_savings", True), 0.01)
+
+    def _contains(column, pattern):
+        column = metrics_df[column]
+        return column.where(column.notnull(), "").astype(str).str.contains(pattern, regex=False).values
+
+    # Each (climate zone, heating or cooling) subset is sliced once and
+    # shared by every filter.
+    climate_zones = [("all", np.ones(len(metrics_df), dtype=bool))] + [
+        (zone_label, _contains("climate_zone", climate_zone))
+        for climate_zone, zone_label in CLIMATE_ZONE_LABELS.items()
+    ]
+    heating_or_cooling = [
+        ("heating", _contains("heating_or_cooling", "heating"), REAL_OR_INTEGER_VALUED_COLUMNS_HEATING),
+        ("cooling", _contains("heating_or_cooling", "cooling"), REAL_OR_INTEGER_VALUED_COLUMNS_COOLING),
+    ]
+    groups = [
+        (zone_label, method, target_columns, metrics_df[zone_mask & method_mask])
+        for zone_label, zone_mask in climate_zones
+        for method, method_mask, target_columns in heating_or_cooling
+    ]
 
+    filter_0 = identity_filter()
+    filter_1 = {
+        "heating": combine_filters([_tau_filter_heating]),
+        "cooling": combine_filters([_tau_filter_cooling]),
+    }
+    filter_2 = {
+        "heating": combine_filters([_tau_filter_heating, _cvrmse_filter_heating]),
+        "cooling": combine_filters([_tau_filter_cooling, _cvrmse_filter_cooling]),
+    }
+    filter_3 = {
+        "heating": combine_filters([_tau_filter_heating, _cvrmse_filter_heating, _savings_filter_p01_heating]),
+        "cooling": combine_filters([_tau_filter_cooling, _cvrmse_filter_cooling, _savings_filter_p01_cooling]),
+    }
+
+    filters = [("no_filter", {"heating": filter_0, "cooling": filter_0})]
     if advanced_filtering:
-        stats = list(chain.from_iterable([
-            heating_stats(metrics_df, filter_0, "all_no_filter"),
-            cooling_stats(metrics_df, filter_0, "all_no_filter"),
-            heating_stats(very_cold_cold_df, filter_0, "very-cold_cold_no_filter"),
-            cooling_stats(very_cold_cold_df, filter_0, "very-cold_cold_no_filter"),
-            heating_stats(mixed_humid_df, filter_0, "mixed-humid_no_filter"),
-            cooling_stats(mixed_humid_df, filter_0, "mixed-humid_no_filter"),
-            heating_stats(mixed_dry_hot_dry_df, filter_0, "mixed-dry_hot-dry_no_filter"),
-            cooling_stats(mixed_dry_hot_dry_df, filter_0, "mixed-dry_hot-dry_no_filter"),
-            heating_stats(hot_humid_df, filter_0, "hot-humid_no_filter"),
-            cooling_stats(hot_humid_df, filter_0, "hot-humid_no_filter"),
-            heating_stats(marine_df, filter_0, "marine_no_filter"),
-            cooling_stats(marine_df, filter_0, "marine_no_filter"),
-
-            heating_stats(metrics_df, filter_1_heating, "all_tau_filter"),
-            cooling_stats(metrics_df, filter_1_cooling, "all_tau_filter"),
-            heating_stats(very_cold_cold_df, filter_1_heating, "very-cold_cold_tau_filter"),
-            cooling_stats(very_cold_cold_df, filter_1_cooling, "very-cold_cold_tau_filter"),
-            heating_stats(mixed_humid_df, filter_1_heating, "mixed-humid_tau_filter"),
-            cooling_stats(mixed_humid_df, filter_1_cooling, "mixed-humid_tau_filter"),
-            heating_stats(mixed_dry_hot_dry_df, filter_1_heating, "mixed-dry_hot-dry_tau_filter"),
-            cooling_stats(mixed_dry_hot_dry_df, filter_1_cooling, "mixed-dry_hot-dry_tau_filter"),
-            heating_stats(hot_humid_df, filter_1_heating, "hot-humid_tau_filter"),
-            cooling_stats(hot_humid_df, filter_1_cooling, "hot-humid_tau_filter"),
-            heating_stats(marine_df, filter_1_heating, "marine_tau_filter"),
-            cooling_stats(marine_df, filter_1_cooling, "marine_tau_filter"),
-
-            heating_stats(metrics_df, filter_2_heating, "all_tau_cvrmse_filter"),
-            cooling_stats(metrics_df, filter_2_cooling, "all_tau_cvrmse_filter"),
-            heating_stats(very_cold_cold_df, filter_2_heating, "very-cold_cold_tau_cvrmse_filter"),
-            cooling_stats(very_cold_cold_df, filter_2_cooling, "very-cold_cold_tau_cvrmse_filter"),
-            heating_stats(mixed_humid_df, filter_2_heating, "mixed-humid_tau_cvrmse_filter"),
-            cooling_stats(mixed_humid_df, filter_2_cooling, "mixed-humid_tau_cvrmse_filter"),
-            heating_stats(mixed_dry_hot_dry_df, filter_2_heating, "mixed-dry_hot-dry_tau_cvrmse_filter"),
-            cooling_stats(mixed_dry_hot_dry_df, filter_2_cooling, "mixed-dry_hot-dry_tau_cvrmse_filter"),
-            heating_stats(hot_humid_df, filter_2_heating, "hot-humid_tau_cvrmse_filter"),
-            cooling_stats(hot_humid_df, filter_2_cooling, "hot-humid_tau_cvrmse_filter"),
-            heating_stats(marine_df, filter_2_heating, "marine_tau_cvrmse_filter"),
-            cooling_stats(marine_df, filter_2_cooling, "marine_tau_cvrmse_filter"),
-
-            heating_stats(metrics_df, filter_3_heating, "all_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(metrics_df, filter_3_cooling, "all_tau_cvrmse_savings_p01_filter"),
-            heating_stats(very_cold_cold_df, filter_3_heating, "very-cold_cold_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(very_cold_cold_df, filter_3_cooling, "very-cold_cold_tau_cvrmse_savings_p01_filter"),
-            heating_stats(mixed_humid_df, filter_3_heating, "mixed-humid_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(mixed_humid_df, filter_3_cooling, "mixed-humid_tau_cvrmse_savings_p01_filter"),
-            heating_stats(mixed_dry_hot_dry_df, filter_3_heating, "mixed-dry_hot-dry_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(mixed_dry_hot_dry_df, filter_3_cooling, "mixed-dry_hot-dry_tau_cvrmse_savings_p01_filter"),
-            heating_stats(hot_humid_df, filter_3_heating, "hot-humid_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(hot_humid_df, filter_3_cooling, "hot-humid_tau_cvrmse_savings_p01_filter"),
-            heating_stats(marine_df, filter_3_heating, "marine_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(marine_df, filter_3_cooling, "marine_tau_cvrmse_savings_p01_filter"),
-        ]))
-    else:
-        stats = list(chain.from_iterable([
-            heating_stats(metrics_df, filter_0, "all_no_filter"),
-            cooling_stats(metrics_df, filter_0, "all_no_filter"),
-            heating_stats(very_cold_cold_df, filter_0, "very-cold_cold_no_filter"),
-            cooling_stats(very_cold_cold_df, filter_0, "very-cold_cold_no_filter"),
-            heating_stats(mixed_humid_df, filter_0, "mixed-humid_no_filter"),
-            cooling_stats(mixed_humid_df, filter_0, "mixed-humid_no_filter"),
-            heating_stats(mixed_dry_hot_dry_df, filter_0, "mixed-dry_hot-dry_no_filter"),
-            cooling_stats(mixed_dry_hot_dry_df, filter_0, "mixed-dry_hot-dry_no_filter"),
-            heating_stats(hot_humid_df, filter_0, "hot-humid_no_filter"),
-            cooling_stats(hot_humid_df, filter_0, "hot-humid_no_filter"),
-            heating_stats(marine_df, filter_0, "marine_no_filter"),
-            cooling_stats(marine_df, filter_0, "marine_no_filter"),
-
-            heating_stats(metrics_df, filter_3_heating, "all_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(metrics_df, filter_3_cooling, "all_tau_cvrmse_savings_p01_filter"),
-            heating_stats(very_cold_cold_df, filter_3_heating, "very-cold_cold_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(very_cold_cold_df, filter_3_cooling, "very-cold_cold_tau_cvrmse_savings_p01_filter"),
-            heating_stats(mixed_humid_df, filter_3_heating, "mixed-humid_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(mixed_humid_df, filter_3_cooling, "mixed-humid_tau_cvrmse_savings_p01_filter"),
-            heating_stats(mixed_dry_hot_dry_df, filter_3_heating, "mixed-dry_hot-dry_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(mixed_dry_hot_dry_df, filter_3_cooling, "mixed-dry_hot-dry_tau_cvrmse_savings_p01_filter"),
-            heating_stats(hot_humid_df, filter_3_heating, "hot-humid_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(hot_humid_df, filter_3_cooling, "hot-humid_tau_cvrmse_savings_p01_filter"),
-            heating_stats(marine_df, filter_3_heating, "marine_tau_cvrmse_savings_p01_filter"),
-            cooling_stats(marine_df, filter_3_cooling, "marine_tau_cvrmse_savings_p01_filter"),
-        ]))
+        filters += [("tau_filter", filter_1), ("tau_cvrmse_filter", filter_2)]
+    filters += [("tau_cvrmse_savings_p01_filter", filter_3)]
+
+    stats = list(chain.from_iterable(
+        get_filtered_stats(
+            df, row_filters[method], "{}_{}".format(zone_label, filter_label),
+            method, target_columns, target_baseline_method)
+        for filter_label, row_filters in filters
+        for zone_label, method, target_columns, df in groups
+    ))
 
     stats_dict = {stat["label"]: stat for stat in stats}
 
     def _load_climate_zone_weights(filename_or_buffer):
-        climate_zone_keys = {
-            "Very-Cold/Cold": "very-cold_cold",
-            "Mixed-Humid": "mixed-humid",
-            "Mixed-Dry/Hot-Dry": "mixed-dry_hot-dry",
-            "Hot-Humid": "hot-humid",
-            "Marine": "marine",
-        }
+        climate_zone_keys = CLIMATE_ZONE_LABELS
         df = pd.read_csv(
             filename_or_buffer,
             usecols=["climate_zone", "heating_weight", "cooling_weight"],
@@ -0,0 +1,265 @@
+""" Memory-mapped storage for thermostat time series.
+
+A store is a directory with two files:
+
+- :code:`values.bin`: the values of every series of every thermostat, as
+  one contiguous array (float32 by default).
+- :code:`index.json`: per thermostat, its metadata and for each series the
+  offset and length into that array, with the start timestamp and frequency
+  which replace a stored :code:`DatetimeIndex`.
+
+Thermostats loaded from a store are :code:`StoredThermostat` objects, whose
+series are built on first access as views into the memory-mapped file.
+They pickle as a file path plus index entry, so sending one to a worker
+process does not copy its data.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from thermostat.core import Thermostat
+
+VALUES_FILENAME = "values.bin"
+INDEX_FILENAME = "index.json"
+
+# Time series of a thermostat, in the order they are stored.
+SERIES_NAMES = [
+    "temperature_in",
+    "temperature_out",
+    "cooling_setpoint",
+    "heating_setpoint",
+    "cool_runtime",
+    "heat_runtime",
+    "auxiliary_heat_runtime",
+    "emergency_heat_runtime",
+]
+
+SERIES_FREQUENCIES = {
+    "temperature_in": "H",
+    "temperature_out": "H",
+    "cooling_setpoint": "H",
+    "heating_setpoint": "H",
+    "cool_runtime": "D",
+    "heat_runtime": "D",
+    "auxiliary_heat_runtime": "H",
+    "emergency_heat_runtime": "H",
+}
+
+# Memory maps opened by this process, keyed by (filename, dtype, size) so a
+# store which is rewritten is mapped again.
+_memmaps = {}
+
+
+def _get_memmap(values_filename, dtype):
+    size = os.path.getsize(values_filename)
+    key = (values_filename, dtype, size)
+    if key not in _memmaps:
+        if size == 0:
+            _memmaps[key] = np.zeros(0, dtype=dtype)
+        else:
+            # Copy-on-write: the file is never modified through a view.
+            _memmaps[key] = np.memmap(values_filename, dtype=dtype, mode="c")
+    return _memmaps[key]
+
+
+class _StoredSeries(object):
+    """ Descriptor for a series of a :code:`StoredThermostat`, built lazily
+    from the store and replaceable by assignment like a plain attribute.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, thermostat, owner):
+        if thermostat is None:
+            return self
+        if self.name not in thermostat.__dict__:
+            thermostat.__dict__[self.name] = thermostat._load_series(self.name)
+            thermostat._loaded_series.add(self.name)
+        return thermostat.__dict__[self.name]
+
+    def __set__(self, thermostat, value):
+        thermostat.__dict__[self.name] = value
+        thermostat._loaded_series.discard(self.name)
+
+
+class StoredThermostat(Thermostat):
+    """ A :code:`Thermostat` whose time series live in a memory-mapped
+    :code:`ThermostatStore`.
+
+    Series are loaded on first access as Series views over the stored
+    values, and are not pickled; a pickled StoredThermostat is rebuilt
+    from its store in the receiving process.
+
+    Parameters
+    ----------
+    values_filename : str
+        Path to the values file of the store.
+    dtype : str
+        Dtype of the stored values.
+    entry : dict
+        Index entry of the thermostat, as written by
+        :code:`write_thermostat_store`.
+    """
+
+    temperature_in = _StoredSeries("temperature_in")
+    temperature_out = _StoredSeries("temperature_out")
+    cooling_setpoint = _StoredSeries("cooling_setpoint")
+    heating_setpoint = _StoredSeries("heating_setpoint")
+    cool_runtime = _StoredSeries("cool_runtime")
+    heat_runtime = _StoredSeries("heat_runtime")
+    auxiliary_heat_runtime = _StoredSeries("auxiliary_heat_runtime")
+    emergency_heat_runtime = _StoredSeries("emergency_heat_runtime")
+
+    def __init__(self, values_filename, dtype, entry):
+        # The series were validated and interpolated when the store was
+        # written, so Thermostat.__init__ is not repeated here.
+        self.values_filename = values_filename
+        self.dtype = dtype
+        self.entry = entry
+        self._loaded_series = set()
+
+        self.thermostat_id = entry["thermostat_id"]
+        self.equipment_type = entry["equipment_type"]
+        self.zipcode = entry["zipcode"]
+        self.station = entry["station"]
+
+    def _load_series(self, name):
+        location = self.entry["series"].get(name)
+        if location is None:
+            return None
+        offset, length, start = location
+        if length == 0:
+            return pd.Series([], index=pd.DatetimeIndex([]), dtype=self.dtype)
+        values = self._get_values()[offset:offset + length]
+        index = pd.date_range(start=pd.Timestamp(start), periods=length, freq=SERIES_FREQUENCIES[name])
+        return pd.Series(values, index=index, copy=False)
+
+    def _get_values(self):
+        return _get_memmap(self.values_filename, self.dtype)
+
+    def __getstate__(self):
+        # Only the location of the data is sent to other processes; series
+        # which were replaced on this object are sent as they are.
+        state = Thermostat.__getstate__(self)
+        for name in self._loaded_series:
+            del state[name]
+        state["_loaded_series"] = set()
+        return state
+
+
+class ThermostatStore(object):
+    """ A memory-mapped store of thermostat time series, as written by
+    :code:`write_thermostat_store`.
+
+    Parameters
+    ----------
+    path : str
+        Directory containing the store.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.values_filename = os.path.join(path, VALUES_FILENAME)
+        with open(os.path.join(path, INDEX_FILENAME)) as f:
+            index = json.load(f)
+        self.dtype = index["dtype"]
+        self.entries = index["thermostats"]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        for entry in self.entries:
+            yield StoredThermostat(self.values_filename, self.dtype, entry)
+
+    def get(self, thermostat_id):
+        """ Returns the first thermostat in the store with the given id, or
+        None if there is none.
+        """
+        for entry in self.entries:
+            if entry["thermostat_id"] == thermostat_id:
+                return StoredThermostat(self.values_filename, self.dtype, entry)
+        return None
+
+
+def thermostat_entry(thermostat, offset=0):
+    """ Lays out the time series of a thermostat in a flat array of values.
+
+    Parameters
+    ----------
+    thermostat : thermostat.core.Thermostat
+        Thermostat to lay out.
+    offset : int
+        Position in the array of the thermostat's first value.
+
+    Returns
+    -------
+    entry : dict
+        Index entry of the thermostat, with the offset, length and start
+        timestamp of each series.
+    values : list of np.ndarray
+        Values of the series which are not None, to be placed in the array
+        one after another from :code:`offset`.
+    """
+    series_locations = {}
+    values = []
+    for name in SERIES_NAMES:
+        series = getattr(thermostat, name)
+        if series is None:
+            series_locations[name] = None
+            continue
+        start = series.index[0].isoformat() if len(series) > 0 else None
+        series_locations[name] = [offset, len(series), start]
+        values.append(series.values)
+        offset += len(series)
+
+    entry = {
+        "thermostat_id": thermostat.thermostat_id,
+        "equipment_type": int(thermostat.equipment_type),
+        "zipcode": thermostat.zipcode,
+        "station": thermostat.station,
+        "series": series_locations,
+    }
+    return entry, values
+
+
+def write_thermostat_store(thermostats, path, dtype="float32"):
+    """ Writes the time series of thermostats to a memory-mapped store.
+
+    Parameters
+    ----------
+    thermostats : iterable of thermostat.core.Thermostat
+        Thermostats to store, e.g. from :code:`thermostat.importers.from_csv`.
+        They are written one at a time, so this may be an iterator.
+    path : str
+        Directory to write the store to. It is created if needed.
+    dtype : str
+        Dtype of the stored values. float32 halves the size of the store;
+        use float64 to keep values identical to the source thermostats.
+
+    Returns
+    -------
+    store : thermostat.store.ThermostatStore
+        The written store.
+    """
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    dtype = np.dtype(dtype)
+    entries = []
+    offset = 0
+    with open(os.path.join(path, VALUES_FILENAME), "wb") as f:
+        for thermostat in thermostats:
+            entry, values = thermostat_entry(thermostat, offset)
+            for series_values in values:
+                np.asarray(series_values, dtype=dtype).tofile(f)
+                offset += len(series_values)
+            entries.append(entry)
+
+    with open(os.path.join(path, INDEX_FILENAME), "w") as f:
+        json.dump({"dtype": dtype.name, "thermostats": entries}, f)
+
+    return ThermostatStore(path)
@@ -0,0 +1,196 @@
+""" Shared-memory transport of thermostats to worker processes.
+
+:code:`share_thermostats` copies the time series of a batch of thermostats
+into one :code:`multiprocessing.shared_memory` block, laid out as in a
+:code:`thermostat.store.ThermostatStore`. The returned
+:code:`SharedThermostat` objects pickle as the name of the block plus their
+index entry, so a worker receives a few hundred bytes per thermostat rather
+than its pickled series and indexes, and builds its series as views into
+the block.
+
+:code:`multiprocessing.shared_memory` was added in Python 3.8; on earlier
+versions this module can be imported, but sharing thermostats raises an
+ImportError.
+"""
+import os
+import weakref
+
+import numpy as np
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    shared_memory = None
+
+from thermostat.store import StoredThermostat, thermostat_entry
+
+# Thermostats copied to each shared memory block by the multiple thermostat
+# functions; a block is released once its thermostats are done.
+SHARED_MEMORY_BATCH_SIZE = 256
+
+# Blocks shared at once by the multiple thermostat functions: the next block
+# is shared while the thermostats of the current one finish.
+SHARED_MEMORY_BLOCKS_IN_FLIGHT = 2
+
+# Blocks attached by this process, by name, as (block, values).
+_attached = {}
+
+# Names of the blocks created by this process, or by its parent before
+# forking it.
+_created = set()
+
+# Id of the process which started the resource tracker this process uses.
+_tracker_owner = None
+
+
+def _require_shared_memory():
+    if shared_memory is None:
+        raise ImportError("Sharing thermostats requires multiprocessing.shared_memory (Python 3.8 or later).")
+
+
+def _note_tracker():
+    """ Records whether this process is about to start its own resource
+    tracker, which is the case when it has none yet. Forked and spawned
+    processes otherwise share the tracker of their parent.
+    """
+    global _tracker_owner
+    if os.name == "posix" and resource_tracker._resource_tracker._fd is None:
+        _tracker_owner = os.getpid()
+
+
+def _open_untracked(name):
+    """ Attaches an existing block without leaving it registered with the
+    resource tracker. Only the process which created a block may unlink it:
+    a worker's own tracker would otherwise report the block as leaked and
+    unlink it when the worker exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13, attaching always registers the block.
+        pass
+    _note_tracker()
+    block = shared_memory.SharedMemory(name=name)
+    # A tracker shared with the creator tracks each name once, so removing
+    # the registration there would drop the creator's.
+    if _tracker_owner == os.getpid() and name not in _created:
+        resource_tracker.unregister(block._name, "shared_memory")
+    return block
+
+
+def _attach(name, dtype, size):
+    if name not in _attached:
+        _require_shared_memory()
+        # Release blocks of earlier batches. Series of their thermostats are
+        # views of the values array, and numpy does not hold the block's
+        # buffer, so each block is closed only once its array is freed.
+        for block, values in _attached.values():
+            weakref.finalize(values, block.close)
+        _attached.clear()
+        block = _open_untracked(name)
+        _attached[name] = (block, np.ndarray((size,), dtype=dtype, buffer=block.buf))
+    return _attached[name][1]
+
+
+class SharedThermostat(StoredThermostat):
+    """ A :code:`Thermostat` whose time series live in a shared memory
+    block written by :code:`share_thermostats`.
+
+    Parameters
+    ----------
+    block_name : str
+        Name of the shared memory block.
+    dtype : str
+        Dtype of the values in the block.
+    size : int
+        Number of values in the block.
+    entry : dict
+        Index entry of the thermostat, as for :code:`StoredThermostat`.
+    """
+
+    def __init__(self, block_name, dtype, size, entry):
+        StoredThermostat.__init__(self, None, dtype, entry)
+        self.block_name = block_name
+        self.size = size
+
+    def _get_values(self):
+        return _attach(self.block_name, self.dtype, self.size)
+
+
+class SharedThermostats(object):
+    """ A batch of thermostats copied to a shared memory block, as returned
+    by :code:`share_thermostats`.
+
+    The block is removed by :code:`close`, or on leaving a :code:`with`
+    block, after which the thermostats can no longer be loaded.
+
+    Attributes
+    ----------
+    thermostats : list of SharedThermostat
+        The shared thermostats, in order.
+    """
+
+    def __init__(self, block, thermostats):
+        self.block = block
+        self.thermostats = thermostats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.thermostats)
+
+    def close(self):
+        if self.block is not None:
+            _created.discard(self.block.name)
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+
+def share_thermostats(thermostats, dtype="float64"):
+    """ Copies the time series of thermostats to a shared memory block.
+
+    Parameters
+    ----------
+    thermostats : list of thermostat.core.Thermostat
+        Thermostats to share.
+    dtype : str
+        Dtype of the shared values. Use float64, the default, to keep
+        metrics identical to those of the source thermostats.
+
+    Returns
+    -------
+    shared : SharedThermostats
+        The shared thermostats. Close it to free the block.
+    """
+    _require_shared_memory()
+    dtype = np.dtype(dtype)
+    entries = []
+    values = []
+    offset = 0
+    for thermostat in thermostats:
+        entry, series_values = thermostat_entry(thermostat, offset)
+        entries.append(entry)
+        values.extend(series_values)
+        offset += sum(len(v) for v in series_values)
+
+    _note_tracker()
+    block = shared_memory.SharedMemory(create=True, size=max(offset * dtype.itemsize, 1))
+    _created.add(block.name)
+    try:
+        block_values = np.ndarray((offset,), dtype=dtype, buffer=block.buf)
+        if values:
+            np.concatenate(values, out=block_values, casting="same_kind")
+        # Views must not outlive the block, so none are kept here.
+        del block_values
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+
+    return SharedThermostats(block, [
+        SharedThermostat(block.name, dtype.name, offset, entry) for entry in entries])